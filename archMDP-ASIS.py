@@ -1,116 +1,60 @@
-from pathlib import Path
-
-import yaml
 from manim import *
 
+from captions import attach_captions
+from changelog_ticker import attach_changelog_ticker
+from media_cache import attach_media_cache
+from render_progress import attach_progress_from_env
+from scene_plan import (
+    COLORS,
+    DEFAULT_MILESTONE_TITLE,
+    DEFAULT_SUBTITLE,
+    FALLBACK_TITLES,
+    LEGEND,
+    compile_plan,
+)
 
-def load_timeline_config(path: Path = Path("cronos.yaml")) -> dict:
-    if not path.exists():
-        return {
-            "labels": ["Ene 2024", "Mar 2024", "Nov 2025", "Dic 2025", "Ene 2026"],
-            "titles": [
-                "Creando Escenario",
-                "Timeout F5",
-                "Bypass Apache",
-                "Falla Apache L1",
-                "RollBack F5",
-            ],
-            "details": ["", "", "", "", ""],
-        }
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    timeline = data.get("timeline") or {}
-    milestones = timeline.get("milestones") or []
-    if len(milestones) < 2:
-        raise ValueError("cronos.yaml: se requieren minimo 2 hitos en timeline.milestones")
-    if len(milestones) > 6:
-        print("cronos.yaml: se paso el maximo de 6 hitos, se usaran solo los primeros 6.")
-        milestones = milestones[:6]
-    labels = [str(item.get("label") or "") for item in milestones]
-    titles = [str(item.get("title") or "") for item in milestones]
-    details = [str(item.get("detail") or "") for item in milestones]
-    duration_seconds = timeline.get("duration_seconds") or 77
-    return {
-        "labels": labels,
-        "titles": titles,
-        "details": details,
-        "duration_seconds": duration_seconds,
-    }
-
-def load_visual_config(path: Path = Path("archMDP-ASIS.yaml")) -> dict:
-    defaults = {
-        "base_line": {
-            "width": 1.0,
-            "opacity": 0.07,
-        },
-        "trail": {
-            "width": 2.0,
-            "opacity": 0.75,
-            "fade_time": 3.2,
-            "linger_time": 0.6,
-        },
-        "trail_stuck": {
-            "fade_time": 0.4,
-            "linger_time": 0.2,
-        },
-    }
-    if not path.exists():
-        return defaults
-    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
-    config = defaults | data
-    config["base_line"] = defaults["base_line"] | (data.get("base_line") or {})
-    config["trail"] = defaults["trail"] | (data.get("trail") or {})
-    config["trail_stuck"] = defaults["trail_stuck"] | (data.get("trail_stuck") or {})
-    return config
-
-
-def label_to_month_index(label: str) -> int | None:
-    parts = label.strip().split()
-    if len(parts) < 2:
-        return None
-    month_key = parts[0][:3].lower()
-    try:
-        year = int(parts[1])
-    except ValueError:
-        return None
-    months = {
-        "ene": 1,
-        "feb": 2,
-        "mar": 3,
-        "abr": 4,
-        "may": 5,
-        "jun": 6,
-        "jul": 7,
-        "ago": 8,
-        "sep": 9,
-        "oct": 10,
-        "nov": 11,
-        "dic": 12,
-    }
-    month = months.get(month_key)
-    if not month:
-        return None
-    return year * 12 + month
 
 class ArquitecturaMDPLBTR(Scene):
+    # render_variants.py reemplaza este atributo para renderizar otras versiones
+    # (titulo, hitos, topologia, fallas) sin duplicar el script.
+    scenario: dict | None = None
+    # Hitos a renderizar (None = todos); el resto se salta sin generar frames.
+    render_sections: set[int] | None = None
+
+    def milestone_section(self, index: int) -> None:
+        skip = self.render_sections is not None and index not in self.render_sections
+        self.next_section(f"hito_{index}", skip_animations=skip)
+
     def construct(self):
-        timeline_config = load_timeline_config()
+        # Posiciones, rutas y tiempos de las transacciones vienen del plan compilado
+        # (sin manim, validado y en cache), el mismo que usan export_svg.py y las
+        # herramientas de validacion.
+        plan = compile_plan(self.scenario)
+        scenario = plan.scenario
+        # Eventos de progreso para dashboards/cola (solo si MDP_PROGRESS esta definido).
+        attach_media_cache(self)
+        attach_progress_from_env(self, plan)
+        # Con `captions` el titulo/detalle del hito va en un .vtt/.srt junto al video
+        # y no se rasterizan (los play de texto quedan como wait de igual duracion).
+        captions = attach_captions(self, plan)
+        timeline_config = scenario["timeline_config"]
+        start_index = 1 if len(timeline_config["labels"]) > 1 else 0
+        self.milestone_section(start_index)
         titles = timeline_config.get("titles") or []
         details = timeline_config.get("details") or []
-        duration_seconds = float(timeline_config.get("duration_seconds") or 77)
-        def title_text(idx: int, fallback: str) -> str:
-            return titles[idx] if idx < len(titles) and titles[idx] else fallback
+        def title_text(idx: int) -> str:
+            return titles[idx] if idx < len(titles) and titles[idx] else FALLBACK_TITLES.get(idx, DEFAULT_MILESTONE_TITLE)
         def detail_text(idx: int) -> str:
             return details[idx] if idx < len(details) else ""
 
-        visual_config = load_visual_config()
+        visual_config = scenario["visual_config"]
         base_line_cfg = visual_config.get("base_line") or {}
         trail_cfg = visual_config.get("trail") or {}
-        trail_stuck_cfg = visual_config.get("trail_stuck") or {}
 
-        title = Text("Arquitectura Motor de Pagos LBTR - ASIS - 2025", font_size=40).to_edge(UP)
-        default_subtitle = "Arquitectura sin HA\ndesde marzo 2024\n hasta enero 2025\naproximadamente."
+        title = Text(scenario["title"], font_size=40).to_edge(UP)
+        default_subtitle = DEFAULT_SUBTITLE
         signature = Text("by eCORE - PNLöP v³ & Manim v0.19.1", font_size=9)
-        version_document = Text("versión v2.2.16", font_size=9)
+        version_document = Text(f"versión {scenario['version_label']}", font_size=9)
         footer = VGroup(signature, version_document).arrange(RIGHT, buff=0.3)
         footer.next_to(title, DOWN, aligned_edge=RIGHT, buff=0.1)
         self.play(Write(title), FadeIn(footer))
@@ -118,14 +62,7 @@ class ArquitecturaMDPLBTR(Scene):
         # Timeline de hitos (alineada con la firma)
         timeline_line = Line(LEFT, RIGHT).set_width(footer.width)
         timeline_line.set_stroke(color=WHITE, width=2, opacity=0.25)
-        label_indexes = [label_to_month_index(label) for label in timeline_config["labels"]]
-        if all(idx is not None for idx in label_indexes):
-            min_idx = min(label_indexes)
-            max_idx = max(label_indexes)
-            denom = max(1, max_idx - min_idx)
-            timeline_positions = [(idx - min_idx) / denom for idx in label_indexes]
-        else:
-            timeline_positions = [i / max(1, len(timeline_config["labels"]) - 1) for i in range(len(timeline_config["labels"]))]
+        timeline_positions = [milestone.position for milestone in plan.milestones]
         timeline_labels = [Text(label, font_size=7) for label in timeline_config["labels"]]
         timeline_dots = [Dot(radius=0.04, color=WHITE) for _ in timeline_positions]
         for idx, (dot, label, pos) in enumerate(zip(timeline_dots, timeline_labels, timeline_positions)):
@@ -135,7 +72,6 @@ class ArquitecturaMDPLBTR(Scene):
             label.next_to(dot, direction, buff=0.3)
             label.rotate(angle, about_point=dot.get_center())
             label.shift(RIGHT * (dot.get_center()[0] - label.get_left()[0]))
-        start_index = 1 if len(timeline_positions) > 1 else 0
         marker_progress = ValueTracker(
             timeline_positions[start_index] if timeline_positions else 0.0
         )
@@ -184,24 +120,47 @@ class ArquitecturaMDPLBTR(Scene):
                 detail_text(current_index()) or default_subtitle,
                 font_size=9,
             ).next_to(title, DOWN, aligned_edge=LEFT, buff=0.1)
-        )
+        ) if not captions else VectorizedPoint(title.get_corner(DL) + DOWN * 0.1)
         timeline_event = always_redraw(
             lambda: Text(
-                title_text(current_index(), "Creando Escenario"),
+                title_text(current_index()),
                 font_size=14,
             ).next_to(timeline_group, UP, buff=0.14)
-        )
+        ) if not captions else None
+        milestone_text = [timeline_event]
+        def show_milestone_text(index: int, title_time: float):
+            if captions:
+                self.wait(title_time)
+                self.wait(0.4)
+                return
+            next_event = Text(title_text(index), font_size=14).next_to(timeline_group, UP, buff=0.14)
+            next_subtitle = Text(detail_text(index) or default_subtitle, font_size=9).next_to(title, DOWN, aligned_edge=LEFT, buff=0.1)
+            self.play(FadeOut(milestone_text[0]), FadeIn(next_event), run_time=title_time)
+            self.play(Transform(subtitle, next_subtitle), run_time=0.4)
+            milestone_text[0] = next_event
         def move_timeline_to(index: int, run_time: float = 2.0):
             if not timeline_positions:
                 return
             target = max(0, min(index, len(timeline_positions) - 1))
             current_index_value[0] = target
+            self.milestone_section(target)
             self.play(
                 marker_progress.animate.set_value(timeline_positions[target]),
                 run_time=run_time,
             )
-        self.play(FadeIn(timeline_group), FadeIn(timeline_marker), FadeIn(subtitle))
-        self.play(FadeIn(timeline_event), run_time=0.6)
+        def play_for(animations: list, run_time: float):
+            # Mismo criterio que _PlanBuilder.play_for: sin pagos se espera en vez de un play vacio.
+            if animations:
+                self.play(*animations, run_time=run_time)
+            else:
+                self.wait(run_time)
+        self.play(FadeIn(timeline_group), FadeIn(timeline_marker), *([] if captions else [FadeIn(subtitle)]))
+        # Changelog tipo tail -f bajo el subtitulo (opcional: `changelog_ticker` en el escenario).
+        attach_changelog_ticker(self, plan, subtitle)
+        if captions:
+            self.wait(0.6)
+        else:
+            self.play(FadeIn(timeline_event), run_time=0.6)
 
         def base_line(start, end):
             return Line(start, end).set_stroke(
@@ -210,19 +169,14 @@ class ArquitecturaMDPLBTR(Scene):
                 opacity=base_line_cfg.get("opacity", 0.07),
             )
 
-        def move_with_trail(
-            route,
-            dot,
-            move_time: float,
-            fade_time: float | None = None,
-            linger_time: float | None = None,
-        ):
-            fade_time = trail_cfg.get("fade_time", 3.2) if fade_time is None else fade_time
-            linger_time = trail_cfg.get("linger_time", 0.6) if linger_time is None else linger_time
+        def to_point(point) -> np.ndarray:
+            return np.array([point[0], point[1], 0.0])
+
+        def move_with_trail(tx, dot):
             path = VMobject()
-            path.set_points_as_corners(route)
+            path.set_points_as_corners([to_point(p) for p in tx.points])
             trail = VMobject()
-            trail.set_points_as_corners(route)
+            trail.set_points_as_corners([to_point(p) for p in tx.points])
             trail.set_stroke(
                 color=WHITE,
                 width=trail_cfg.get("width", 2.0),
@@ -230,48 +184,51 @@ class ArquitecturaMDPLBTR(Scene):
             )
             return Succession(
                 AnimationGroup(
-                    MoveAlongPath(dot, path, rate_func=linear, run_time=move_time),
-                    Create(trail, rate_func=linear, run_time=move_time),
+                    MoveAlongPath(dot, path, rate_func=linear, run_time=tx.move_time),
+                    Create(trail, rate_func=linear, run_time=tx.move_time),
                 ),
-                Wait(linger_time),
-                FadeOut(trail, run_time=fade_time, rate_func=linear),
+                Wait(tx.linger_time),
+                FadeOut(trail, run_time=tx.fade_time, rate_func=linear),
             )
 
-        # Columnas: MDP → F5 → OSBs → Tuxedos → Tandem
+        def node_circle(node_id: str):
+            node = plan.nodes[node_id]
+            return Circle(radius=node.radius, color=node.color).move_to(to_point(node.center))
+
+        def node_label(node_id: str, circle):
+            node = plan.nodes[node_id]
+            direction = UP if node.label_side == "up" else DOWN
+            return Text(node.label, font_size=node.label_size).next_to(circle, direction, buff=node.label_buff)
+
+        # Columnas: MDP → F5 → OSBs → Tuxedos → Tandem (layout en scene_plan.node_layout)
 
         # MDP
-        mdp = Circle(radius=0.5, color=BLUE).move_to(LEFT * 6)
-        mdp_label = Text("MDP", font_size=24).next_to(mdp, DOWN)
+        mdp = node_circle("mdp")
+        mdp_label = node_label("mdp", mdp)
 
         # F5
-        f5 = Circle(radius=0.5, color=GREEN).move_to(LEFT * 3)
-        f5_label = Text("F5", font_size=24).next_to(f5, DOWN)
+        f5 = node_circle("f5")
+        f5_label = node_label("f5", f5)
 
-        # OSBs (4 Morandé + 4 Longovilo)
+        # OSBs (4 Morandé + 4 Longovilo por defecto)
+        osb_morande = int(scenario["topology"]["osb_morande"])
         osb_nodes = []
         osb_labels = []
-        for i in range(4):
-            node = Circle(radius=0.2, color=YELLOW).move_to(RIGHT * 0 + UP * (2.5 - i * 0.8))
-            label = Text(f"OSB M{i+1}", font_size=12).next_to(node, DOWN, buff=0.1)
-            osb_nodes.append(node)
-            osb_labels.append(label)
-        for i in range(4):
-            node = Circle(radius=0.2, color=ORANGE).move_to(RIGHT * 0 + DOWN * (i * 0.8 + 1))
-            label = Text(f"OSB L{i+1}", font_size=12).next_to(node, DOWN, buff=0.1)
-            osb_nodes.append(node)
-            osb_labels.append(label)
+        for node_id in plan.nodes:
+            if node_id.startswith("osb_"):
+                node = node_circle(node_id)
+                osb_nodes.append(node)
+                osb_labels.append(node_label(node_id, node))
 
         # Tuxedos
-        tux1 = Circle(radius=0.5, color=PURPLE).move_to(RIGHT * 3 + UP * 0.8)
-        tux2 = Circle(radius=0.5, color=ORANGE).move_to(RIGHT * 3 + DOWN * 0.8)
-        tux_labels = [Text("Tux A", font_size=20).next_to(tux1, DOWN),
-                      Text("Tux L", font_size=20).next_to(tux2, DOWN)]
+        tux1 = node_circle("tux_a")
+        tux2 = node_circle("tux_l")
+        tux_labels = [node_label("tux_a", tux1), node_label("tux_l", tux2)]
 
         # Tandem
-        tan1 = Circle(radius=0.5, color=PURPLE).move_to(RIGHT * 6 + UP * 0.8)
-        tan2 = Circle(radius=0.5, color=GRAY).move_to(RIGHT * 6 + DOWN * 0.8)
-        tan_labels = [Text("Tandem A", font_size=20).next_to(tan1, DOWN),
-                      Text("Tandem L", font_size=20).next_to(tan2, DOWN)]
+        tan1 = node_circle("tandem_a")
+        tan2 = node_circle("tandem_l")
+        tan_labels = [node_label("tandem_a", tan1), node_label("tandem_l", tan2)]
 
         # Animar aparición
         self.play(FadeIn(mdp), Write(mdp_label))
@@ -286,21 +243,47 @@ class ArquitecturaMDPLBTR(Scene):
 
         # Leyenda de datacenter por color (esquina inferior izquierda)
         legend_items = [
-            VGroup(Dot(color=YELLOW, radius=0.06), Text("Morande", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=ORANGE, radius=0.06), Text("Longovilo", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=PURPLE, radius=0.06), Text("Aconcagua", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=GRAY, radius=0.06), Text("Inactivo", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=WHITE, radius=0.06), Text("Intento de Pago", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=RED, radius=0.06), Text("Pago Timeout", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=GREEN, radius=0.06), Text("Pago Exitoso", font_size=10)).arrange(RIGHT, buff=0.15),
-            VGroup(Dot(color=WHITE, radius=0.06), Text("Reset Apache", font_size=10)).arrange(RIGHT, buff=0.15),
-
-
-
+            VGroup(Dot(color=COLORS[color], radius=0.06), Text(text, font_size=10)).arrange(RIGHT, buff=0.15)
+            for color, text in LEGEND
         ]
         legend = VGroup(*legend_items).arrange(DOWN, aligned_edge=LEFT, buff=0.1).to_corner(DL).shift(RIGHT * 0.2 + UP * 0.2)
         self.play(FadeIn(legend))
 
+        # Traza real agregada (trace_bins.py): contadores acumulados sobre la leyenda.
+        # Cambian una vez por segundo de video para no generar un Text por frame.
+        if scenario.get("trace_bins"):
+            from trace_bins import OUTCOME_CLASSES, OUTCOME_LABELS, load_bins
+
+            bins = load_bins(scenario["trace_bins"])
+            cumulative = bins.cumulative()
+
+            def trace_counter_text() -> str:
+                totals = cumulative[bins.frame_at(float(int(self.time)))]
+                parts = [
+                    f"{OUTCOME_LABELS[name]}: {int(count):,}".replace(",", ".")
+                    for name, count in zip(OUTCOME_CLASSES, totals)
+                    if count or name == "delivered"
+                ]
+                return "\n".join(parts)
+
+            def trace_counter_mobject() -> Text:
+                return Text(trace_counter_text(), font_size=9, line_spacing=0.8).next_to(
+                    legend, UP, aligned_edge=LEFT, buff=0.15
+                )
+
+            trace_counter = trace_counter_mobject()
+            counter_second = [int(self.time)]
+
+            def update_trace_counter(mob, dt):
+                # Con `dt` los self.wait() no congelan el contador; solo se arma un
+                # Text nuevo cuando cambia el segundo.
+                if int(self.time) != counter_second[0]:
+                    counter_second[0] = int(self.time)
+                    mob.become(trace_counter_mobject())
+
+            trace_counter.add_updater(update_trace_counter)
+            self.add(trace_counter)
+
         # Conexiones
         line_mdp_f5 = base_line(mdp.get_right(), f5.get_left())
         self.play(Create(line_mdp_f5))
@@ -325,74 +308,32 @@ class ArquitecturaMDPLBTR(Scene):
         self.play(Create(lines_tux_tan[0]), Create(lines_tux_tan[1]))
 
         # Simulación de transacciones: 16 bolitas, la 4ª, 8ª, 12ª y última quedan atascadas en F5
-        travel_routes = []
-        for osb in osb_nodes:
-            travel_routes.append([
-                mdp.get_right(),
-                f5.get_left(), f5.get_right(),
-                osb.get_left(), osb.get_right(),
-                tux1.get_left(), tux1.get_right(),
-                tan1.get_left(),
-            ])
-            travel_routes.append([
-                mdp.get_right(),
-                f5.get_left(), f5.get_right(),
-                osb.get_left(), osb.get_right(),
-                tux2.get_left(), tux2.get_right(),
-                tan1.get_left(),
-            ])
-
-        stuck_indices = [3, 7, 11, 15]  # 4ª, 8ª, 12ª y última (0-based)
-        stuck_offsets = [
-            UP * 0.12 + LEFT * 0.05,
-            DOWN * 0.12 + RIGHT * 0.05,
-            UP * 0.05 + RIGHT * 0.12,
-            DOWN * 0.18 + LEFT * 0.12,
-        ]
-
-        travel_dots = []
         stuck_dots = []
         delivered_dots = []
         animations = []
-        for i, route in enumerate(travel_routes):
+        for tx in plan.phase("f5_initial"):
             dot = Dot(color=WHITE, radius=0.06)
             self.add(dot)
-            if i in stuck_indices:
-                offset = stuck_offsets[len(stuck_dots) % len(stuck_offsets)]
-                stuck_route = [mdp.get_right(), f5.get_center() + offset]
-                animations.append(move_with_trail(
-                    stuck_route,
-                    dot,
-                    move_time=0.6,
-                    fade_time=trail_stuck_cfg.get("fade_time", 0.4),
-                    linger_time=trail_stuck_cfg.get("linger_time", 0.2),
-                ))
+            animations.append(move_with_trail(tx, dot))
+            if tx.outcome == "timeout":
                 stuck_dots.append(dot)
             else:
-                animations.append(move_with_trail(route, dot, move_time=2.0))
                 delivered_dots.append(dot)
-            travel_dots.append(dot)
 
         # Lag suave para que se perciban secuenciales sin saturar
         self.play(LaggedStart(*animations, lag_ratio=0.08))
 
         # Las que llegan a Tandem se quedan verdes y se posicionan sobre Tandem A
-        self.play(*[dot.animate.set_color(GREEN) for dot in delivered_dots], run_time=1.0)
-        tandem_offsets = [
-            UP * 0.1 + LEFT * 0.05,
-            DOWN * 0.1 + RIGHT * 0.05,
-            UP * 0.05 + RIGHT * 0.1,
-            DOWN * 0.15 + LEFT * 0.1,
-            ORIGIN,
-        ]
-        self.play(*[
-            dot.animate.move_to(tan1.get_center() + tandem_offsets[i % len(tandem_offsets)])
-            for i, dot in enumerate(delivered_dots)
+        play_for([dot.animate.set_color(GREEN) for dot in delivered_dots], run_time=1.0)
+        delivered_txs = [tx for tx in plan.phase("f5_initial") if tx.outcome == "delivered"]
+        play_for([
+            dot.animate.move_to(to_point(tx.settle[2]))
+            for dot, tx in zip(delivered_dots, delivered_txs)
         ], run_time=0.6)
 
         # Cambio de color de las atascadas: espera 1s, luego rojo y gris
         self.wait(1.0)
-        self.play(*[dot.animate.set_color(RED) for dot in stuck_dots], run_time=1.0)
+        play_for([dot.animate.set_color(RED) for dot in stuck_dots], run_time=1.0)
 
         # Línea desde la leyenda "Pago Timeout" al centro de F5 (más delgada)
         timeout_source = legend[5]  # VGroup(Dot rojo + texto Pago Timeout)
@@ -408,23 +349,14 @@ class ArquitecturaMDPLBTR(Scene):
         self.play(FadeOut(success_line))
 
 
-        self.play(*[dot.animate.set_color(GRAY) for dot in stuck_dots], run_time=1.0)
-        tandem_offsets = [
-            UP*0.1+LEFT*0.05, DOWN*0.1+RIGHT*0.05,
-            UP*0.05+RIGHT*0.1, DOWN*0.15+LEFT*0.1,
-            ORIGIN
-        ]
-        self.play(*[
-            dot.animate.move_to(tan1.get_center() + tandem_offsets[i % len(tandem_offsets)])
-            for i, dot in enumerate(delivered_dots)
+        play_for([dot.animate.set_color(GRAY) for dot in stuck_dots], run_time=1.0)
+        play_for([
+            dot.animate.move_to(to_point(tx.settle[2]))
+            for dot, tx in zip(delivered_dots, delivered_txs)
         ], run_time=0.6)
 
         move_timeline_to(2, run_time=2.0)
-        next_event = Text(title_text(2, "Bypass Apache"), font_size=14).next_to(timeline_group, UP, buff=0.14)
-        next_subtitle = Text(detail_text(2) or default_subtitle, font_size=9).next_to(title, DOWN, aligned_edge=LEFT, buff=0.1)
-        self.play(FadeOut(timeline_event), FadeIn(next_event), run_time=0.8)
-        self.play(Transform(subtitle, next_subtitle), run_time=0.4)
-        timeline_event = next_event
+        show_milestone_text(2, title_time=0.8)
 
         # Al ocurrir los timeouts, desconectar todas las líneas previas
         self.play(
@@ -436,19 +368,19 @@ class ArquitecturaMDPLBTR(Scene):
         )
 
         # Apache proxies en la columna de F5 (se muestran al final, tras las bolitas)
-        apache_m1 = Circle(radius=0.3, color=YELLOW).move_to(LEFT * 3 + UP * 1.4)
-        apache_m1_label = Text("Apache Proxy M1", font_size=14).next_to(apache_m1, UP, buff=0.1)
-        apache_l1 = Circle(radius=0.3, color=ORANGE).move_to(LEFT * 3 + DOWN * 1.8)
-        apache_l1_label = Text("Apache Proxy L1", font_size=14).next_to(apache_l1, DOWN, buff=0.1)
+        apache_m1 = node_circle("apache_m1")
+        apache_m1_label = node_label("apache_m1", apache_m1)
+        apache_l1 = node_circle("apache_l1")
+        apache_l1_label = node_label("apache_l1", apache_l1)
         apache_l1_group = VGroup(apache_l1, apache_l1_label)
         self.play(FadeIn(apache_m1), Write(apache_m1_label),
                   FadeIn(apache_l1), Write(apache_l1_label))
 
         # Nuevas líneas: MDP → Apache L1 → OSB L1 → Tux A/L → Tandem A
         line_mdp_apache_l1 = base_line(mdp.get_right(), apache_l1.get_left())
-        line_apache_l1_osb_l1 = base_line(apache_l1.get_right(), osb_nodes[4].get_left())
-        line_osb_l1_tux1 = base_line(osb_nodes[4].get_right(), tux1.get_left())
-        line_osb_l1_tux2 = base_line(osb_nodes[4].get_right(), tux2.get_left())
+        line_apache_l1_osb_l1 = base_line(apache_l1.get_right(), osb_nodes[osb_morande].get_left())
+        line_osb_l1_tux1 = base_line(osb_nodes[osb_morande].get_right(), tux1.get_left())
+        line_osb_l1_tux2 = base_line(osb_nodes[osb_morande].get_right(), tux2.get_left())
         line_tux1_tan1_new = base_line(tux1.get_right(), tan1.get_left())
         line_tux2_tan1_new = base_line(tux2.get_right(), tan1.get_left())
 
@@ -460,36 +392,17 @@ class ArquitecturaMDPLBTR(Scene):
         self.play(Create(line_tux1_tan1_new), Create(line_tux2_tan1_new), run_time=0.3)
 
         # Nuevas transacciones (16) todas pasando por Apache L1 → OSB L1 → Tux A/L → Tandem A
-        apache_routes = []
-        for i in range(16):
-            next_tux = tux1 if i % 2 == 0 else tux2
-            apache_routes.append([
-                mdp.get_right(),
-                apache_l1.get_left(),
-                apache_l1.get_right(),
-                osb_nodes[4].get_left(),
-                osb_nodes[4].get_right(),
-                next_tux.get_left(),
-                next_tux.get_right(),
-                tan1.get_left(),
-            ])
-
-        apache_dots = [Dot(color=WHITE, radius=0.06) for _ in apache_routes]
+        apache_txs = plan.phase("apache_bypass")
+        apache_dots = [Dot(color=WHITE, radius=0.06) for _ in apache_txs]
         for dot in apache_dots:
             self.add(dot)
 
-        apache_anims = []
-        for dot, route in zip(apache_dots, apache_routes):
-            apache_anims.append(move_with_trail(route, dot, move_time=2.0))
+        apache_anims = [move_with_trail(tx, dot) for dot, tx in zip(apache_dots, apache_txs)]
 
         self.play(LaggedStart(*apache_anims, lag_ratio=0.08))
 
         move_timeline_to(3, run_time=2.0)
-        next_event = Text(title_text(3, "Falla Apache L1"), font_size=14).next_to(timeline_group, UP, buff=0.14)
-        next_subtitle = Text(detail_text(3) or default_subtitle, font_size=9).next_to(title, DOWN, aligned_edge=LEFT, buff=0.1)
-        self.play(FadeOut(timeline_event), FadeIn(next_event), run_time=0.4)
-        self.play(Transform(subtitle, next_subtitle), run_time=0.4)
-        timeline_event = next_event
+        show_milestone_text(3, title_time=0.4)
 
         # Falla en Apache L1: no pasan pagos, se encolan y luego se reinicia L1
         self.play(
@@ -499,37 +412,16 @@ class ArquitecturaMDPLBTR(Scene):
             FadeOut(line_tux1_tan1_new),
             FadeOut(line_tux2_tan1_new),
         )
-        l1_stuck_offsets = [
-            UP * 0.08 + LEFT * 0.04,
-            DOWN * 0.08 + RIGHT * 0.04,
-            UP * 0.04 + RIGHT * 0.08,
-            DOWN * 0.10 + LEFT * 0.08,
-        ]
-        l1_stuck_routes = []
-        for i in range(8):
-            offset = l1_stuck_offsets[i % len(l1_stuck_offsets)]
-            l1_stuck_routes.append([
-                mdp.get_right(),
-                apache_l1.get_left(),
-                apache_l1.get_center() + offset,
-            ])
-        l1_stuck_dots = [Dot(color=WHITE, radius=0.06) for _ in l1_stuck_routes]
+        l1_stuck_txs = plan.phase("apache_l1_queued")
+        l1_stuck_dots = [Dot(color=WHITE, radius=0.06) for _ in l1_stuck_txs]
         for dot in l1_stuck_dots:
             self.add(dot)
-        l1_stuck_anims = []
-        for dot, route in zip(l1_stuck_dots, l1_stuck_routes):
-            l1_stuck_anims.append(
-                move_with_trail(
-                    route,
-                    dot,
-                    move_time=0.8,
-                    fade_time=trail_stuck_cfg.get("fade_time", 0.4),
-                    linger_time=trail_stuck_cfg.get("linger_time", 0.2),
-                )
-            )
+        l1_stuck_anims = [move_with_trail(tx, dot) for dot, tx in zip(l1_stuck_dots, l1_stuck_txs)]
         self.play(LaggedStart(*l1_stuck_anims, lag_ratio=0.1))
-        self.play(*[dot.animate.set_color(RED) for dot in l1_stuck_dots], run_time=0.8)
-        self.play(*[dot.animate.set_color(GRAY) for dot in l1_stuck_dots], run_time=0.8)
+        # Con una historia de incidentes algunos encolados pueden llegar a entregarse.
+        l1_queued_dots = [dot for dot, tx in zip(l1_stuck_dots, l1_stuck_txs) if tx.outcome == "timeout"]
+        play_for([dot.animate.set_color(RED) for dot in l1_queued_dots], run_time=0.8)
+        play_for([dot.animate.set_color(GRAY) for dot in l1_queued_dots], run_time=0.8)
         self.play(apache_l1_group.animate.shift(DOWN * 0.18), run_time=0.2)
         self.play(apache_l1.animate.set_color(WHITE), run_time=0.1)
         for offset in [UP * 0.04, DOWN * 0.04, RIGHT * 0.04, LEFT * 0.04]:
@@ -552,34 +444,18 @@ class ArquitecturaMDPLBTR(Scene):
         self.play(Create(line_osb_l1_tux2), run_time=0.25)
         self.play(Create(line_tux1_tan1_new), Create(line_tux2_tan1_new), run_time=0.3)
 
-        apache_l1_routes_round2 = []
-        for i in range(16):
-            next_tux = tux1 if i % 2 == 0 else tux2
-            apache_l1_routes_round2.append([
-                mdp.get_right(),
-                apache_l1.get_left(),
-                apache_l1.get_right(),
-                osb_nodes[4].get_left(),
-                osb_nodes[4].get_right(),
-                next_tux.get_left(),
-                next_tux.get_right(),
-                tan1.get_left(),
-            ])
-        apache_l1_dots_round2 = [Dot(color=WHITE, radius=0.06) for _ in apache_l1_routes_round2]
+        round2_txs = plan.phase("apache_l1_round2")
+        apache_l1_dots_round2 = [Dot(color=WHITE, radius=0.06) for _ in round2_txs]
         for dot in apache_l1_dots_round2:
             self.add(dot)
-        apache_l1_anims_round2 = []
-        for dot, route in zip(apache_l1_dots_round2, apache_l1_routes_round2):
-            apache_l1_anims_round2.append(move_with_trail(route, dot, move_time=2.0))
+        apache_l1_anims_round2 = [
+            move_with_trail(tx, dot) for dot, tx in zip(apache_l1_dots_round2, round2_txs)
+        ]
         self.play(LaggedStart(*apache_l1_anims_round2, lag_ratio=0.08))
 
         move_timeline_to(4, run_time=2.0)
-        next_event = Text(title_text(4, "RollBack F5"), font_size=14).next_to(timeline_group, UP, buff=0.14)
-        next_subtitle = Text(detail_text(4) or default_subtitle, font_size=9).next_to(title, DOWN, aligned_edge=LEFT, buff=0.1)
-        self.play(FadeOut(timeline_event), FadeIn(next_event), run_time=0.8)
-        self.play(Transform(subtitle, next_subtitle), run_time=0.4)
-        timeline_event = next_event
-        new_title = Text("Arquitectura Motor de Pagos LBTR - TOBE - 2026", font_size=40).to_edge(UP)
+        show_milestone_text(4, title_time=0.8)
+        new_title = Text(scenario["final_title"], font_size=40).to_edge(UP)
         self.play(Transform(title, new_title), run_time=0.6)
 
         # Switch back to F5 and run all transactions with no timeouts
@@ -608,41 +484,15 @@ class ArquitecturaMDPLBTR(Scene):
             self.play(Create(l1), run_time=0.2)
             self.play(Create(l2), run_time=0.2)
 
-        f5_routes_final = []
-        for osb in osb_nodes:
-            f5_routes_final.append([
-                mdp.get_right(),
-                f5.get_left(), f5.get_right(),
-                osb.get_left(), osb.get_right(),
-                tux1.get_left(), tux1.get_right(),
-                tan1.get_left(),
-            ])
-            f5_routes_final.append([
-                mdp.get_right(),
-                f5.get_left(), f5.get_right(),
-                osb.get_left(), osb.get_right(),
-                tux2.get_left(), tux2.get_right(),
-                tan1.get_left(),
-            ])
-
-        f5_dots_final = [Dot(color=WHITE, radius=0.06) for _ in f5_routes_final]
+        final_txs = plan.phase("f5_final")
+        f5_dots_final = [Dot(color=WHITE, radius=0.06) for _ in final_txs]
         for dot in f5_dots_final:
             self.add(dot)
-        f5_anims_final = []
-        for dot, route in zip(f5_dots_final, f5_routes_final):
-            f5_anims_final.append(move_with_trail(route, dot, move_time=2.0))
+        f5_anims_final = [move_with_trail(tx, dot) for dot, tx in zip(f5_dots_final, final_txs)]
         self.play(LaggedStart(*f5_anims_final, lag_ratio=0.08))
-        self.play(*[dot.animate.set_color(GREEN) for dot in f5_dots_final], run_time=1.0)
-        tandem_offsets = [
-            UP * 0.1 + LEFT * 0.05,
-            DOWN * 0.1 + RIGHT * 0.05,
-            UP * 0.05 + RIGHT * 0.1,
-            DOWN * 0.15 + LEFT * 0.1,
-            ORIGIN,
-        ]
-        self.play(*[
-            dot.animate.move_to(tan1.get_center() + tandem_offsets[i % len(tandem_offsets)])
-            for i, dot in enumerate(f5_dots_final)
-        ], run_time=0.6)
+        # Con una historia de incidentes puede haber pagos sin entregar tambien aqui.
+        final_ok = [(dot, tx) for dot, tx in zip(f5_dots_final, final_txs) if tx.outcome == "delivered"]
+        play_for([dot.animate.set_color(GREEN) for dot, _ in final_ok], run_time=1.0)
+        play_for([dot.animate.move_to(to_point(tx.settle[2])) for dot, tx in final_ok], run_time=0.6)
 
         self.wait(2)
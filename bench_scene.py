@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from render_variants import render_variant
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES
+from scene_plan import compile_plan
+
+
+# Benchmark de escalamiento: variantes sinteticas de la escena, un eje a la vez
+# sobre el escenario base, cada una en un proceso nuevo (spawn) para medir su pico de RSS.
+RESULTS_DIR = Path("benchmarks")
+RESULTS_SCHEMA = 1
+AXES: dict[str, list[Any]] = {
+    "transactions": [16, 64, 256],
+    "osb_per_site": [4, 8, 16],
+    "trail_fade_time": [1.6, 3.2, 6.4],
+}
+REGRESSION_THRESHOLD = 0.10
+
+
+def case_scenario(axis: str, value: Any) -> dict[str, Any]:
+    if axis == "transactions":
+        return {"transactions": int(value)}
+    if axis == "osb_per_site":
+        return {"topology": {"osb_morande": int(value), "osb_longovilo": int(value)}}
+    if axis == "trail_fade_time":
+        return {"visual": {"trail": {"fade_time": float(value)}}}
+    raise ValueError(f"eje desconocido: {axis}")
+
+
+def build_cases(axes: list[str]) -> list[dict[str, Any]]:
+    cases = []
+    for axis in axes:
+        for value in AXES[axis]:
+            cases.append({"name": f"{axis}={value}", "axis": axis, "value": value, "scenario": case_scenario(axis, value)})
+    return cases
+
+
+def run_case(case: dict[str, Any], scene_file: str, scene_name: str, quality: str, media_dir: str) -> dict[str, Any]:
+    # Corre en un proceso propio: ru_maxrss es el pico de este caso y no de los anteriores.
+    fps = QUALITY_SIZES[quality][2]
+    plan = compile_plan(case["scenario"])
+    frames = sum(plan.frame_counts(fps))
+    variant = {"name": f"bench_{case['name'].replace('=', '_')}", "scene_file": scene_file, "scene_name": scene_name}
+    variant |= case["scenario"]
+    from manim import config
+
+    config.disable_caching = True
+    result = render_variant(variant, quality, media_dir)
+    output = Path(result["output"])
+    return {
+        "name": case["name"],
+        "axis": case["axis"],
+        "value": case["value"],
+        "plays": len(plan.steps),
+        "transactions": len(plan.transactions),
+        "duration_s": round(plan.duration, 2),
+        "frames": frames,
+        "seconds": result["seconds"],
+        "fps": round(frames / result["seconds"], 2) if result["seconds"] else 0.0,
+        "ms_per_frame": round(1000 * result["seconds"] / frames, 3) if frames else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "output_bytes": output.stat().st_size if output.exists() else 0,
+    }
+
+
+def _git_revision() -> str:
+    try:
+        proc = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return proc.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def _manim_version() -> str:
+    try:
+        from importlib.metadata import version
+
+        return version("manim")
+    except Exception:
+        return ""
+
+
+def previous_results(results_dir: Path, before: Path | None = None) -> dict[str, Any] | None:
+    # Los nombres llevan fecha (bench-YYYYmmdd-HHMMSS-<git>.json): orden lexicografico = cronologico.
+    files = sorted(p for p in results_dir.glob("bench-*.json") if before is None or p.name < before.name)
+    if not files:
+        return None
+    return json.loads(files[-1].read_text(encoding="utf-8")) | {"file": files[-1].as_posix()}
+
+
+def compare_runs(current: dict[str, Any], previous: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    before = {case["name"]: case for case in previous.get("cases") or []}
+    rows = []
+    for case in current["cases"]:
+        old = before.get(case["name"])
+        if not old:
+            rows.append({"name": case["name"], "status": "new"})
+            continue
+        row: dict[str, Any] = {"name": case["name"], "status": "ok"}
+        for key in ("ms_per_frame", "peak_rss_mb", "output_bytes"):
+            delta = (case[key] - old[key]) / old[key] if old[key] else 0.0
+            row[key] = round(delta, 4)
+            if key != "output_bytes" and delta > threshold:
+                row["status"] = "regression"
+        rows.append(row)
+    return rows
+
+
+def print_results(cases: list[dict[str, Any]]) -> None:
+    print(f"{'caso':<26}{'plays':>6}{'frames':>8}{'seg':>9}{'fps':>8}{'ms/frame':>10}{'RSS MB':>9}{'MB out':>8}")
+    for case in cases:
+        print(
+            f"{case['name']:<26}{case['plays']:>6}{case['frames']:>8}{case['seconds']:>9.1f}{case['fps']:>8.1f}"
+            f"{case['ms_per_frame']:>10.2f}{case['peak_rss_mb']:>9.0f}{case['output_bytes'] / 2**20:>8.1f}"
+        )
+
+
+def print_comparison(rows: list[dict[str, Any]], previous_file: str) -> None:
+    print(f"\nComparacion contra {previous_file}:")
+    for row in rows:
+        if row["status"] == "new":
+            print(f"  {row['name']:<26} nuevo")
+            continue
+        deltas = "  ".join(f"{k} {row[k]:+.1%}" for k in ("ms_per_frame", "peak_rss_mb", "output_bytes"))
+        print(f"  {row['name']:<26} {row['status']:<11} {deltas}")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    cases = build_cases(args.axis or list(AXES))
+    started = time.perf_counter()
+    results = []
+    # spawn + un caso por proceso: nada de memoria heredada entre casos.
+    ctx = multiprocessing.get_context("spawn")
+    for case in cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            result = pool.submit(run_case, case, args.scene_file, args.scene_name, args.quality, args.media_dir).result()
+        results.append(result)
+        print(f"OK: {result['name']} {result['fps']:.1f} fps, {result['peak_rss_mb']:.0f} MB")
+    run = {
+        "schema": RESULTS_SCHEMA,
+        "created_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "git": _git_revision(),
+        "scene_file": args.scene_file,
+        "quality": args.quality,
+        "python": platform.python_version(),
+        "manim": _manim_version(),
+        "cpu_count": os.cpu_count(),
+        "seconds": round(time.perf_counter() - started, 1),
+        "cases": results,
+    }
+    results_dir = Path(args.results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = results_dir / f"bench-{stamp}{'-' + run['git'] if run['git'] else ''}.json"
+    previous = previous_results(results_dir)
+    output.write_text(json.dumps(run, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print()
+    print_results(results)
+    print(f"\nOK: resultados en {output.as_posix()}")
+    if previous:
+        if previous.get("quality") != args.quality:
+            print(f"AVISO: la corrida anterior es -q{previous.get('quality')}, no se compara")
+            return
+        rows = compare_runs(run, previous, args.threshold)
+        print_comparison(rows, previous["file"])
+        if args.fail_on_regression and any(row["status"] == "regression" for row in rows):
+            raise SystemExit("FALLA: regresion de rendimiento sobre el umbral")
+
+
+def cmd_compare(args: argparse.Namespace) -> None:
+    current = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    previous = (
+        json.loads(Path(args.previous).read_text(encoding="utf-8")) | {"file": args.previous}
+        if args.previous
+        else previous_results(Path(args.results_dir), before=Path(args.current))
+    )
+    if not previous:
+        raise SystemExit("No hay una corrida anterior para comparar")
+    print_results(current["cases"])
+    rows = compare_runs(current, previous, args.threshold)
+    print_comparison(rows, previous["file"])
+    if args.fail_on_regression and any(row["status"] == "regression" for row in rows):
+        raise SystemExit("FALLA: regresion de rendimiento sobre el umbral")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="bench_scene.py",
+        description="Benchmark render time, memory and output size as the scene scales (transactions, OSBs, milestones, trail lifetime)",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="Render the synthetic cases and store a results file")
+    p_run.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p_run.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p_run.add_argument("--axis", action="append", choices=sorted(AXES), help="Only this axis (repeatable)")
+    p_run.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p_run.add_argument("--media-dir", default="media/bench")
+    p_run.add_argument("--results-dir", default=str(RESULTS_DIR))
+    p_run.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Relative slowdown flagged as regression")
+    p_run.add_argument("--fail-on-regression", action="store_true")
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="Compare a results file with the previous one")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("previous", nargs="?")
+    p_cmp.add_argument("--results-dir", default=str(RESULTS_DIR))
+    p_cmp.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    p_cmp.add_argument("--fail-on-regression", action="store_true")
+    p_cmp.set_defaults(func=cmd_compare)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from scene_plan import (
+    CAPTION_FORMATS,
+    DEFAULT_MILESTONE_TITLE,
+    FALLBACK_TITLES,
+    ScenePlan,
+    ScenarioError,
+    compile_plan,
+)
+
+
+# Titulo y detalle de cada hito como pista de subtitulos (WebVTT o SRT) en vez de
+# Text rasterizado en cada frame. Con `captions: true` (o `vtt`/`srt`) en el
+# escenario la escena no crea `subtitle` ni `timeline_event` y deja el archivo al
+# lado del video. Los tiempos salen de los plays del plan (timeline_intro,
+# timeline_event, milestone_title, milestone_subtitle), que no dependen del texto:
+# corregir un typo en cronos.yaml solo requiere `python3 captions.py export`.
+VIDEO_SUFFIXES = {".mp4", ".webm", ".mov"}
+CAPTION_DIR = Path("media/captions")
+
+
+@dataclass(frozen=True)
+class Cue:
+    start: float
+    end: float
+    title: str
+    detail: tuple[str, ...]
+
+
+def caption_format(value: Any) -> str | None:
+    # `captions: true` equivale a vtt; None si el escenario no pide captions.
+    if not value:
+        return None
+    return value if value in CAPTION_FORMATS else "vtt"
+
+
+def milestone_title(plan: ScenePlan, index: int) -> str:
+    return plan.milestones[index].title or FALLBACK_TITLES.get(index, DEFAULT_MILESTONE_TITLE)
+
+
+def caption_cues(plan: ScenePlan) -> list[Cue]:
+    # Mismos cambios que en la escena: el detalle entra con la timeline, el titulo
+    # un play despues y, en cada hito nuevo, primero cambia el titulo y luego el detalle.
+    changes: list[tuple[float, str, str]] = []
+    for step in plan.steps:
+        if step.name in ("timeline_intro", "milestone_subtitle"):
+            changes.append((step.start, "detail", plan.milestones[step.section].detail))
+        elif step.name in ("timeline_event", "milestone_title"):
+            changes.append((step.start, "title", milestone_title(plan, step.section)))
+    current = {"title": "", "detail": ""}
+    cues: list[Cue] = []
+    ends = [t for t, _, _ in changes[1:]] + [plan.duration]
+    for (start, field, text), end in zip(changes, ends):
+        current[field] = text
+        detail = tuple(line.strip() for line in current["detail"].splitlines() if line.strip())
+        if end <= start:
+            continue
+        if cues and (cues[-1].title, cues[-1].detail) == (current["title"], detail):
+            cues[-1] = Cue(cues[-1].start, end, cues[-1].title, detail)
+            continue
+        cues.append(Cue(start, end, current["title"], detail))
+    return cues
+
+
+def _timestamp(seconds: float, separator: str) -> str:
+    ms = round(seconds * 1000)
+    hours, ms = divmod(ms, 3_600_000)
+    minutes, ms = divmod(ms, 60_000)
+    secs, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}"
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _cue_lines(cue: Cue) -> list[str]:
+    lines = [f"<b>{_escape(cue.title)}</b>"] if cue.title else []
+    return lines + [_escape(line) for line in cue.detail]
+
+
+def render_captions(plan: ScenePlan, fmt: str) -> str:
+    separator = "." if fmt == "vtt" else ","
+    blocks = ["WEBVTT"] if fmt == "vtt" else []
+    for number, cue in enumerate(caption_cues(plan), start=1):
+        timing = f"{_timestamp(cue.start, separator)} --> {_timestamp(cue.end, separator)}"
+        blocks.append("\n".join([str(number), timing, *_cue_lines(cue)]))
+    return "\n\n".join(blocks) + "\n"
+
+
+def write_sidecar(plan: ScenePlan, video: Path) -> Path | None:
+    # `<video>.vtt` (o .srt) junto al video; None si el escenario no pide captions.
+    fmt = caption_format(plan.scenario.get("captions"))
+    if fmt is None:
+        return None
+    path = video.with_suffix(f".{fmt}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(render_captions(plan, fmt), encoding="utf-8")
+    return path
+
+
+def attach_captions(scene, plan: ScenePlan) -> bool:
+    # True si los textos del hito van como captions (la escena no crea esos Text).
+    if caption_format(plan.scenario.get("captions")) is None:
+        return False
+    movie = getattr(scene.renderer.file_writer, "movie_file_path", None)
+    # Con hitos salteados el video no cubre la escena completa: no hay tiempos que escribir.
+    if movie is not None and getattr(scene, "render_sections", None) is None:
+        write_sidecar(plan, Path(movie))
+    return True
+
+
+def _scenario(args: argparse.Namespace) -> tuple[str, dict | None]:
+    if not args.variant:
+        return "default", None
+    from render_variants import scenario_overrides
+
+    return args.variant, scenario_overrides(Path(args.variants), args.variant)
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    name, overrides = _scenario(args)
+    try:
+        plan = compile_plan(overrides)
+    except ScenarioError as exc:
+        print(f"FALLA: {name}")
+        for error in exc.errors:
+            print(f"  - {error}")
+        raise SystemExit(1) from None
+    fmt = args.format or caption_format(plan.scenario.get("captions")) or "vtt"
+    text = render_captions(plan, fmt)
+    if args.output == "-":
+        print(text, end="")
+        return
+    output = Path(args.output) if args.output else CAPTION_DIR / f"{name}.{fmt}"
+    if output.suffix.lower() in VIDEO_SUFFIXES:
+        output = output.with_suffix(f".{fmt}")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(text, encoding="utf-8")
+    print(f"OK: {output.as_posix()} ({len(caption_cues(plan))} cues, {plan.duration:.2f}s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="captions.py",
+        description="Export milestone titles/details from cronos.yaml as a WebVTT/SRT track timed from the scene plan",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+    p_export = sub.add_parser("export", help="Write the caption track (no manim, no re-render)")
+    p_export.add_argument("--variant", help="Scenario name from the variants catalog (default: the base scene)")
+    p_export.add_argument("--variants", default="variants.yaml")
+    p_export.add_argument("-f", "--format", choices=CAPTION_FORMATS, help="Default: the scenario's `captions` or vtt")
+    p_export.add_argument(
+        "-o",
+        "--output",
+        help="Caption file, '-' for stdout, or the rendered video (writes <video>.vtt next to it). "
+        f"Default: {CAPTION_DIR.as_posix()}/<variant>.<format>",
+    )
+    p_export.set_defaults(func=cmd_export)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,28 @@
 from __future__ import annotations
 
 import argparse
+import atexit
+import functools
 import getpass
 import html
 import json
+import os
 import re
 import socket
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, TextIO
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin lock advisory, O_APPEND igual evita pisar lineas
+    fcntl = None
 
 
 SCHEMA_VERSION = 2
@@ -35,71 +47,159 @@ META_HEADER = {
         "files_changed",
     ],
 }
+# fsync por append: none (buffers del SO, como antes), data (fdatasync) o full (fsync).
+FSYNC_MODES = ("none", "data", "full")
+DEFAULT_FSYNC = os.environ.get("CHANGELOG_FSYNC", "none")
+HEADER_MAX_BYTES = 64 * 1024
+# Group commit (ChangelogWriter / `log --from-jsonl`): un write cada N entradas o cada intervalo.
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+RESULTS = ("ok", "error")
+# Indice lateral (SQLite) junto al log: offset/largo de cada linea + campos de busqueda.
+INDEX_SUFFIX = ".idx.sqlite"
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    inode INTEGER NOT NULL,
+    indexed_bytes INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    offset INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL,
+    ts REAL,
+    version_label TEXT NOT NULL,
+    version_file TEXT NOT NULL,
+    action TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    file TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE INDEX IF NOT EXISTS entries_version ON entries (version_label);
+CREATE INDEX IF NOT EXISTS entries_action ON entries (action, result);
+CREATE INDEX IF NOT EXISTS entries_result ON entries (result);
+CREATE INDEX IF NOT EXISTS files_file ON files (file, offset);
+"""
+INDEX_BATCH = 10_000
 
 
 def _esc(val: object) -> str:
     return html.escape("" if val is None else str(val))
 
 
-def _read_env_yaml(path: Path) -> dict[str, str]:
-    if not path.exists():
-        return {}
-
-    data: dict[str, str] = {}
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#"):
-            continue
-        if ":" not in line:
-            continue
-        key, value = line.split(":", 1)
-        data[key.strip()] = value.strip()
-    return data
+def _meta_line() -> str:
+    return json.dumps(META_HEADER, ensure_ascii=False) + "\n"
 
 
-def _rewrite_with_append(path: Path, line: str) -> None:
-    existing = ""
-    if path.exists():
-        existing = path.read_text(encoding="utf-8")
-        if existing and not existing.endswith("\n"):
-            existing += "\n"
-    path.write_text(existing + line + "\n", encoding="utf-8")
+@contextmanager
+def _locked_append_fd(log_path: Path) -> Iterator[int]:
+    # O_APPEND + flock exclusivo. Si `init` reemplazo el archivo mientras se
+    # esperaba el lock, el fd apunta al inode viejo: se reabre.
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    while True:
+        fd = os.open(log_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                same = os.fstat(fd).st_ino == os.stat(log_path).st_ino
+            except FileNotFoundError:
+                same = False
+            if same:
+                yield fd
+                return
+        finally:
+            os.close(fd)
+
+
+def _sync(fd: int, fsync: str) -> None:
+    if fsync == "full":
+        os.fsync(fd)
+    elif fsync == "data":
+        getattr(os, "fdatasync", os.fsync)(fd)
+    elif fsync != "none":
+        raise ValueError(f"fsync invalido: {fsync} (none, data, full)")
+
+
+def header_problem(log_path: Path) -> str | None:
+    # Solo lee la primera linea (acotada): no depende del largo del log.
+    try:
+        with log_path.open("rb") as handle:
+            first = handle.readline(HEADER_MAX_BYTES)
+    except FileNotFoundError:
+        return None
+    if not first:
+        return None
+    try:
+        meta = json.loads(first)
+    except ValueError:
+        return "la primera linea no es JSON"
+    if not isinstance(meta, dict) or meta.get("type") != "meta":
+        return "falta el header meta"
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return f"header con schema_version {meta.get('schema_version')} (actual {SCHEMA_VERSION})"
+    return None
+
+
+def append_lines(log_path: Path, lines: list[str], *, fsync: str = DEFAULT_FSYNC) -> int:
+    # Un solo write O_APPEND bajo lock: costo constante y sin ventana en la que un
+    # crash deje el historial truncado. Devuelve el offset de la primera linea.
+    if not lines:
+        return -1
+    problem = header_problem(log_path)
+    if problem:
+        print(f"AVISO: {log_path.as_posix()}: {problem}; se agrega igual (reparar con changelog.py init)", file=sys.stderr)
+    with _locked_append_fd(log_path) as fd:
+        size = os.fstat(fd).st_size
+        prefix = "" if size else _meta_line()
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            # Linea previa cortada (p.ej. crash a mitad de write): no pegarse a ella.
+            prefix = "\n"
+        data = (prefix + "".join(line + "\n" for line in lines)).encode("utf-8")
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        _sync(fd, fsync)
+    return size + len(prefix.encode("utf-8"))
 
 
 def ensure_log(log_path: Path) -> None:
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-
-    if log_path.exists() and log_path.stat().st_size > 0:
-        # If the file exists, keep it, but ensure the first line is meta.
-        lines = log_path.read_text(encoding="utf-8").splitlines(True)
-        if not lines:
-            log_path.write_text(json.dumps(META_HEADER, ensure_ascii=False) + "\n", encoding="utf-8")
+    # Reparacion explicita (`changelog.py init`): unico camino que reescribe el log,
+    # bajo el mismo lock y con reemplazo atomico.
+    if header_problem(log_path) is None and log_path.exists() and log_path.stat().st_size > 0:
+        return
+    with _locked_append_fd(log_path) as fd:
+        if os.fstat(fd).st_size == 0:
+            os.write(fd, _meta_line().encode("utf-8"))
             return
-
+        content = log_path.read_text(encoding="utf-8")
+        lines = content.splitlines(True)
+        if lines and not lines[-1].endswith("\n"):
+            lines[-1] += "\n"
         try:
             first = json.loads(lines[0])
-        except Exception:
-            # If corrupt, overwrite with new meta header and keep content below as comment.
-            backup = log_path.with_suffix(log_path.suffix + ".bak")
-            backup.write_text("".join(lines), encoding="utf-8")
-            log_path.write_text(json.dumps(META_HEADER, ensure_ascii=False) + "\n", encoding="utf-8")
-            return
-
-        if first.get("type") != "meta":
-            log_path.write_text(json.dumps(META_HEADER, ensure_ascii=False) + "\n" + "".join(lines), encoding="utf-8")
-            return
+        except ValueError:
+            first = None
+        if first is None:
+            # Header corrupto: se guarda el original y se deja solo el header nuevo.
+            log_path.with_suffix(log_path.suffix + ".bak").write_text(content, encoding="utf-8")
+            lines = []
+        elif isinstance(first, dict) and first.get("type") == "meta":
+            lines = lines[1:]
+        tmp = log_path.with_name(log_path.name + ".tmp")
+        tmp.write_text(_meta_line() + "".join(lines), encoding="utf-8")
+        os.replace(tmp, log_path)
 
-        # If meta exists but schema differs, update meta in place.
-        lines[0] = json.dumps(META_HEADER, ensure_ascii=False) + "\n"
-        log_path.write_text("".join(lines), encoding="utf-8")
-        return
 
-    log_path.write_text(json.dumps(META_HEADER, ensure_ascii=False) + "\n", encoding="utf-8")
+@functools.lru_cache(maxsize=1)
+def _identity() -> tuple[str, str]:
+    return getpass.getuser(), socket.gethostname()
 
 
-def append_entry(
+def build_entry(
     *,
-    log_path: Path,
     actor: str,
     action: str,
     version_file: str,
@@ -108,20 +208,20 @@ def append_entry(
     result: str,
     notes: str,
     files_changed: list[str],
-    env_path: Path,
-) -> None:
-    env = _read_env_yaml(env_path)
-    now = datetime.now().astimezone()
+    now: datetime | None = None,
+) -> dict[str, Any]:
+    now = (now or datetime.now()).astimezone()
+    user, host = _identity()
 
-    entry = {
+    return {
         "ts": now.isoformat(timespec="seconds"),
         # `fecha`/`hora` deben ser consistentes con `ts` para evitar desfaces
         # cuando `env.yaml` está stale (p.ej. si no se ejecutó `getENV.py`).
         "fecha": now.strftime("%Y-%m-%d"),
         "hora": now.strftime("%H:%M:%S"),
         "actor": actor,
-        "user": getpass.getuser(),
-        "host": socket.gethostname(),
+        "user": user,
+        "host": host,
         "action": action,
         "version_file": version_file,
         "version_label": version_label,
@@ -131,25 +231,365 @@ def append_entry(
         "files_changed": files_changed,
     }
 
-    ensure_log(log_path)
-    _rewrite_with_append(log_path, json.dumps(entry, ensure_ascii=False))
-
 
-def _read_jsonl_entries(log_path: Path) -> list[dict[str, Any]]:
-    if not log_path.exists():
-        return []
+def append_entry(
+    *,
+    log_path: Path,
+    actor: str,
+    action: str,
+    version_file: str,
+    version_label: str,
+    command: str,
+    result: str,
+    notes: str,
+    files_changed: list[str],
+    fsync: str = DEFAULT_FSYNC,
+) -> None:
+    entry = build_entry(
+        actor=actor,
+        action=action,
+        version_file=version_file,
+        version_label=version_label,
+        command=command,
+        result=result,
+        notes=notes,
+        files_changed=files_changed,
+    )
+    append_lines(log_path, [json.dumps(entry, ensure_ascii=False)], fsync=fsync)
+
+
+class ChangelogWriter:
+    # Group commit en proceso: las entradas se encolan y se escriben juntas (un
+    # append_lines) al llegar a `batch_size` o cada `interval` segundos desde un
+    # hilo de fondo. Thread-safe; close() (o el `with`, o la salida del proceso)
+    # escribe lo pendiente.
+    def __init__(
+        self,
+        log_path: Path,
+        *,
+        actor: str = "codex",
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        interval: float = DEFAULT_FLUSH_INTERVAL,
+        fsync: str = DEFAULT_FSYNC,
+    ) -> None:
+        self.log_path = log_path
+        self.actor = actor
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.fsync = fsync
+        self.written = 0
+        self.commits = 0
+        self._pending: list[str] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._closed = False
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._run, name="changelog-writer", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def log(
+        self,
+        *,
+        action: str,
+        version_file: str = "",
+        version_label: str = "",
+        command: str = "",
+        result: str = "ok",
+        notes: str = "",
+        files_changed: list[str] | None = None,
+        actor: str | None = None,
+    ) -> None:
+        self.add(
+            build_entry(
+                actor=actor or self.actor,
+                action=action,
+                version_file=version_file,
+                version_label=version_label,
+                command=command,
+                result=result,
+                notes=notes,
+                files_changed=files_changed or [],
+            )
+        )
 
-    items: list[dict[str, Any]] = []
-    for line in log_path.read_text(encoding="utf-8").splitlines():
-        line = line.strip()
-        if not line:
+    def add(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"ChangelogWriter de {self.log_path.as_posix()} ya esta cerrado")
+            self._pending.append(line)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        # _flush_lock mantiene el orden entre flush concurrentes (hilo de fondo y batch lleno).
+        with self._flush_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+            if not lines:
+                return 0
+            try:
+                append_lines(self.log_path, lines, fsync=self.fsync)
+            except OSError:
+                with self._lock:
+                    self._pending[:0] = lines
+                raise
+            self.written += len(lines)
+            self.commits += 1
+            return len(lines)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as exc:
+                print(f"AVISO: {self.log_path.as_posix()}: {exc}; se reintenta en {self.interval}s", file=sys.stderr)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        atexit.unregister(self.close)
+        self.flush()
+
+    def __enter__(self) -> ChangelogWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def import_jsonl(source: TextIO, writer: ChangelogWriter, defaults: dict[str, Any]) -> tuple[int, list[str]]:
+    # Una entrada por linea; los campos que falten salen de `defaults` (flags de `log`).
+    # Un `ts` presente se respeta (eventos encolados por un worker se importan despues).
+    imported = 0
+    errors: list[str] = []
+    for lineno, raw in enumerate(source, start=1):
+        raw = raw.strip()
+        if not raw:
             continue
-        obj = json.loads(line)
-        if obj.get("type") == "meta":
+        try:
+            obj = json.loads(raw)
+        except ValueError:
+            errors.append(f"linea {lineno}: JSON invalido")
+            continue
+        if not isinstance(obj, dict) or obj.get("type") == "meta":
+            errors.append(f"linea {lineno}: se esperaba un objeto con una entrada")
+            continue
+        fields = defaults | obj
+        files = fields.get("files_changed") or []
+        if isinstance(files, str):
+            files = [f.strip() for f in files.split(",") if f.strip()]
+        now = None
+        if fields.get("ts"):
+            try:
+                now = datetime.fromisoformat(str(fields["ts"]))
+            except ValueError:
+                errors.append(f"linea {lineno}: ts invalido ({fields['ts']})")
+                continue
+        if not fields.get("action"):
+            errors.append(f"linea {lineno}: falta action")
+            continue
+        if fields.get("result") not in RESULTS:
+            errors.append(f"linea {lineno}: result debe ser ok o error")
             continue
-        if isinstance(obj, dict):
-            items.append(obj)
-    return items
+        writer.add(
+            build_entry(
+                actor=str(fields.get("actor") or ""),
+                action=str(fields["action"]),
+                version_file=str(fields.get("version_file") or ""),
+                version_label=str(fields.get("version_label") or ""),
+                command=str(fields.get("command") or ""),
+                result=fields["result"],
+                notes=str(fields.get("notes") or ""),
+                files_changed=[str(f) for f in files],
+                now=now,
+            )
+        )
+        imported += 1
+    return imported, errors
+
+
+def iter_entries(log_path: Path) -> Iterator[dict[str, Any]]:
+    # Linea a linea (memoria acotada): el ticker de la escena lo consume como tail -f.
+    if not log_path.exists():
+        return
+    with log_path.open(encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                # Linea cortada por un crash a mitad de write: el append siguiente empieza en linea nueva.
+                continue
+            if isinstance(obj, dict) and obj.get("type") != "meta":
+                yield obj
+
+
+def _read_jsonl_entries(log_path: Path) -> list[dict[str, Any]]:
+    return list(iter_entries(log_path))
+
+
+def index_path(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name + INDEX_SUFFIX)
+
+
+def _connect_index(log_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(index_path(log_path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(INDEX_SCHEMA)
+    return conn
+
+
+def _epoch(value: Any) -> float | None:
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _index_rows(handle: Any, start: int) -> Iterator[tuple[int, int, int, dict[str, Any] | None]]:
+    # (offset, largo sin fin de linea, largo con "\n" o "\r\n", entrada) de cada linea
+    # completa desde `start`; la ultima sin salto de linea (append en curso o
+    # cortado) queda para la proxima pasada.
+    handle.seek(start)
+    offset = start
+    for raw in handle:
+        if not raw.endswith(b"\n"):
+            return
+        line = raw.rstrip(b"\r\n")
+        try:
+            obj = json.loads(line) if line.strip() else None
+        except ValueError:
+            obj = None
+        if not isinstance(obj, dict) or obj.get("type") == "meta":
+            obj = None
+        yield offset, len(line), len(raw), obj
+        offset += len(raw)
+
+
+def update_index(log_path: Path) -> sqlite3.Connection:
+    # Incremental: solo se leen los bytes agregados desde la pasada anterior. Si el
+    # log fue reemplazado (`init`) o achicado, se reconstruye completo.
+    conn = _connect_index(log_path)
+    try:
+        stat = log_path.stat()
+    except FileNotFoundError:
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM files")
+        conn.execute("DELETE FROM state")
+        return conn
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        state = conn.execute("SELECT inode, indexed_bytes FROM state WHERE id = 1").fetchone()
+        start = state[1] if state and state[0] == stat.st_ino and state[1] <= stat.st_size else 0
+        if start == 0:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM files")
+        end = start
+        entries: list[tuple[Any, ...]] = []
+        files: list[tuple[str, int]] = []
+        with log_path.open("rb") as handle:
+            for offset, length, size, obj in _index_rows(handle, start):
+                end = offset + size
+                if obj is None:
+                    continue
+                entries.append((
+                    offset,
+                    length,
+                    _epoch(obj.get("ts")),
+                    str(obj.get("version_label") or ""),
+                    str(obj.get("version_file") or ""),
+                    str(obj.get("action") or ""),
+                    str(obj.get("result") or ""),
+                ))
+                changed = obj.get("files_changed") or []
+                files += [(str(f), offset) for f in (changed if isinstance(changed, list) else [changed])]
+                if len(entries) >= INDEX_BATCH:
+                    _insert_index_rows(conn, entries, files)
+            _insert_index_rows(conn, entries, files)
+        conn.execute("INSERT OR REPLACE INTO state (id, inode, indexed_bytes) VALUES (1, ?, ?)", (stat.st_ino, end))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return conn
+
+
+def _insert_index_rows(conn: sqlite3.Connection, entries: list[tuple[Any, ...]], files: list[tuple[str, int]]) -> None:
+    conn.executemany("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", entries)
+    conn.executemany("INSERT INTO files VALUES (?, ?)", files)
+    entries.clear()
+    files.clear()
+
+
+def _parse_since(value: str) -> float:
+    # `2025-12`, `2025-12-18` o ISO completo (hora local si no trae zona).
+    text = value.strip()
+    if len(text) == 7:
+        text += "-01"
+    try:
+        return datetime.fromisoformat(text).astimezone().timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"fecha invalida: {value} (ej: 2025-12, 2025-12-18, 2025-12-18T10:00)") from None
+
+
+def query_entries(
+    log_path: Path,
+    *,
+    version_label: str | None = None,
+    action: str | None = None,
+    result: str | None = None,
+    file: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    limit: int | None = None,
+    newest_first: bool = False,
+) -> Iterator[tuple[int, bytes]]:
+    # El indice resuelve el filtro; del log solo se leen las lineas que coinciden (pread).
+    conn = update_index(log_path)
+    where, params = [], []
+    for column, value in (("version_label", version_label), ("action", action), ("result", result)):
+        if value is not None:
+            where.append(f"e.{column} = ?")
+            params.append(value)
+    if file is not None:
+        where.append("e.offset IN (SELECT offset FROM files WHERE file = ?)")
+        params.append(file)
+    if since is not None:
+        where.append("e.ts >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("e.ts < ?")
+        params.append(until)
+    sql = "SELECT e.offset, e.length FROM entries e"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY e.offset {'DESC' if newest_first else 'ASC'}"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return
+    fd = os.open(log_path, os.O_RDONLY)
+    try:
+        for offset, length in rows:
+            yield offset, os.pread(fd, length, offset)
+    finally:
+        os.close(fd)
 
 
 def _read_project_name(context_path: Path) -> tuple[str | None, str | None]:
@@ -424,6 +864,11 @@ def cmd_init(args: argparse.Namespace) -> None:
 
 def cmd_log(args: argparse.Namespace) -> None:
     files_changed = [f.strip() for f in args.files_changed.split(",") if f.strip()]
+    if args.from_jsonl:
+        _import_from_jsonl(args, files_changed)
+        return
+    if not args.action:
+        raise SystemExit("FALLA: se requiere --action (o --from-jsonl)")
     append_entry(
         log_path=Path(args.log),
         actor=args.actor,
@@ -434,8 +879,78 @@ def cmd_log(args: argparse.Namespace) -> None:
         result=args.result,
         notes=args.notes,
         files_changed=files_changed,
-        env_path=Path(args.env),
+        fsync=args.fsync,
+    )
+
+
+def _import_from_jsonl(args: argparse.Namespace, files_changed: list[str]) -> None:
+    defaults = {
+        "actor": args.actor,
+        "action": args.action,
+        "version_file": args.version_file,
+        "version_label": args.version_label,
+        "command": args.command,
+        "result": args.result,
+        "notes": args.notes,
+        "files_changed": files_changed,
+    }
+    # Sin hilo de fondo: solo escribe al llenar un batch y al cerrar.
+    writer = ChangelogWriter(Path(args.log), batch_size=args.batch_size, interval=0, fsync=args.fsync)
+    source = sys.stdin if args.from_jsonl == "-" else open(args.from_jsonl, encoding="utf-8")
+    try:
+        with writer:
+            imported, errors = import_jsonl(source, writer, defaults)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    for error in errors[:20]:
+        print(f"AVISO: {error}")
+    if len(errors) > 20:
+        print(f"AVISO: ... y {len(errors) - 20} mas")
+    skipped = f", {len(errors)} omitidas" if errors else ""
+    print(f"OK: {imported} entradas en {writer.commits} write(s) a {args.log}{skipped}")
+
+
+def cmd_index(args: argparse.Namespace) -> None:
+    log_path = Path(args.log)
+    if args.rebuild:
+        index_path(log_path).unlink(missing_ok=True)
+    conn = update_index(log_path)
+    entries, files = (conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("entries", "files"))
+    indexed = conn.execute("SELECT indexed_bytes FROM state WHERE id = 1").fetchone()
+    conn.close()
+    print(f"OK: {index_path(log_path).as_posix()}: {entries} entradas, {files} archivos, {indexed[0] if indexed else 0} bytes indexados")
+
+
+def cmd_query(args: argparse.Namespace) -> None:
+    matches = query_entries(
+        Path(args.log),
+        version_label=args.version,
+        action=args.action,
+        result=args.result,
+        file=args.file,
+        since=args.since,
+        until=args.until,
+        limit=None if args.count else args.limit,
+        newest_first=args.newest_first,
     )
+    count = 0
+    for _, raw in matches:
+        count += 1
+        if args.count:
+            continue
+        if args.json:
+            print(raw.decode("utf-8"))
+            continue
+        e = json.loads(raw)
+        files = ", ".join(e.get("files_changed") or [])
+        print(
+            f"{e.get('ts', '')}  {e.get('action', ''):<10} {e.get('result', ''):<5} "
+            f"{e.get('version_label') or '-':<10} {e.get('version_file') or '-'}  {e.get('notes', '')}"
+            + (f"  [{files}]" if files else "")
+        )
+    if args.count:
+        print(count)
 
 
 def cmd_html(args: argparse.Namespace) -> None:
@@ -456,17 +971,38 @@ def build_parser() -> argparse.ArgumentParser:
 
     p_log = sub.add_parser("log", help="Append a changelog entry (JSONL)")
     p_log.add_argument("--log", default="logs/CHANGELOG.log")
-    p_log.add_argument("--env", default="env.yaml")
     p_log.add_argument("--actor", default="codex")
-    p_log.add_argument("--action", required=True)
+    p_log.add_argument("--action", help="Required unless --from-jsonl (then the default for lines without one)")
     p_log.add_argument("--version-file", default="")
     p_log.add_argument("--version-label", default="")
     p_log.add_argument("--command", default="")
-    p_log.add_argument("--result", default="ok", choices=["ok", "error"])
+    p_log.add_argument("--result", default="ok", choices=RESULTS)
     p_log.add_argument("--notes", default="")
     p_log.add_argument("--files-changed", default="")
+    p_log.add_argument("--fsync", default=DEFAULT_FSYNC, choices=FSYNC_MODES, help="Durability per append (env CHANGELOG_FSYNC)")
+    p_log.add_argument("--from-jsonl", metavar="PATH", help="Bulk import one entry per line ('-' = stdin), flags are defaults")
+    p_log.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Entries per write with --from-jsonl")
     p_log.set_defaults(func=cmd_log)
 
+    p_index = sub.add_parser("index", help="Update the sidecar index (incremental; --rebuild from scratch)")
+    p_index.add_argument("--log", default="logs/CHANGELOG.log")
+    p_index.add_argument("--rebuild", action="store_true")
+    p_index.set_defaults(func=cmd_index)
+
+    p_query = sub.add_parser("query", help="Find entries through the sidecar index (reads only the matching lines)")
+    p_query.add_argument("--log", default="logs/CHANGELOG.log")
+    p_query.add_argument("--version", help="version_label, e.g. v2.2.13")
+    p_query.add_argument("--action")
+    p_query.add_argument("--result", choices=RESULTS)
+    p_query.add_argument("--file", help="Entries whose files_changed include this path")
+    p_query.add_argument("--since", type=_parse_since, help="2025-12, 2025-12-18 or ISO datetime (inclusive)")
+    p_query.add_argument("--until", type=_parse_since, help="Same formats (exclusive)")
+    p_query.add_argument("--limit", type=int, default=0)
+    p_query.add_argument("--newest-first", action="store_true")
+    p_query.add_argument("--json", action="store_true", help="Print the matching JSONL lines as-is")
+    p_query.add_argument("--count", action="store_true")
+    p_query.set_defaults(func=cmd_query)
+
     p_html = sub.add_parser("html", help="Generate human HTML changelog from JSONL")
     p_html.add_argument("--log", default="logs/CHANGELOG.log")
     p_html.add_argument("--context", default="CONTEXT.md")
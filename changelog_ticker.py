@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from changelog import iter_entries
+from scene_plan import ScenePlan, compile_plan, label_to_month_index
+
+
+# Ticker "tail -f" de logs/CHANGELOG.log sincronizado con la timeline: cada hito
+# cubre desde su label (mes) hasta el label del siguiente, y las entradas de ese
+# rango se reparten linealmente en los segundos de video del hito. El log se lee
+# en streaming y solo las ultimas `lines` entradas vencidas quedan vivas; cada
+# linea se arma una sola vez (un Text) y despues solo se traslada.
+DEFAULT_LOG = Path("logs/CHANGELOG.log")
+DEFAULT_LINES = 4
+DEFAULT_CHARS = 48
+FONT_SIZE = 8
+LINE_HEIGHT = 0.16
+SCROLL_TIME = 0.35
+
+
+@dataclass(frozen=True)
+class TickerLine:
+    at: float  # segundo de video en que aparece
+    text: str
+
+
+@dataclass(frozen=True)
+class Window:
+    index: int
+    real_start: datetime
+    real_end: datetime
+    video_start: float
+    video_end: float
+
+
+def ticker_config(value: Any) -> dict[str, Any]:
+    # `changelog_ticker: true`, `logs/CHANGELOG.log` o `{path, lines, chars}`.
+    config = {"path": str(DEFAULT_LOG), "lines": DEFAULT_LINES, "chars": DEFAULT_CHARS}
+    if isinstance(value, dict):
+        config |= value
+    elif isinstance(value, str):
+        config["path"] = value
+    return config
+
+
+def _month_start(month_index: int) -> datetime:
+    year, month = divmod(month_index - 1, 12)
+    return datetime(year, month + 1, 1).astimezone()
+
+
+def milestone_windows(plan: ScenePlan) -> list[Window]:
+    months = [label_to_month_index(m.label) for m in plan.milestones]
+    windows = []
+    for idx, milestone in enumerate(plan.milestones):
+        month = months[idx]
+        if month is None or milestone.start is None or milestone.end is None:
+            continue
+        following = months[idx + 1] if idx + 1 < len(months) else None
+        end_month = max(following or month + 1, month + 1)
+        windows.append(Window(idx, _month_start(month), _month_start(end_month), milestone.start, milestone.end))
+    return windows
+
+
+def video_time(ts: datetime, windows: list[Window]) -> float | None:
+    for window in windows:
+        if window.real_start <= ts < window.real_end:
+            fraction = (ts - window.real_start) / (window.real_end - window.real_start)
+            return window.video_start + fraction * (window.video_end - window.video_start)
+    return None
+
+
+def format_line(entry: dict[str, Any], ts: datetime, chars: int) -> str:
+    files = entry.get("files_changed")
+    target = entry.get("version_file") or (files[0] if isinstance(files, list) and files else "")
+    text = " ".join(
+        part for part in (ts.strftime("%d-%m %H:%M"), str(entry.get("action") or "").upper(), str(target)) if part
+    )
+    notes = str(entry.get("notes") or "").strip()
+    if notes:
+        text += f" · {notes}"
+    return text if len(text) <= chars else text[: chars - 1].rstrip() + "…"
+
+
+def ticker_lines(log_path: Path, windows: list[Window], chars: int = DEFAULT_CHARS) -> Iterator[TickerLine]:
+    # Orden del archivo (append-only); una entrada atrasada aparece cuando llega, como tail -f.
+    last = 0.0
+    for entry in iter_entries(log_path):
+        try:
+            ts = datetime.fromisoformat(str(entry.get("ts") or ""))
+        except ValueError:
+            continue
+        ts = ts.astimezone()
+        at = video_time(ts, windows)
+        if at is None:
+            continue
+        last = max(last, at)
+        yield TickerLine(last, format_line(entry, ts, chars))
+
+
+class TickerFeed:
+    # Ventana acotada sobre el stream: por cuadro solo se entregan las ultimas
+    # `visible` lineas vencidas, aunque cientos caigan en el mismo instante.
+    def __init__(self, lines: Iterator[TickerLine], visible: int) -> None:
+        self._lines = lines
+        self._pending = next(lines, None)
+        self.visible = visible
+        self.consumed = 0
+
+    def due(self, now: float) -> list[TickerLine]:
+        batch: deque[TickerLine] = deque(maxlen=self.visible)
+        while self._pending is not None and self._pending.at <= now:
+            batch.append(self._pending)
+            self.consumed += 1
+            self._pending = next(self._lines, None)
+        return list(batch)
+
+
+def attach_changelog_ticker(scene, plan: ScenePlan, anchor) -> Any:
+    # Agrega el ticker bajo `anchor` (esquina izquierda); None si el escenario no lo pide.
+    value = plan.scenario.get("changelog_ticker")
+    if not value:
+        return None
+    from manim import DOWN, GRAY, LEFT, RIGHT, Text, VGroup
+
+    config = ticker_config(value)
+    visible = int(config["lines"])
+    lines = ticker_lines(Path(config["path"]), milestone_windows(plan), int(config["chars"]))
+    feed = TickerFeed(lines, visible)
+
+    header = Text(f"tail -f {Path(config['path']).as_posix()}", font_size=FONT_SIZE - 1, color=GRAY)
+    header.next_to(anchor, DOWN, aligned_edge=LEFT, buff=0.15)
+    left = header.get_left()[0]
+    top = header.get_bottom()[1] - 0.05
+    rows: deque[tuple[int, Any]] = deque()
+    state = {"seq": 0, "batch": 0, "scroll_from": 0.0, "scroll_to": 0.0, "since": 0.0, "settled": True}
+
+    def place(text, position: float) -> None:
+        target_x = left + text.width / 2
+        target_y = top - (position + 0.5) * LINE_HEIGHT
+        center = text.get_center()
+        text.shift(RIGHT * (target_x - center[0]) + DOWN * (center[1] - target_y))
+
+    def update(group, dt: float) -> None:
+        # Con `dt` manim trata al ticker como animado: los self.wait() no congelan el frame.
+        now = scene.time
+        fresh = feed.due(now)
+        if fresh:
+            progress = min(1.0, (now - state["since"]) / SCROLL_TIME)
+            state["scroll_from"] += (state["scroll_to"] - state["scroll_from"]) * progress
+            state["batch"] = state["seq"]
+            for line in fresh:
+                # Unico costo de layout de la entrada: el resto de su vida solo se traslada.
+                text = Text(line.text, font_size=FONT_SIZE)
+                rows.append((state["seq"], text))
+                group.add(text)
+                state["seq"] += 1
+            state["scroll_to"] = float(max(0, state["seq"] - visible))
+            state["since"] = now
+            state["settled"] = False
+        if state["settled"]:
+            return
+        progress = min(1.0, (now - state["since"]) / SCROLL_TIME)
+        scroll = state["scroll_from"] + (state["scroll_to"] - state["scroll_from"]) * progress
+        while rows and rows[0][0] - scroll <= -1.0:
+            group.remove(rows.popleft()[1])
+        for seq, text in rows:
+            position = seq - scroll
+            place(text, position)
+            # Se desvanece al salir por arriba o mientras espera bajo la ultima fila.
+            opacity = min(1.0, 1.0 + position, visible - position)
+            text.set_opacity(max(0.0, min(opacity, progress if seq >= state["batch"] else 1.0)))
+        state["settled"] = progress >= 1.0
+
+    ticker = VGroup()
+    ticker.add_updater(update)
+    scene.add(header, ticker)
+    return VGroup(header, ticker)
+
+
+def cmd_preview(args: argparse.Namespace) -> None:
+    overrides: dict[str, Any] = {"changelog_ticker": {"path": args.log, "lines": args.lines, "chars": args.chars}}
+    plan = compile_plan(overrides)
+    windows = milestone_windows(plan)
+    for window in windows:
+        milestone = plan.milestones[window.index]
+        print(
+            f"hito {window.index} {milestone.label:<9} {window.real_start:%Y-%m-%d} .. {window.real_end:%Y-%m-%d}"
+            f"  video {window.video_start:6.1f}s .. {window.video_end:6.1f}s"
+        )
+    count = 0
+    for line in ticker_lines(Path(args.log), windows, args.chars):
+        count += 1
+        if args.verbose:
+            print(f"  {line.at:7.2f}s  {line.text}")
+    print(f"OK: {count} entradas de {args.log} caen en la timeline ({len(windows)} hitos)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="changelog_ticker.py",
+        description="Preview how CHANGELOG.log entries map onto the scene timeline (tail -f ticker)",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+    p_preview = sub.add_parser("preview", help="Milestone windows and the video second of each entry")
+    p_preview.add_argument("--log", default=str(DEFAULT_LOG))
+    p_preview.add_argument("--lines", type=int, default=DEFAULT_LINES)
+    p_preview.add_argument("--chars", type=int, default=DEFAULT_CHARS)
+    p_preview.add_argument("-v", "--verbose", action="store_true", help="One line per entry")
+    p_preview.set_defaults(func=cmd_preview)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
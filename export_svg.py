@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from render_variants import scenario_overrides
+from scene_plan import COLORS, FRAME_HEIGHT, FRAME_WIDTH, LEGEND, ScenePlan, compile_plan
+
+
+# Vista estatica (SVG) + animacion en el cliente: nodos, etiquetas, leyenda y
+# timeline van en el SVG; las transacciones se dibujan en un <canvas> encima a
+# partir de rutas compartidas, asi miles de pagos pesan unos pocos bytes cada uno.
+
+# Tamanos de Text de manim (font_size 48 ~ 0.5 unidades de alto de mayuscula).
+FONT_SCALE = 0.7 / 48
+TIMELINE_X0 = 3.0
+TIMELINE_X1 = 6.6
+TIMELINE_Y = 3.55
+
+
+def _svg_point(point: tuple[float, float]) -> list[float]:
+    # manim: y hacia arriba; SVG: y hacia abajo.
+    return [round(point[0], 4), round(-point[1], 4)]
+
+
+def _font(size: int) -> str:
+    return f"{size * FONT_SCALE:.3f}"
+
+
+def plan_payload(plan: ScenePlan) -> dict[str, Any]:
+    routes: list[list[float]] = []
+    route_ids: dict[tuple[float, ...], int] = {}
+    transactions = []
+    for tx in plan.transactions:
+        flat = tuple(coord for point in tx.points for coord in _svg_point(point))
+        route = route_ids.setdefault(flat, len(routes))
+        if route == len(routes):
+            routes.append(list(flat))
+        settle = [round(tx.settle[0], 3), tx.settle[1], *_svg_point(tx.settle[2])] if tx.settle else 0
+        transactions.append([
+            route,
+            round(tx.start, 3),
+            tx.move_time,
+            tx.linger_time,
+            tx.fade_time,
+            [[round(start, 3), duration, color] for start, duration, color in tx.colors],
+            settle,
+        ])
+    trail = plan.scenario["visual_config"]["trail"]
+    base_line = plan.scenario["visual_config"]["base_line"]
+    return {
+        "duration": round(plan.duration, 3),
+        "frame_width": FRAME_WIDTH,
+        "routes": routes,
+        "tx": transactions,
+        "edges": [
+            [*_svg_point(edge.a), *_svg_point(edge.b), round(edge.appear, 3), edge.create_time,
+             None if edge.disappear is None else round(edge.disappear, 3)]
+            for edge in plan.edges
+        ],
+        "nodes": [[node_id, round(t, 3)] for node_id, t in plan.node_appear.items()],
+        "nodeEvents": [[round(start, 3), duration, node_id, kind] for start, duration, node_id, kind in plan.node_events],
+        "marker": [[round(t, 3), round(p, 4)] for t, p in plan.marker],
+        "titles": [[round(t, 3), text] for t, text in plan.titles],
+        "milestones": [
+            {"label": m.label, "title": m.title, "detail": m.detail, "start": m.start}
+            for m in plan.milestones
+        ],
+        "timeline": [TIMELINE_X0, TIMELINE_X1, TIMELINE_Y],
+        "trail": {"width": float(trail["width"]) * 0.01, "opacity": float(trail["opacity"])},
+        "baseLine": {"width": float(base_line["width"]) * 0.01, "opacity": float(base_line["opacity"])},
+        "colors": {"white": COLORS["WHITE"], "resetNode": COLORS["WHITE"]},
+        "dotRadius": 0.06,
+    }
+
+
+def _svg_static(plan: ScenePlan) -> str:
+    parts = []
+    for node in plan.nodes.values():
+        cx, cy = _svg_point(node.center)
+        offset = node.radius + 0.12 + node.label_size * FONT_SCALE
+        label_y = cy - node.radius - 0.12 if node.label_side == "up" else cy + offset
+        parts.append(
+            f'<g id="node-{node.id}" opacity="0">'
+            f'<circle cx="{cx}" cy="{cy}" r="{node.radius}" fill="none" stroke="{node.color}" stroke-width="0.04"/>'
+            f'<text x="{cx}" y="{label_y:.3f}" font-size="{_font(node.label_size)}" text-anchor="middle">'
+            f"{html.escape(node.label)}</text></g>"
+        )
+    for idx, (color, text) in enumerate(LEGEND):
+        y = 2.2 + idx * 0.22
+        parts.append(
+            f'<g class="legend"><circle cx="-6.7" cy="{y:.2f}" r="0.06" fill="{COLORS[color]}"/>'
+            f'<text x="-6.55" y="{y + 0.05:.2f}" font-size="{_font(10)}">{html.escape(text)}</text></g>'
+        )
+    title = plan.titles[0][1]
+    version = plan.scenario["version_label"]
+    parts.append(f'<text id="title" x="0" y="-3.45" font-size="{_font(40)}" text-anchor="middle">{html.escape(title)}</text>')
+    parts.append(
+        f'<text x="{TIMELINE_X1}" y="-3.05" font-size="{_font(9)}" text-anchor="end">'
+        f"by eCORE - PNLöP v³ &amp; Manim v0.19.1 &#160; versión {html.escape(version)}</text>"
+    )
+    parts.append(f'<text id="subtitle" x="-6.9" y="-3.05" font-size="{_font(9)}"></text>')
+    parts.append(
+        f'<line x1="{TIMELINE_X0}" y1="{TIMELINE_Y}" x2="{TIMELINE_X1}" y2="{TIMELINE_Y}" '
+        f'stroke="#FFFFFF" stroke-opacity="0.25" stroke-width="0.02"/>'
+    )
+    parts.append(
+        f'<line id="progress" x1="{TIMELINE_X0}" y1="{TIMELINE_Y}" x2="{TIMELINE_X0}" y2="{TIMELINE_Y}" '
+        f'stroke="{COLORS["GREEN"]}" stroke-opacity="0.8" stroke-width="0.024"/>'
+    )
+    span = TIMELINE_X1 - TIMELINE_X0
+    for idx, milestone in enumerate(plan.milestones):
+        x = TIMELINE_X0 + span * milestone.position
+        angle = -45 if idx % 2 == 0 else 45
+        dy = -0.3 if idx % 2 == 0 else 0.38
+        parts.append(
+            f'<circle cx="{x:.3f}" cy="{TIMELINE_Y}" r="0.04" fill="#FFFFFF"/>'
+            f'<text x="{x:.3f}" y="{TIMELINE_Y + dy:.3f}" font-size="{_font(7)}" '
+            f'transform="rotate({angle} {x:.3f} {TIMELINE_Y + dy:.3f})">{html.escape(milestone.label)}</text>'
+        )
+    parts.append(f'<circle id="marker" cx="{TIMELINE_X0}" cy="{TIMELINE_Y}" r="0.05" fill="{COLORS["GREEN"]}"/>')
+    parts.append(
+        f'<text id="event" x="{(TIMELINE_X0 + TIMELINE_X1) / 2:.3f}" y="{TIMELINE_Y - 0.55:.3f}" '
+        f'font-size="{_font(14)}" text-anchor="middle"></text>'
+    )
+    return "\n".join(parts)
+
+
+PLAYER_JS = r"""
+const D = JSON.parse(document.getElementById("plan").textContent);
+const svg = document.getElementById("scene");
+const canvas = document.getElementById("overlay");
+const ctx = canvas.getContext("2d");
+const scrub = document.getElementById("scrub");
+const clock = document.getElementById("clock");
+const playBtn = document.getElementById("play");
+const NS = "http://www.w3.org/2000/svg";
+scrub.max = D.duration;
+
+const smooth = (x) => { x = Math.min(1, Math.max(0, x)); return x * x * (3 - 2 * x); };
+const hex = (c) => [1, 3, 5].map((i) => parseInt(c.slice(i, i + 2), 16));
+const mix = (a, b, k) => { const x = hex(a), y = hex(b); return "rgb(" + x.map((v, i) => Math.round(v + (y[i] - v) * k)).join(",") + ")"; };
+
+// Rutas compartidas: longitudes acumuladas una sola vez (MoveAlongPath recorre por largo de arco).
+const routes = D.routes.map((flat) => {
+  const pts = []; for (let i = 0; i < flat.length; i += 2) pts.push([flat[i], flat[i + 1]]);
+  const cum = [0];
+  for (let i = 1; i < pts.length; i++) cum.push(cum[i - 1] + Math.hypot(pts[i][0] - pts[i - 1][0], pts[i][1] - pts[i - 1][1]));
+  return { pts, cum, len: cum[cum.length - 1] };
+});
+function along(r, k) {
+  const target = k * r.len;
+  let i = 1; while (i < r.cum.length - 1 && r.cum[i] < target) i++;
+  const seg = r.cum[i] - r.cum[i - 1] || 1, f = (target - r.cum[i - 1]) / seg;
+  const a = r.pts[i - 1], b = r.pts[i];
+  return [a[0] + (b[0] - a[0]) * f, a[1] + (b[1] - a[1]) * f, i];
+}
+
+const edgeEls = D.edges.map((e) => {
+  const line = document.createElementNS(NS, "line");
+  line.setAttribute("stroke", "#FFFFFF");
+  line.setAttribute("stroke-width", D.baseLine.width);
+  svg.insertBefore(line, svg.firstChild);
+  return line;
+});
+
+function textLines(el, text) {
+  if (el.dataset.text === text) return;
+  el.dataset.text = text;
+  el.textContent = "";
+  text.split("\n").forEach((line, i) => {
+    const span = document.createElementNS(NS, "tspan");
+    span.setAttribute("x", el.getAttribute("x"));
+    span.setAttribute("dy", i ? "1.15em" : "0");
+    span.textContent = line;
+    el.appendChild(span);
+  });
+}
+
+function drawStatic(t) {
+  D.edges.forEach((e, i) => {
+    const [x1, y1, x2, y2, appear, create, gone] = e;
+    const el = edgeEls[i];
+    const k = smooth((t - appear) / create);
+    const fade = gone === null ? 1 : 1 - Math.min(1, Math.max(0, t - gone));
+    el.setAttribute("x1", x1); el.setAttribute("y1", y1);
+    el.setAttribute("x2", x1 + (x2 - x1) * k); el.setAttribute("y2", y1 + (y2 - y1) * k);
+    el.setAttribute("stroke-opacity", t < appear ? 0 : D.baseLine.opacity * fade);
+  });
+  D.nodes.forEach(([id, appear]) => {
+    document.getElementById("node-" + id).setAttribute("opacity", smooth(t - appear));
+  });
+  D.nodeEvents.forEach(([start, dur, id, kind]) => {
+    const circle = document.querySelector("#node-" + id + " circle");
+    if (!circle.dataset.stroke) circle.dataset.stroke = circle.getAttribute("stroke");
+    const active = kind === "reset" && t >= start && t <= start + dur;
+    circle.setAttribute("stroke", active ? D.colors.resetNode : circle.dataset.stroke);
+    circle.setAttribute("stroke-opacity", active && Math.floor((t - start) / 0.08) % 2 ? 0.2 : 1);
+  });
+  let p = D.marker[0][1];
+  for (let i = 1; i < D.marker.length; i++) {
+    const [t0, p0] = D.marker[i - 1], [t1, p1] = D.marker[i];
+    if (t >= t1) p = p1; else if (t > t0) { p = p0 + (p1 - p0) * smooth((t - t0) / (t1 - t0)); break; } else break;
+  }
+  const [x0, x1, ty] = D.timeline, mx = x0 + (x1 - x0) * p;
+  document.getElementById("marker").setAttribute("cx", mx);
+  document.getElementById("progress").setAttribute("x2", mx);
+  let current = D.milestones.findIndex((m) => m.start === 0);
+  D.milestones.forEach((m, i) => { if (m.start !== null && t >= m.start) current = i; });
+  const m = D.milestones[Math.max(0, current)];
+  textLines(document.getElementById("event"), m.title);
+  textLines(document.getElementById("subtitle"), m.detail);
+  let title = D.titles[0][1];
+  D.titles.forEach(([start, text]) => { if (t >= start) title = text; });
+  textLines(document.getElementById("title"), title);
+}
+
+function drawDynamic(t) {
+  const box = svg.getBoundingClientRect(), dpr = window.devicePixelRatio || 1;
+  if (canvas.width !== Math.round(box.width * dpr)) { canvas.width = Math.round(box.width * dpr); canvas.height = Math.round(box.height * dpr); }
+  const s = canvas.width / D.frame_width;
+  ctx.setTransform(1, 0, 0, 1, 0, 0);
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  ctx.setTransform(s, 0, 0, s, canvas.width / 2, canvas.height / 2);
+  ctx.lineWidth = D.trail.width;
+  for (const [ri, start, move, linger, fade, colors, settle] of D.tx) {
+    if (t < start) continue;
+    const r = routes[ri], local = t - start;
+    const k = Math.min(1, local / move);
+    const [x, y, seg] = along(r, k);
+    // Rastro: se dibuja mientras avanza, espera `linger` y se desvanece en `fade`.
+    const trailAlpha = local <= move + linger ? 1 : 1 - (local - move - linger) / fade;
+    if (trailAlpha > 0) {
+      ctx.globalAlpha = D.trail.opacity * trailAlpha;
+      ctx.strokeStyle = D.colors.white;
+      ctx.beginPath(); ctx.moveTo(r.pts[0][0], r.pts[0][1]);
+      for (let i = 1; i < seg; i++) ctx.lineTo(r.pts[i][0], r.pts[i][1]);
+      ctx.lineTo(x, y); ctx.stroke();
+    }
+    let color = D.colors.white;
+    for (const [cs, cd, target] of colors) {
+      if (t < cs) break;
+      color = t >= cs + cd ? target : mix(color, target, smooth((t - cs) / cd));
+    }
+    let px = x, py = y;
+    if (settle && t >= settle[0]) {
+      const f = smooth((t - settle[0]) / settle[1]);
+      px = x + (settle[2] - x) * f; py = y + (settle[3] - y) * f;
+    }
+    ctx.globalAlpha = 1;
+    ctx.fillStyle = color;
+    ctx.beginPath(); ctx.arc(px, py, D.dotRadius, 0, 2 * Math.PI); ctx.fill();
+  }
+}
+
+let t = 0, playing = true, last = null;
+function frame(now) {
+  if (playing && last !== null) { t = Math.min(D.duration, t + (now - last) / 1000); if (t >= D.duration) playing = false; }
+  last = now;
+  drawStatic(t); drawDynamic(t);
+  scrub.value = t; clock.textContent = t.toFixed(1) + " / " + D.duration.toFixed(1) + " s";
+  playBtn.textContent = playing ? "Pausa" : "Play";
+  requestAnimationFrame(frame);
+}
+playBtn.onclick = () => { if (t >= D.duration) t = 0; playing = !playing; };
+scrub.oninput = () => { t = parseFloat(scrub.value); playing = false; };
+requestAnimationFrame(frame);
+"""
+
+
+def render_html(plan: ScenePlan) -> str:
+    payload = json.dumps(plan_payload(plan), ensure_ascii=False, separators=(",", ":"))
+    # Un "</script>" dentro del JSON (titulos) cerraria el bloque antes de tiempo.
+    payload = payload.replace("</", "<\\/")
+    title = html.escape(plan.titles[0][1])
+    view_box = f"{-FRAME_WIDTH / 2:.3f} {-FRAME_HEIGHT / 2} {FRAME_WIDTH} {FRAME_HEIGHT}"
+    return f"""<!doctype html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+  body {{ margin: 0; background: #000; color: #fff; font-family: sans-serif; }}
+  #stage {{ position: relative; width: 100%; max-width: 1280px; margin: 0 auto; aspect-ratio: 16 / 9; }}
+  #stage svg, #stage canvas {{ position: absolute; inset: 0; width: 100%; height: 100%; }}
+  svg text {{ fill: #fff; }}
+  #controls {{ display: flex; gap: 12px; align-items: center; max-width: 1280px; margin: 8px auto; }}
+  #scrub {{ flex: 1; }}
+</style>
+</head>
+<body>
+<div id="stage">
+<svg id="scene" viewBox="{view_box}" xmlns="http://www.w3.org/2000/svg">
+{_svg_static(plan)}
+</svg>
+<canvas id="overlay"></canvas>
+</div>
+<div id="controls"><button id="play">Pausa</button><input id="scrub" type="range" min="0" step="0.01" value="0"><span id="clock"></span></div>
+<script id="plan" type="application/json">{payload}</script>
+<script>{PLAYER_JS}</script>
+</body>
+</html>
+"""
+
+
+def export_html(scenario: dict[str, Any] | None, output: Path) -> Path:
+    plan = compile_plan(scenario)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(render_html(plan), encoding="utf-8")
+    return output
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    scenario = scenario_overrides(Path(args.variants), args.variant) if args.variant else {}
+    if args.timeline:
+        scenario["timeline_path"] = args.timeline
+    if args.visual:
+        scenario["visual_path"] = args.visual
+    started = time.perf_counter()
+    output = export_html(scenario, Path(args.output))
+    size_kb = output.stat().st_size / 1024
+    print(f"OK: {output.as_posix()} ({size_kb:.0f} KB) en {time.perf_counter() - started:.2f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="export_svg.py",
+        description="Export the architecture diagram, routes and timeline as a self-contained SVG+JS HTML page",
+    )
+    p.add_argument("-o", "--output", default="media/architecture.html")
+    p.add_argument("--variant", help="Scenario name from the variants catalog")
+    p.add_argument("--variants", default="variants.yaml")
+    p.add_argument("--timeline", help="Milestones YAML (default: cronos.yaml)")
+    p.add_argument("--visual", help="Visual config YAML (default: archMDP-ASIS.yaml)")
+    p.set_defaults(func=cmd_export)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES, load_scene_class
+from scene_plan import compile_plan
+
+
+# Store de frames crudos para revisar tiempos sin pasar por un encoder: el render
+# borrador escribe cada frame RGB comprimido con zlib (nivel 1) en frames.bin y un
+# indice (offset, largo, play, tiempo de escena) en index.npy. Frames repetidos
+# (wait, freeze) apuntan al mismo bloque. El lector mapea frames.bin con mmap: ir a
+# cualquier frame es un slice + inflate, y el visor local entrega ese bloque tal
+# cual (el navegador lo descomprime), asi que buscar y reproducir rangos es inmediato.
+STORE_DIR = Path("framestore")
+DATA_FILE = "frames.bin"
+INDEX_FILE = "index.npy"
+META_FILE = "meta.json"
+COMPRESS_LEVEL = 1
+INDEX_DTYPE = np.dtype([("offset", "<u8"), ("length", "<u4"), ("play", "<i4"), ("time", "<f8")])
+DEFAULT_PORT = 8765
+
+
+def store_dir(media_dir: Path, scene_file: Path, quality: str) -> Path:
+    return media_dir / STORE_DIR / scene_file.stem / quality
+
+
+class FrameStoreWriter:
+    # Se enchufa como "encoder" de render_multi.FanOutFileWriter (put/close).
+    def __init__(self, directory: Path, fps: int, level: int = COMPRESS_LEVEL, meta: dict[str, Any] | None = None) -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in (DATA_FILE, INDEX_FILE, META_FILE):
+            (directory / name).unlink(missing_ok=True)
+        self.directory = directory
+        self.dt = 1 / fps
+        self.level = level
+        self.meta = meta or {}
+        self.renderer: Any = None  # num_plays/time del frame actual
+        self.data = (directory / DATA_FILE).open("wb")
+        self.rows: list[tuple[int, int, int, float]] = []
+        self.offset = 0
+        self.shape: tuple[int, int] = (0, 0)
+        self._last = b""
+        self._block = (0, 0)
+
+    @property
+    def frames(self) -> int:
+        return len(self.rows)
+
+    def put(self, frame: np.ndarray, num_frames: int = 1) -> None:
+        raw = np.ascontiguousarray(frame[..., :3]).tobytes()
+        if raw != self._last:
+            block = zlib.compress(raw, self.level)
+            self.data.write(block)
+            self._block = (self.offset, len(block))
+            self.offset += len(block)
+            self._last = raw
+            self.shape = frame.shape[:2]
+        play = self.renderer.num_plays if self.renderer is not None else -1
+        # CairoRenderer.add_frame ya sumo los num_frames al tiempo de escena.
+        start = self.renderer.time - num_frames * self.dt if self.renderer is not None else self.frames * self.dt
+        for k in range(num_frames):
+            self.rows.append((*self._block, play, start + k * self.dt))
+
+    def close(self) -> None:
+        # Idempotente: FanOutFileWriter.finish y el finally del render lo llaman.
+        if self.data.closed:
+            return
+        self.data.close()
+        np.save(self.directory / INDEX_FILE, np.array(self.rows, dtype=INDEX_DTYPE))
+        height, width = self.shape
+        meta = self.meta | {
+            "width": width,
+            "height": height,
+            "fps": round(1 / self.dt),
+            "frames": self.frames,
+            "unique_frames": len({row[0] for row in self.rows}),
+            "bytes": self.offset,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        (self.directory / META_FILE).write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+class FrameStore:
+    def __init__(self, directory: Path) -> None:
+        if not (directory / META_FILE).exists():
+            raise FileNotFoundError(f"{directory.as_posix()}: no hay frame store (generar con frame_store.py render)")
+        self.directory = directory
+        self.meta = json.loads((directory / META_FILE).read_text(encoding="utf-8"))
+        self.index = np.load(directory / INDEX_FILE)
+        self._file = (directory / DATA_FILE).open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.meta["bytes"] else b""
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def compressed(self, i: int) -> bytes:
+        row = self.index[i]
+        return self._map[int(row["offset"]):int(row["offset"]) + int(row["length"])]
+
+    def frame(self, i: int) -> np.ndarray:
+        shape = (self.meta["height"], self.meta["width"], 3)
+        return np.frombuffer(zlib.decompress(self.compressed(i)), dtype=np.uint8).reshape(shape)
+
+    def frame_at(self, t: float) -> int:
+        # Ultimo frame con tiempo de escena <= t.
+        i = int(np.searchsorted(self.index["time"], t + 1e-9, side="right")) - 1
+        return min(max(i, 0), len(self) - 1)
+
+    def plays(self) -> list[dict[str, Any]]:
+        steps = {step["play"]: step for step in self.meta.get("steps", [])}
+        play_ids, first = np.unique(self.index["play"], return_index=True)
+        last = np.append(first[1:], len(self)) - 1
+        rows = []
+        for play, a, b in sorted(zip(play_ids.tolist(), first.tolist(), last.tolist()), key=lambda row: row[1]):
+            step = steps.get(play, {})
+            rows.append({
+                "play": play,
+                "name": step.get("name", ""),
+                "section": step.get("section"),
+                "first": a,
+                "last": b,
+                "time": round(float(self.index["time"][a]), 3),
+            })
+        return rows
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+
+def render_store(
+    *,
+    scene_file: Path,
+    scene_name: str,
+    quality: str,
+    media_dir: Path,
+    sections: set[int] | None = None,
+    level: int = COMPRESS_LEVEL,
+) -> tuple[Path, dict[str, Any]]:
+    from functools import partial
+
+    from manim import tempconfig
+    from manim.renderer.cairo_renderer import CairoRenderer
+
+    from render_multi import FanOutFileWriter
+    from render_variants import quality_config
+
+    _, _, fps = QUALITY_SIZES[quality]
+    scene_cls = load_scene_class(scene_file, scene_name)
+    if sections is not None:
+        scene_cls = type(scene_name, (scene_cls,), {"render_sections": sections})
+    plan = compile_plan(getattr(scene_cls, "scenario", None))
+    directory = store_dir(media_dir, scene_file, quality)
+    temp = quality_config(quality, str(media_dir)) | {
+        "input_file": str(scene_file),
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+    }
+    meta = {
+        "scene_file": scene_file.as_posix(),
+        "scene_name": scene_name,
+        "quality": quality,
+        "sections": sorted(sections) if sections is not None else None,
+        "steps": [{"play": s.index, "name": s.name, "section": s.section, "start": round(s.start, 3)} for s in plan.steps],
+        "milestones": [{"index": m.index, "label": m.label, "start": m.start} for m in plan.milestones],
+    }
+    store = FrameStoreWriter(directory, fps, level, meta)
+    started = time.perf_counter()
+    with tempconfig(temp):
+        try:
+            renderer = CairoRenderer(file_writer_class=partial(FanOutFileWriter, encoders=[store]))
+            store.renderer = renderer
+            scene = scene_cls(renderer=renderer)
+            scene.render()
+        finally:
+            store.close()
+    return directory, {"frames": store.frames, "bytes": store.offset, "seconds": time.perf_counter() - started}
+
+
+def _viewer_meta(store: FrameStore) -> dict[str, Any]:
+    meta = {k: v for k, v in store.meta.items() if k != "steps"}
+    return meta | {
+        "version": int((store.directory / DATA_FILE).stat().st_mtime),
+        "plays": store.plays(),
+        "frame_play": store.index["play"].tolist(),
+        "frame_time": np.round(store.index["time"], 3).tolist(),
+    }
+
+
+def serve(store: FrameStore, host: str, port: int) -> None:
+    meta_body = json.dumps(_viewer_meta(store), ensure_ascii=False).encode("utf-8")
+    page = VIEWER_HTML.replace("__TITLE__", f"{store.meta.get('scene_name', '')} · {store.directory.as_posix()}").encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, body: bytes, content_type: str, cache: str = "no-cache") -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", cache)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            path = urlsplit(self.path).path
+            if path == "/":
+                self._send(page, "text/html; charset=utf-8")
+            elif path == "/meta.json":
+                self._send(meta_body, "application/json")
+            elif path.startswith("/frame/") and path[7:].isdigit() and int(path[7:]) < len(store):
+                # Bloque zlib tal cual: el navegador lo infla (DecompressionStream "deflate").
+                self._send(store.compressed(int(path[7:])), "application/octet-stream", "max-age=86400, immutable")
+            else:
+                self.send_error(404)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"OK: visor en http://{host}:{port}/ ({len(store)} frames, Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+VIEWER_HTML = """<!doctype html>
+<html lang="es"><head><meta charset="utf-8"><title>__TITLE__</title>
+<style>
+  body { background: #111; color: #ddd; font: 13px monospace; margin: 12px; }
+  canvas { width: 100%; max-width: 1280px; image-rendering: pixelated; background: #000; display: block; }
+  #bar { display: flex; gap: 8px; align-items: center; margin: 8px 0; flex-wrap: wrap; max-width: 1280px; }
+  #slider { flex: 1; min-width: 300px; }
+  button, select, input { background: #222; color: #ddd; border: 1px solid #444; font: inherit; }
+  #info { white-space: pre; color: #9c9; }
+</style></head><body>
+<canvas id="view"></canvas>
+<div id="bar">
+  <button id="play">▶</button>
+  <input id="slider" type="range" min="0" value="0">
+  <label>in <input id="in" type="number" min="0" value="0" style="width:6em"></label>
+  <label>out <input id="out" type="number" min="0" value="0" style="width:6em"></label>
+  <label><input id="loop" type="checkbox" checked> loop</label>
+  <select id="speed"><option>0.25</option><option>0.5</option><option selected>1</option><option>2</option></select>
+  <select id="plays"></select>
+</div>
+<div id="info"></div>
+<div>← → frame · Shift+← → play · espacio play/pausa · [ ] marcan in/out · Home/End</div>
+<script>
+(async () => {
+  const meta = await (await fetch("meta.json")).json();
+  const n = meta.frames, w = meta.width, h = meta.height;
+  const canvas = document.getElementById("view");
+  canvas.width = w; canvas.height = h;
+  const ctx = canvas.getContext("2d");
+  const $ = (id) => document.getElementById(id);
+  const slider = $("slider"), inBox = $("in"), outBox = $("out");
+  slider.max = n - 1; inBox.max = outBox.max = n - 1; outBox.value = n - 1;
+  const playOf = new Map(meta.plays.map((p) => [p.play, p]));
+  for (const p of meta.plays) {
+    const opt = document.createElement("option");
+    opt.value = p.first;
+    opt.textContent = `#${p.play} ${p.name} (hito ${p.section}) t=${p.time}s`;
+    $("plays").appendChild(opt);
+  }
+  // Cache de frames decodificados (LRU chico: a 480p cada frame pesa ~1.6 MB).
+  const cache = new Map(), pending = new Map(), limit = Math.max(24, Math.floor(200e6 / (w * h * 4)));
+  async function decode(i) {
+    const res = await fetch(`frame/${i}?v=${meta.version}`);
+    const rgb = new Uint8Array(await new Response(res.body.pipeThrough(new DecompressionStream("deflate"))).arrayBuffer());
+    const img = new ImageData(w, h), px = img.data;
+    for (let s = 0, d = 0; s < rgb.length; s += 3, d += 4) { px[d] = rgb[s]; px[d + 1] = rgb[s + 1]; px[d + 2] = rgb[s + 2]; px[d + 3] = 255; }
+    return img;
+  }
+  function load(i) {
+    if (cache.has(i)) return Promise.resolve(cache.get(i));
+    if (!pending.has(i)) {
+      pending.set(i, decode(i).then((img) => {
+        pending.delete(i); cache.set(i, img);
+        if (cache.size > limit) cache.delete(cache.keys().next().value);
+        return img;
+      }));
+    }
+    return pending.get(i);
+  }
+  let current = 0, playing = false, t0 = 0, f0 = 0;
+  async function show(i) {
+    i = Math.max(0, Math.min(n - 1, i)); current = i; slider.value = i;
+    const p = playOf.get(meta.frame_play[i]) || {};
+    $("info").textContent = `frame ${i}/${n - 1}  t=${meta.frame_time[i].toFixed(3)}s  play #${meta.frame_play[i]} ${p.name || ""}  hito ${p.section ?? "-"}  (${i - (p.first ?? i)}/${(p.last ?? i) - (p.first ?? i)} del play)`;
+    const img = await load(i);
+    if (current === i) ctx.putImageData(img, 0, 0);
+  }
+  function tick(now) {
+    if (!playing) return;
+    const a = +inBox.value, b = Math.max(a, +outBox.value);
+    let i = f0 + Math.floor((now - t0) / 1000 * meta.fps * +$("speed").value);
+    if (i > b) {
+      if (!$("loop").checked) { setPlaying(false); return; }
+      t0 = now; f0 = a; i = a;
+    }
+    // Prefetch: si el frame no llego a tiempo se salta, no se frena la reproduccion.
+    for (let k = 1; k <= 8 && i + k <= b; k++) load(i + k);
+    if (i !== current) show(i);
+    requestAnimationFrame(tick);
+  }
+  function setPlaying(on) {
+    playing = on; $("play").textContent = on ? "❚❚" : "▶";
+    if (on) {
+      const a = +inBox.value, b = +outBox.value;
+      f0 = current >= a && current < b ? current : a; t0 = performance.now();
+      requestAnimationFrame(tick);
+    }
+  }
+  function playStep(dir) {
+    const idx = meta.plays.findIndex((p) => p.first <= current && current <= p.last);
+    const target = meta.plays[Math.max(0, Math.min(meta.plays.length - 1, idx + dir))];
+    if (target) show(target.first);
+  }
+  slider.oninput = () => show(+slider.value);
+  $("play").onclick = () => setPlaying(!playing);
+  $("plays").onchange = (e) => show(+e.target.value);
+  document.onkeydown = (e) => {
+    if (e.target.tagName === "INPUT" && e.target.type === "number") return;
+    if (e.key === " ") { setPlaying(!playing); e.preventDefault(); }
+    else if (e.key === "ArrowRight") e.shiftKey ? playStep(1) : show(current + 1);
+    else if (e.key === "ArrowLeft") e.shiftKey ? playStep(-1) : show(current - 1);
+    else if (e.key === "[") inBox.value = current;
+    else if (e.key === "]") outBox.value = current;
+    else if (e.key === "Home") show(0);
+    else if (e.key === "End") show(n - 1);
+    else return;
+    e.preventDefault();
+  };
+  show(0);
+})();
+</script></body></html>
+"""
+
+
+def _open_store(args: argparse.Namespace) -> FrameStore:
+    directory = Path(args.store) if args.store else store_dir(Path(args.media_dir), Path(args.scene_file), args.quality)
+    try:
+        return FrameStore(directory)
+    except FileNotFoundError as exc:
+        raise SystemExit(f"FALLA: {exc}") from None
+
+
+def _parse_sections(raw: str) -> set[int]:
+    try:
+        return {int(part) for part in raw.split(",") if part.strip()}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"hitos invalidos: {raw} (ej: 2,3)") from None
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    directory, result = render_store(
+        scene_file=Path(args.scene_file),
+        scene_name=args.scene_name,
+        quality=args.quality,
+        media_dir=Path(args.media_dir),
+        sections=args.sections,
+        level=args.level,
+    )
+    store = FrameStore(directory)
+    raw = len(store) * store.meta["width"] * store.meta["height"] * 3
+    print(
+        f"OK: {directory.as_posix()}: {result['frames']} frames ({store.meta['unique_frames']} distintos), "
+        f"{result['bytes'] / 1e6:.1f} MB ({raw / max(1, result['bytes']):.0f}x), {result['seconds']:.1f}s sin encoder"
+    )
+    store.close()
+
+
+def cmd_info(args: argparse.Namespace) -> None:
+    store = _open_store(args)
+    meta = store.meta
+    print(
+        f"{store.directory.as_posix()}: {meta['scene_name']} -q {meta['quality']}  {meta['width']}x{meta['height']}@{meta['fps']}  "
+        f"{len(store)} frames ({meta['unique_frames']} distintos)  {meta['bytes'] / 1e6:.1f} MB  {meta['created']}"
+    )
+    for row in store.plays():
+        if args.plays or row["name"] in ("timeline", "timeline_intro"):
+            print(f"  play {row['play']:>3}  frames {row['first']:>5}-{row['last']:<5}  t={row['time']:7.2f}s  hito {row['section']}  {row['name']}")
+    store.close()
+
+
+def cmd_view(args: argparse.Namespace) -> None:
+    store = _open_store(args)
+    try:
+        serve(store, args.host, args.port)
+    finally:
+        store.close()
+
+
+def cmd_png(args: argparse.Namespace) -> None:
+    from preview_wireframe import write_png
+
+    store = _open_store(args)
+    if args.time is not None:
+        index = store.frame_at(args.time)
+    elif args.play is not None:
+        rows = [row for row in store.plays() if row["play"] == args.play]
+        if not rows:
+            raise SystemExit(f"FALLA: el play {args.play} no esta en el store")
+        index = rows[0]["first"]
+    else:
+        index = min(max(args.frame, 0), len(store) - 1)
+    output = Path(args.output or store.directory / f"frame-{index:05d}.png")
+    write_png(output, store.frame(index))
+    print(f"OK: {output.as_posix()} (frame {index}, t={store.index['time'][index]:.3f}s, play {store.index['play'][index]})")
+    store.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="frame_store.py",
+        description="Draft render into a memory-mapped frame store and review timing in a local scrubbing viewer",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def add_store_args(parser: argparse.ArgumentParser) -> None:
+        parser.add_argument("--store", help="Store directory (default: <media-dir>/framestore/<scene>/<quality>)")
+        parser.add_argument("--scene-file", default=DEFAULT_SCENE_FILE)
+        parser.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+        parser.add_argument("--media-dir", default="media")
+
+    p_render = sub.add_parser("render", help="Render the scene into the frame store (no video encode)")
+    p_render.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p_render.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p_render.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p_render.add_argument("--sections", type=_parse_sections, help="Only these milestones, e.g. 2,3")
+    p_render.add_argument("--media-dir", default="media")
+    p_render.add_argument("--level", type=int, default=COMPRESS_LEVEL, choices=range(0, 10), metavar="0-9", help="zlib level")
+    p_render.set_defaults(func=cmd_render)
+
+    p_info = sub.add_parser("info", help="Store summary and where each milestone starts")
+    add_store_args(p_info)
+    p_info.add_argument("--plays", action="store_true", help="List every play with its frame range")
+    p_info.set_defaults(func=cmd_info)
+
+    p_view = sub.add_parser("view", help="Local viewer: seek any frame, step by play, loop in/out ranges")
+    add_store_args(p_view)
+    p_view.add_argument("--host", default="127.0.0.1")
+    p_view.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_view.set_defaults(func=cmd_view)
+
+    p_png = sub.add_parser("png", help="Write one frame as PNG")
+    add_store_args(p_png)
+    which = p_png.add_mutually_exclusive_group()
+    which.add_argument("--frame", type=int, default=0)
+    which.add_argument("--time", type=float, help="Scene time in seconds")
+    which.add_argument("--play", type=int, help="First frame of this play")
+    p_png.add_argument("-o", "--output")
+    p_png.set_defaults(func=cmd_png)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+# Historias de incidentes como eventos en YAML (incidents.yaml) y una simulacion
+# de eventos discretos (heapq) que precalcula ruta, llegada y resultado de cada
+# pago. build_plan toma el resultado por fase, asi que una historia nueva
+# (otra falla, otro umbral, otro cambio de ruta) no requiere tocar construct.
+#
+# Las cinco fases son las de la escena; cada una recibe `transactions` pagos
+# cada `interval` segundos desde su `at`. Eventos (tiempo de simulacion en s):
+#   route_switch       {route: f5 | apache_l1 | apache_m1}   ruta de los pagos nuevos
+#   node_down          {node}                                los pagos que llegan quedan encolados
+#   node_reset         {node}                                vuelve a atender; lo encolado se pierde
+#   timeout_threshold  {node, ms}                            latencia mayor => timeout en ese nodo
+#   node_slow          {node, ms, every: 1, offset: 0}       cada `every` pagos uno tarda `ms` extra
+SCENE_PHASES = ["f5_initial", "apache_bypass", "apache_l1_queued", "apache_l1_round2", "f5_final"]
+EVENT_FIELDS = {
+    "route_switch": {"route"},
+    "node_down": {"node"},
+    "node_reset": {"node"},
+    "timeout_threshold": {"node", "ms"},
+    "node_slow": {"node", "ms"},
+}
+ROUTES = ["f5", "apache_l1", "apache_m1"]
+DEFAULT_LATENCY_MS = 40.0
+DEFAULT_INTERVAL = 1.0
+
+
+class IncidentError(ValueError):
+    def __init__(self, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__("; ".join(errors))
+
+
+@dataclass
+class Payment:
+    phase: str
+    index: int
+    arrival: float
+    route: list[str]
+    outcome: str = "in_flight"
+    stuck_at: str | None = None
+    latency_ms: float = 0.0
+    finished: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "index": self.index,
+            "arrival": round(self.arrival, 4),
+            "route": self.route,
+            "outcome": self.outcome,
+            "stuck_at": self.stuck_at,
+            "latency_ms": round(self.latency_ms, 1),
+        }
+
+
+def load_story(source: str | Path | dict) -> dict[str, Any]:
+    if isinstance(source, dict):
+        return source
+    import yaml
+
+    path = Path(source)
+    if not path.exists():
+        raise IncidentError([f"no existe {path.as_posix()}"])
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as exc:
+        raise IncidentError([f"{path.as_posix()}: YAML invalido ({exc})"]) from None
+    if not isinstance(data, dict):
+        raise IncidentError([f"{path.as_posix()}: se esperaba un mapeo en la raiz"])
+    return data
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def validate_story(story: dict[str, Any], node_ids: set[str]) -> list[str]:
+    errors = []
+    if "interval" in story and (not _is_number(story["interval"]) or story["interval"] <= 0):
+        errors.append("interval: se requiere un numero > 0 (segundos)")
+    latency = story.get("latency_ms") or {}
+    if not isinstance(latency, dict):
+        errors.append("latency_ms: se esperaba un mapeo nodo -> ms")
+    else:
+        for node, value in latency.items():
+            if not _is_number(value) or value < 0:
+                errors.append(f"latency_ms.{node}: se requiere un numero >= 0")
+    phases = story.get("phases") or {}
+    if not isinstance(phases, dict):
+        errors.append(f"phases: se esperaba un mapeo con las fases {', '.join(SCENE_PHASES)}")
+        phases = {}
+    for phase in SCENE_PHASES:
+        spec = phases.get(phase)
+        if not isinstance(spec, dict) or not _is_number(spec.get("at")):
+            errors.append(f"phases.{phase}: se requiere `at` (segundos)")
+            continue
+        count = spec.get("transactions", story.get("transactions", 16))
+        if not _is_int(count) or count < 1:
+            errors.append(f"phases.{phase}.transactions: se requiere un entero >= 1")
+        if "interval" in spec and (not _is_number(spec["interval"]) or spec["interval"] <= 0):
+            errors.append(f"phases.{phase}.interval: se requiere un numero > 0 (segundos)")
+    for extra in sorted(set(phases) - set(SCENE_PHASES), key=str):
+        errors.append(f"phases.{extra}: la escena no tiene esa fase ({', '.join(SCENE_PHASES)})")
+    events = story.get("events") or []
+    if not isinstance(events, list):
+        errors.append("events: se esperaba una lista de eventos")
+        events = []
+    for idx, event in enumerate(events):
+        where = f"events[{idx}]"
+        if not isinstance(event, dict) or event.get("type") not in EVENT_FIELDS:
+            errors.append(f"{where}: type debe ser uno de {', '.join(EVENT_FIELDS)}")
+            continue
+        if not _is_number(event.get("at")):
+            errors.append(f"{where}: se requiere `at` (segundos)")
+        missing = EVENT_FIELDS[event["type"]] - set(event)
+        if missing:
+            errors.append(f"{where} ({event['type']}): falta {', '.join(sorted(missing))}")
+        if "node" in event and event["node"] not in node_ids:
+            errors.append(f"{where}: nodo desconocido {event['node']!r}")
+        if event.get("node") == "mdp":
+            errors.append(f"{where}: MDP es el origen de los pagos, no puede fallar")
+        if event["type"] == "route_switch" and event.get("route") not in ROUTES:
+            errors.append(f"{where}: route debe ser uno de {', '.join(ROUTES)}")
+        if "ms" in event and (not _is_number(event["ms"]) or event["ms"] < 0):
+            errors.append(f"{where}: ms debe ser un numero >= 0")
+        if "every" in event and (not _is_int(event["every"]) or event["every"] < 1):
+            errors.append(f"{where}: every debe ser un entero >= 1")
+        if "offset" in event and (not _is_int(event["offset"]) or event["offset"] < 0):
+            errors.append(f"{where}: offset debe ser un entero >= 0")
+    return errors
+
+
+class _Simulation:
+    def __init__(self, story: dict[str, Any], nodes: dict[str, Any]) -> None:
+        from scene_plan import apache_l1_route, f5_route_cycle, osb_ids
+
+        self.nodes = nodes
+        cycle = f5_route_cycle(nodes)
+        first_morande = next((osb for osb in osb_ids(nodes) if osb.startswith("osb_m")), None)
+        self.policies = {
+            "f5": lambda i: cycle[i % len(cycle)],
+            "apache_l1": lambda i: apache_l1_route(nodes, i),
+            "apache_m1": lambda i: ["mdp", "apache_m1", first_morande or "osb_l1", "tux_a" if i % 2 == 0 else "tux_l", "tandem_a"],
+        }
+        self.route = str(story.get("initial_route", "f5"))
+        latency = story.get("latency_ms") or {}
+        self.base_latency = {node_id: float(latency.get(node_id, latency.get("default", DEFAULT_LATENCY_MS))) for node_id in nodes}
+        self.threshold: dict[str, float] = {}
+        self.slow: dict[str, tuple[float, int, int]] = {}
+        self.seen: dict[str, int] = {}
+        self.down: set[str] = set()
+        self.queued: dict[str, list[Payment]] = {}
+        self.heap: list[tuple[float, int, int, str, Any]] = []
+        self.seq = itertools.count()
+
+    def push(self, t: float, priority: int, kind: str, data: Any) -> None:
+        # Con el mismo instante, los eventos de la historia van antes que los pagos.
+        heapq.heappush(self.heap, (t, priority, next(self.seq), kind, data))
+
+    def apply(self, event: dict[str, Any]) -> None:
+        kind = event["type"]
+        node = event.get("node")
+        if kind == "route_switch":
+            self.route = event["route"]
+        elif kind == "node_down":
+            self.down.add(node)
+        elif kind == "node_reset":
+            self.down.discard(node)
+            # Lo encolado durante la caida no se reprocesa (queda como perdido).
+            self.queued.pop(node, None)
+        elif kind == "timeout_threshold":
+            self.threshold[node] = float(event["ms"])
+        elif kind == "node_slow":
+            self.slow[node] = (float(event["ms"]), int(event.get("every", 1)), int(event.get("offset", 0)))
+
+    def hop(self, t: float, payment: Payment, k: int) -> None:
+        node = payment.route[k]
+        if k > 0 and node in self.down:
+            payment.outcome, payment.stuck_at = "queued", node
+            self.queued.setdefault(node, []).append(payment)
+            return
+        count = self.seen.get(node, 0)
+        self.seen[node] = count + 1
+        latency = self.base_latency[node]
+        extra, every, offset = self.slow.get(node, (0.0, 1, 0))
+        if extra and count >= offset and (count - offset) % every == 0:
+            latency += extra
+        payment.latency_ms += latency
+        if latency > self.threshold.get(node, math.inf):
+            payment.outcome, payment.stuck_at = "timeout", node
+            return
+        if k == len(payment.route) - 1:
+            payment.outcome, payment.finished = "delivered", t
+            return
+        self.push(t + latency / 1000.0, 1, "hop", (payment, k + 1))
+
+    def run(self, story: dict[str, Any]) -> dict[str, list[Payment]]:
+        for event in story.get("events") or []:
+            self.push(float(event["at"]), 0, "event", event)
+        interval = float(story.get("interval", DEFAULT_INTERVAL))
+        phases = story["phases"]
+        for phase in SCENE_PHASES:
+            spec = phases[phase]
+            count = int(spec.get("transactions", story.get("transactions", 16)))
+            step = float(spec.get("interval", interval))
+            for i in range(count):
+                self.push(float(spec["at"]) + i * step, 1, "arrive", (phase, i))
+        schedule: dict[str, list[Payment]] = {phase: [] for phase in SCENE_PHASES}
+        while self.heap:
+            t, _, _, kind, data = heapq.heappop(self.heap)
+            if kind == "event":
+                self.apply(data)
+            elif kind == "arrive":
+                phase, i = data
+                payment = Payment(phase, i, t, list(self.policies[self.route](i)))
+                schedule[phase].append(payment)
+                self.hop(t, payment, 0)
+            else:
+                payment, k = data
+                self.hop(t, payment, k)
+        return schedule
+
+
+def simulate(story: dict[str, Any], nodes: dict[str, Any]) -> dict[str, list[Payment]]:
+    errors = validate_story(story, set(nodes))
+    if errors:
+        raise IncidentError(errors)
+    return _Simulation(story, nodes).run(story)
+
+
+def scenario_from_story(source: str | Path | dict, nodes: dict[str, Any]) -> dict[str, Any]:
+    # Entradas de escenario que reemplazan transactions/f5_stuck_indices/apache_l1_queued.
+    schedule = simulate(load_story(source), nodes)
+    initial = schedule["f5_initial"]
+    return {
+        "transactions": len(initial),
+        "failures": {
+            "f5_stuck_indices": [p.index for p in initial if p.outcome != "delivered"],
+            "apache_l1_queued": sum(1 for p in schedule["apache_l1_queued"] if p.outcome != "delivered"),
+        },
+        "schedule": {phase: [p.as_dict() for p in payments] for phase, payments in schedule.items()},
+    }
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    from scene_plan import DEFAULT_SCENARIO, node_layout
+
+    nodes = node_layout(DEFAULT_SCENARIO["topology"] | {"osb_morande": args.osb_morande, "osb_longovilo": args.osb_longovilo})
+    try:
+        schedule = simulate(load_story(args.story), nodes)
+    except IncidentError as exc:
+        for error in exc.errors:
+            print(f"FALLA: {error}")
+        raise SystemExit(1) from None
+    for phase, payments in schedule.items():
+        outcomes: dict[str, int] = {}
+        for payment in payments:
+            key = payment.outcome if not payment.stuck_at else f"{payment.outcome}@{payment.stuck_at}"
+            outcomes[key] = outcomes.get(key, 0) + 1
+        print(f"{phase:<18} {len(payments):>3} pagos  " + "  ".join(f"{k} {v}" for k, v in sorted(outcomes.items())))
+        if args.verbose:
+            for p in payments:
+                print(f"    #{p.index:<3} t={p.arrival:7.2f}s  {'>'.join(p.route):<44} {p.outcome:<9} {p.stuck_at or '':<10} {p.latency_ms:6.0f} ms")
+    print(f"OK: {sum(len(p) for p in schedule.values())} pagos simulados")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="incident_sim.py",
+        description="Simulate an incident story (YAML events) and print each phase's payments and outcomes",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+    p_run = sub.add_parser("run", help="Run the discrete-event simulation")
+    p_run.add_argument("story", nargs="?", default="incidents.yaml")
+    p_run.add_argument("--osb-morande", type=int, default=4)
+    p_run.add_argument("--osb-longovilo", type=int, default=4)
+    p_run.add_argument("-v", "--verbose", action="store_true", help="One line per payment")
+    p_run.set_defaults(func=cmd_run)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+from preview_wireframe import Canvas, write_png
+from scene_plan import COLORS, ScenePlan, apache_l1_route, compile_plan, f5_route_cycle, route_points
+from trace_reader import TraceError, TraceRecord, record_from_json
+
+
+# Modo en vivo para la pantalla de operaciones: los pagos llegan por un socket
+# (tcp://host:puerto o unix:///ruta, una linea JSON por pago) o por tail de un
+# JSONL, con las mismas columnas que trace_reader.py. Cada pago es una bolita que
+# recorre su ruta en MOVE_TIME segundos de reloj; la carga por nodo y el total por
+# resultado se acumulan con decaimiento exponencial. Se dibuja a fps fijo con el
+# Canvas de preview_wireframe.py (NumPy, sin manim) a PNG rotativos o a un HLS
+# (segmentos .ts + live.m3u8).
+#
+# Backpressure: si la cola de entrada se llena, o si en un cuadro llegan mas pagos
+# de los que caben como bolitas, el excedente solo suma a los agregados (carga por
+# nodo y barra de resultados). Si el dibujo se atrasa se saltan ticks en vez de
+# acumular atraso, y mientras tanto todo lo nuevo va a agregados.
+LIVE_DIR = Path("media/live")
+DEFAULT_FPS = 5
+MOVE_TIME = 2.0
+LINGER_TIME = 1.5
+MAX_PARTICLES = 300
+QUEUE_SIZE = 2000
+LOAD_HALF_LIFE = 5.0
+DOT_RADIUS = 0.06
+KEEP_FRAMES = 50
+SEGMENT_SECONDS = 4
+KEEP_SEGMENTS = 6
+STATUS_INTERVAL = 5.0
+OUTCOME_COLORS = {"delivered": COLORS["GREEN"], "timeout": COLORS["RED"]}
+
+
+@dataclass
+class Particle:
+    points: np.ndarray  # (n, 2)
+    lengths: np.ndarray  # largo acumulado por vertice
+    born: float
+    outcome: str
+
+    def position(self, now: float) -> tuple[np.ndarray, float]:
+        progress = min(1.0, (now - self.born) / MOVE_TIME)
+        target = progress * self.lengths[-1]
+        seg = min(int(np.searchsorted(self.lengths, target, side="right")) - 1, len(self.points) - 2)
+        span = self.lengths[seg + 1] - self.lengths[seg]
+        frac = 0.0 if span <= 0 else (target - self.lengths[seg]) / span
+        return self.points[seg] + (self.points[seg + 1] - self.points[seg]) * frac, progress
+
+
+class LiveState:
+    def __init__(self, plan: ScenePlan, max_particles: int) -> None:
+        self.nodes = plan.nodes
+        self.edges = list({edge.id: (edge.a, edge.b) for edge in plan.edges}.values())
+        self.max_particles = max_particles
+        self.particles: deque[Particle] = deque()
+        self.load = {node_id: 0.0 for node_id in self.nodes}
+        self.rate = {outcome: 0.0 for outcome in OUTCOME_COLORS}
+        self.totals = {outcome: 0 for outcome in OUTCOME_COLORS}
+        self.last = time.monotonic()
+        self._routes: dict[tuple[str, ...], tuple[np.ndarray, np.ndarray] | None] = {}
+
+    def decay(self, now: float) -> None:
+        factor = 0.5 ** ((now - self.last) / LOAD_HALF_LIFE)
+        self.last = now
+        for key in self.load:
+            self.load[key] *= factor
+        for key in self.rate:
+            self.rate[key] *= factor
+
+    def count(self, record: TraceRecord) -> None:
+        self.totals[record.outcome] = self.totals.get(record.outcome, 0) + 1
+        self.rate[record.outcome] = self.rate.get(record.outcome, 0.0) + 1.0
+        for hop in record.route:
+            if hop in self.load:
+                self.load[hop] += 1.0
+
+    def _geometry(self, route: tuple[str, ...]) -> tuple[np.ndarray, np.ndarray] | None:
+        # Rutas repetidas miles de veces: los puntos se calculan una vez por ruta.
+        if route not in self._routes:
+            hops = [hop for hop in route if hop in self.nodes]
+            if len(hops) < 2:
+                self._routes[route] = None
+            else:
+                points = np.array(route_points(self.nodes, hops), dtype=np.float64)
+                steps = np.hypot(*np.diff(points, axis=0).T)
+                self._routes[route] = (points, np.concatenate([[0.0], np.cumsum(steps)]))
+        return self._routes[route]
+
+    def spawn(self, record: TraceRecord, now: float) -> bool:
+        if len(self.particles) >= self.max_particles:
+            return False
+        geometry = self._geometry(record.route)
+        if geometry is None:
+            return False
+        self.particles.append(Particle(geometry[0], geometry[1], now, record.outcome))
+        return True
+
+    def expire(self, now: float) -> None:
+        # Todas viven lo mismo y entran en orden: basta mirar la mas vieja.
+        while self.particles and now - self.particles[0].born > MOVE_TIME + LINGER_TIME:
+            self.particles.popleft()
+
+    def snapshot(self, now: float, degraded: bool) -> dict[str, Any]:
+        dots = []
+        for particle in self.particles:
+            position, progress = particle.position(now)
+            color = COLORS["WHITE"] if progress < 1.0 else OUTCOME_COLORS.get(particle.outcome, COLORS["WHITE"])
+            dots.append((tuple(position), color))
+        peak = max(1.0, max(self.load.values(), default=1.0))
+        return {
+            "edges": self.edges,
+            "nodes": [(node.center, node.radius, node.color, self.load[node.id] / peak) for node in self.nodes.values()],
+            "dots": dots,
+            "rate": dict(self.rate),
+            "degraded": degraded,
+        }
+
+
+def draw_frame(snapshot: dict[str, Any], width: int, height: int) -> np.ndarray:
+    canvas = Canvas(width, height)
+    for a, b in snapshot["edges"]:
+        canvas.polyline([a, b], COLORS["WHITE"], 0.25)
+    for center, radius, color, load in snapshot["nodes"]:
+        canvas.circle(center, radius, color)
+        if load > 0.02:
+            # Halo de carga: mas grande y mas opaco cuanto mas trafico reciente.
+            canvas.circle(center, radius + 0.05 + 0.15 * load, color, 0.25 + 0.6 * load)
+    for position, color in snapshot["dots"]:
+        canvas.disc(position, DOT_RADIUS, color)
+    pixels = canvas.pixels
+    bar = max(4, height // 60)
+    total = sum(snapshot["rate"].values())
+    x = 0
+    for outcome, color in OUTCOME_COLORS.items():
+        share = 0 if total <= 0 else int(round(width * snapshot["rate"][outcome] / total))
+        pixels[height - bar:, x:x + share] = [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+        x += share
+    if snapshot["degraded"]:
+        # Marca de backpressure: solo agregados mientras el dibujo o la entrada van atrasados.
+        pixels[:bar * 2, width - bar * 2:] = [int(COLORS["ORANGE"][i:i + 2], 16) for i in (1, 3, 5)]
+    return canvas.to_uint8()
+
+
+class PngSink:
+    # PNG rotativos + latest.png (reemplazo atomico, lo puede refrescar un navegador).
+    def __init__(self, out_dir: Path, keep: int = KEEP_FRAMES) -> None:
+        self.out_dir = out_dir
+        self.keep = keep
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, rgb: np.ndarray, index: int) -> None:
+        path = self.out_dir / f"frame-{index:06d}.png"
+        write_png(path, rgb)
+        tmp = self.out_dir / "latest.tmp.png"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, self.out_dir / "latest.png")
+        (self.out_dir / f"frame-{index - self.keep:06d}.png").unlink(missing_ok=True)
+
+    def close(self) -> None:
+        pass
+
+
+class HlsSink:
+    # Segmentos MPEG-TS de SEGMENT_SECONDS y una playlist live.m3u8 con los ultimos.
+    def __init__(self, out_dir: Path, fps: int, seconds: float = SEGMENT_SECONDS, keep: int = KEEP_SEGMENTS) -> None:
+        import av
+
+        self.av = av
+        self.out_dir = out_dir
+        self.fps = fps
+        self.frames_per_segment = max(1, int(round(seconds * fps)))
+        self.keep = keep
+        self.segment = -1
+        self.container = None
+        self.stream = None
+        self.done: deque[int] = deque()
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    def _open(self, rgb: np.ndarray) -> None:
+        self.segment += 1
+        self.container = self.av.open(str(self.out_dir / f"seg-{self.segment:06d}.ts"), mode="w", format="mpegts")
+        self.stream = self.container.add_stream("libx264", rate=self.fps, options={"crf": "28", "preset": "veryfast"})
+        self.stream.pix_fmt = "yuv420p"
+        self.stream.height, self.stream.width = rgb.shape[:2]
+
+    def _close_segment(self) -> None:
+        if self.container is None:
+            return
+        for packet in self.stream.encode():
+            self.container.mux(packet)
+        self.container.close()
+        self.container = None
+        self.done.append(self.segment)
+        while len(self.done) > self.keep:
+            (self.out_dir / f"seg-{self.done.popleft():06d}.ts").unlink(missing_ok=True)
+        self._write_playlist()
+
+    def _write_playlist(self) -> None:
+        duration = self.frames_per_segment / self.fps
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{math.ceil(duration)}",
+            f"#EXT-X-MEDIA-SEQUENCE:{self.done[0]}",
+        ]
+        for segment in self.done:
+            lines += [f"#EXTINF:{duration:.3f},", f"seg-{segment:06d}.ts"]
+        tmp = self.out_dir / "live.m3u8.tmp"
+        tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp, self.out_dir / "live.m3u8")
+
+    def write(self, rgb: np.ndarray, index: int) -> None:
+        if self.container is None or index % self.frames_per_segment == 0:
+            self._close_segment()
+            self._open(rgb)
+        frame = self.av.VideoFrame.from_ndarray(rgb, format="rgb24")
+        for packet in self.stream.encode(frame):
+            self.container.mux(packet)
+
+    def close(self) -> None:
+        self._close_segment()
+
+
+def _ingest(line: bytes | str, offer: Callable[[TraceRecord], None], stats: dict[str, int]) -> None:
+    if not line.strip():
+        return
+    try:
+        record = record_from_json(line)
+    except TraceError:
+        stats["invalid"] += 1
+        return
+    offer(record)
+
+
+async def tail_jsonl(path: Path, offer: Callable, stats: dict[str, int], *, from_start: bool, poll: float = 0.2) -> None:
+    # tail -F: sigue el archivo y lo reabre si lo rotan o truncan.
+    handle = None
+    inode = None
+    pending = b""
+    while True:
+        if handle is None:
+            if not path.exists():
+                await asyncio.sleep(poll)
+                continue
+            handle = path.open("rb")
+            inode = os.fstat(handle.fileno()).st_ino
+            if not from_start:
+                handle.seek(0, os.SEEK_END)
+            # Un archivo rotado se lee desde el inicio.
+            from_start = True
+        chunk = handle.read(1 << 16)
+        if chunk:
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                _ingest(line, offer, stats)
+            await asyncio.sleep(0)
+            continue
+        try:
+            current = path.stat()
+        except FileNotFoundError:
+            current = None
+        if current is None or current.st_ino != inode or current.st_size < handle.tell():
+            handle.close()
+            handle, pending = None, b""
+            continue
+        await asyncio.sleep(poll)
+
+
+async def serve_socket(target: str, offer: Callable, stats: dict[str, int]) -> None:
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                _ingest(line, offer, stats)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            stats["invalid"] += 1
+        finally:
+            writer.close()
+
+    if target.startswith("unix://"):
+        path = target[len("unix://"):]
+        Path(path).unlink(missing_ok=True)
+        server = await asyncio.start_unix_server(client, path=path)
+    else:
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        server = await asyncio.start_server(client, host or "127.0.0.1", int(port))
+    async with server:
+        await server.serve_forever()
+
+
+async def run_live(
+    source: str,
+    *,
+    out_dir: Path,
+    output: str,
+    fps: int,
+    width: int,
+    height: int,
+    seconds: float,
+    max_particles: int,
+    queue_size: int,
+    from_start: bool,
+) -> dict[str, int]:
+    plan = compile_plan(None)
+    state = LiveState(plan, max_particles)
+    queue: asyncio.Queue[TraceRecord] = asyncio.Queue(maxsize=queue_size)
+    stats = {"received": 0, "particles": 0, "aggregated": 0, "invalid": 0, "frames": 0, "late_ticks": 0}
+
+    def offer(record: TraceRecord) -> None:
+        stats["received"] += 1
+        try:
+            queue.put_nowait(record)
+        except asyncio.QueueFull:
+            state.count(record)
+            stats["aggregated"] += 1
+
+    if source.startswith(("tcp://", "unix://")):
+        producer = asyncio.create_task(serve_socket(source, offer, stats))
+    else:
+        producer = asyncio.create_task(tail_jsonl(Path(source), offer, stats, from_start=from_start))
+    sink = HlsSink(out_dir, fps) if output == "hls" else PngSink(out_dir)
+    # Bolitas nuevas por cuadro para no pasar de max_particles vivas a la vez.
+    spawn_budget = max(1, math.ceil(max_particles / (fps * (MOVE_TIME + LINGER_TIME))))
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / fps
+    started = loop.time()
+    next_tick = started
+    next_status = started + STATUS_INTERVAL
+    degraded = 0
+    try:
+        while not seconds or loop.time() - started < seconds:
+            if producer.done():
+                producer.result()
+            now = time.monotonic()
+            state.decay(now)
+            state.expire(now)
+            spawned = 0
+            while not queue.empty():
+                record = queue.get_nowait()
+                state.count(record)
+                if not degraded and spawned < spawn_budget and state.spawn(record, now):
+                    spawned += 1
+                else:
+                    stats["aggregated"] += 1
+            stats["particles"] += spawned
+            snapshot = state.snapshot(now, degraded > 0 or queue.full())
+            # Dibujo y encode fuera del loop: la ingesta sigue mientras tanto.
+            rgb = await asyncio.to_thread(draw_frame, snapshot, width, height)
+            await asyncio.to_thread(sink.write, rgb, stats["frames"])
+            stats["frames"] += 1
+            degraded = max(0, degraded - 1)
+            next_tick += interval
+            late = loop.time() - next_tick
+            if late > 0:
+                skipped = math.ceil(late / interval)
+                stats["late_ticks"] += skipped
+                next_tick += skipped * interval
+                degraded = fps
+            if loop.time() >= next_status:
+                next_status += STATUS_INTERVAL
+                print(_status_line(stats, state))
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+    finally:
+        producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+        sink.close()
+    return stats
+
+
+def _status_line(stats: dict[str, int], state: LiveState) -> str:
+    return (
+        f"recibidos {stats['received']}  bolitas {stats['particles']}  agregados {stats['aggregated']}  "
+        f"invalidos {stats['invalid']}  vivas {len(state.particles)}  frames {stats['frames']}  "
+        f"ticks atrasados {stats['late_ticks']}  ok/timeout {state.totals['delivered']}/{state.totals['timeout']}"
+    )
+
+
+async def run_feed(target: str, *, rate: float, seconds: float, timeout_ratio: float, burst_every: float, seed: int) -> int:
+    # Generador local de pagos (reemplazo del feed real para probar el modo en vivo).
+    plan = compile_plan(None)
+    routes = f5_route_cycle(plan.nodes) + [apache_l1_route(plan.nodes, i) for i in range(2)]
+    rng = random.Random(seed)
+    writer: Any = None
+    handle = None
+    if target.startswith("unix://"):
+        _, writer = await asyncio.open_unix_connection(target[len("unix://"):])
+    elif target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        _, writer = await asyncio.open_connection(host or "127.0.0.1", int(port))
+    else:
+        Path(target).parent.mkdir(parents=True, exist_ok=True)
+        handle = open(target, "a", encoding="utf-8")
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    sent = 0
+    try:
+        while not seconds or loop.time() - started < seconds:
+            elapsed = loop.time() - started
+            # Rafaga de 2 s cada `burst_every` con 20x la tasa: fuerza el paso a agregados.
+            burst = burst_every > 0 and elapsed % burst_every < 2.0 and elapsed >= burst_every
+            await asyncio.sleep(rng.expovariate(rate * (20 if burst else 1)))
+            route = rng.choice(routes)
+            timeout = route[1] == "f5" and rng.random() < timeout_ratio
+            event = {
+                "ts": time.time(),
+                "route": route[:2] if timeout else route,
+                "outcome": "timeout" if timeout else "ok",
+                "latency_ms": round(rng.uniform(5000, 9000) if timeout else rng.lognormvariate(4.0, 0.5), 1),
+                "id": f"live-{sent}",
+            }
+            line = json.dumps(event) + "\n"
+            if writer is not None:
+                writer.write(line.encode("utf-8"))
+                await writer.drain()
+            else:
+                handle.write(line)
+                handle.flush()
+            sent += 1
+    finally:
+        if writer is not None:
+            writer.close()
+        if handle is not None:
+            handle.close()
+    return sent
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    width, height = args.size
+    try:
+        stats = asyncio.run(
+            run_live(
+                args.source,
+                out_dir=Path(args.out_dir),
+                output=args.output,
+                fps=args.fps,
+                width=width,
+                height=height,
+                seconds=args.seconds,
+                max_particles=args.max_particles,
+                queue_size=args.queue_size,
+                from_start=args.from_start,
+            )
+        )
+    except KeyboardInterrupt:
+        print("OK: modo en vivo detenido")
+        return
+    print(f"OK: {stats['frames']} frames en {args.out_dir}; {stats['received']} pagos ({stats['aggregated']} solo en agregados)")
+
+
+def cmd_feed(args: argparse.Namespace) -> None:
+    try:
+        sent = asyncio.run(
+            run_feed(
+                args.target,
+                rate=args.rate,
+                seconds=args.seconds,
+                timeout_ratio=args.timeout_ratio,
+                burst_every=args.burst_every,
+                seed=args.seed,
+            )
+        )
+    except KeyboardInterrupt:
+        return
+    print(f"OK: {sent} pagos enviados a {args.target}")
+
+
+def _parse_size(raw: str) -> tuple[int, int]:
+    try:
+        width, height = (int(part) for part in raw.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamano invalido: {raw} (ej: 1280x720)") from None
+    if width % 2 or height % 2:
+        raise argparse.ArgumentTypeError(f"tamano invalido: {raw} (ancho/alto pares)")
+    return width, height
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="live_mode.py",
+        description="Live architecture view from a streaming payment feed (socket or tailed JSONL), NumPy frames",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="Consume the feed and render rolling PNG frames or HLS segments")
+    p_run.add_argument("source", help="feed.jsonl (tail), tcp://127.0.0.1:9560 or unix:///tmp/mdp-feed.sock")
+    p_run.add_argument("--output", choices=["png", "hls"], default="png")
+    p_run.add_argument("--out-dir", default=str(LIVE_DIR))
+    p_run.add_argument("--fps", type=int, default=DEFAULT_FPS)
+    p_run.add_argument("--size", type=_parse_size, default=(1280, 720), help="WIDTHxHEIGHT")
+    p_run.add_argument("--seconds", type=float, default=0, help="Stop after N seconds (0 = until Ctrl+C)")
+    p_run.add_argument("--max-particles", type=int, default=MAX_PARTICLES)
+    p_run.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    p_run.add_argument("--from-start", action="store_true", help="Read the JSONL from the beginning instead of the end")
+    p_run.set_defaults(func=cmd_run)
+
+    p_feed = sub.add_parser("feed", help="Local stand-in feed generator (synthetic payments)")
+    p_feed.add_argument("target", help="feed.jsonl (append), tcp://127.0.0.1:9560 or unix:///tmp/mdp-feed.sock")
+    p_feed.add_argument("--rate", type=float, default=20.0, help="Payments per second")
+    p_feed.add_argument("--seconds", type=float, default=0, help="Stop after N seconds (0 = until Ctrl+C)")
+    p_feed.add_argument("--timeout-ratio", type=float, default=0.25)
+    p_feed.add_argument("--burst-every", type=float, default=30.0, help="Seconds between 20x bursts (0 = none)")
+    p_feed.add_argument("--seed", type=int, default=2024)
+    p_feed.set_defaults(func=cmd_feed)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
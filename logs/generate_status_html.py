@@ -5,10 +5,15 @@ import argparse
 import html
 import json
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+# render_progress.py vive en la raiz del repo; este script se corre como logs/generate_status_html.py.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from render_progress import latest_events
+
 
 def esc(v: object) -> str:
     return html.escape("" if v is None else str(v))
@@ -88,6 +93,8 @@ def main() -> None:
     ap.add_argument("--out", default="logs/STATUS.html")
     ap.add_argument("--stdout", action="store_true")
     ap.add_argument("--limit", type=int, default=80, help="How many changelog entries to show")
+    ap.add_argument("--progress-dir", default="media/progress", help="Render progress JSONL files")
+    ap.add_argument("--refresh", type=int, default=0, help="Auto-refresh seconds while renders are running (0 = off)")
     args = ap.parse_args()
 
     backlog_path = Path(args.backlog)
@@ -198,12 +205,45 @@ def main() -> None:
             + "</div>"
         )
 
+    # Renders en curso / recientes
+    # Ultimo evento de cada render (render_progress.py / MDP_PROGRESS=media/progress/<job>.jsonl).
+    progress = latest_events(Path(args.progress_dir))[:10]
+    progress_rows: list[str] = []
+    for ev in progress:
+        cls = {"running": "info", "done": "ok", "stale": "error"}[ev["status"]]
+        eta = ev.get("eta_s")
+        eta_txt = f"ETA {float(eta):.0f}s" if eta is not None and ev["status"] == "running" else ""
+        pct = float(ev.get("percent") or 0)
+        meta = " · ".join(filter(None, [str(ev.get("ts") or ""), str(ev.get("scene") or ""), str(ev.get("milestone") or ""), str(ev["source"])]))
+        progress_rows.append(
+            "<div class='changelog-entry'>"
+            "  <div class='entry-head'>"
+            f"    <div class='meta'>{esc(meta)}</div>"
+            f"    <div class='badges'><span class='badge {cls}'>{esc(ev['status'].upper())} {pct:.1f}%</span></div>"
+            "  </div>"
+            f"  <div class='progress'><div style='width:{min(pct, 100.0):.1f}%'></div></div>"
+            f"  <div class='notes mono'>{esc(ev.get('frames'))}/{esc(ev.get('frames_total'))} frames · {esc(ev.get('fps'))} fps {esc(eta_txt)}</div>"
+            + (f"<div class='kv'><span class='k'>file</span><span class='v mono'>{esc(ev.get('output'))}</span></div>" if ev.get("output") else "")
+            + "</div>"
+        )
+    running = any(ev["status"] == "running" for ev in progress)
+    refresh_meta = f'<meta http-equiv="refresh" content="{args.refresh}" />' if args.refresh and running else ""
+    progress_html = (
+        "<div class='panel renders'><div class='panel-title'><h2>RENDERS (En curso / recientes)</h2>"
+        f"<div class='hint'>Fuente: <span class='mono'>{esc(Path(args.progress_dir).as_posix())}</span></div></div>"
+        + "".join(progress_rows)
+        + "</div>"
+        if progress_rows
+        else ""
+    )
+
     html_doc = f"""<!DOCTYPE html>
 <html lang=\"es\">
 <head>
   <meta charset=\"UTF-8\" />
   <meta name=\"viewport\" content=\"width=device-width, initial-scale=1.0\" />
   <title>CHANGEBACKLOG</title>
+  {refresh_meta}
   <style>
     * {{ margin: 0; padding: 0; box-sizing: border-box; }}
 
@@ -297,6 +337,10 @@ def main() -> None:
     .k {{ color: #5E6C84; font-weight: 700; }}
     .v {{ color: #172B4D; }}
 
+    .renders {{ margin-bottom: 16px; }}
+    .progress {{ height: 6px; border-radius: 3px; background: #DFE1E6; overflow: hidden; }}
+    .progress div {{ height: 100%; background: #0969DA; }}
+
     .backlog-group {{ margin-bottom: 14px; }}
     .backlog-group h3 {{ margin: 0 0 6px 2px; font-size: 14px; color: #172B4D; }}
 
@@ -313,6 +357,7 @@ def main() -> None:
   <h1>CHANGEBACKLOG</h1>
   <div class='subtitle'>Backlog + cambios realizados en una sola vista. Regenera con: <span class='mono'>python3 logs/generate_status_html.py --stdout &gt; logs/STATUS.html</span></div>
 
+  {progress_html}
   <div class='grid'>
     <div class='panel'>
       <div class='panel-title'>
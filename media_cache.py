@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import os
+import sqlite3
+import struct
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Callable
+
+
+# Cache de media/ compartido entre versiones (archMDP-ASIS.vXYZ.py):
+#   partial  media/videos/<version>/<calidad>/partial_movie_files/<Escena>/<hash>.mp4
+#   text     media/texts/<hash>.svg   (SVG de Text, manim lo reutiliza si existe)
+#   tex      media/Tex/*
+# Cada entrada queda indexada con tamano, sha256 y ultimo uso; antes de reutilizar
+# un archivo se valida y, si esta corrupto, se borra para que manim lo regenere.
+CACHE_ENV = "MDP_CACHE"
+BUDGET_ENV = "MDP_CACHE_BUDGET_MB"
+INDEX_NAME = "cache_index.sqlite"
+MIN_IDLE_SECONDS = 3600
+MOVIE_SUFFIXES = {".mp4", ".mov", ".webm"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+"""
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _mp4_complete(path: Path) -> bool:
+    # Un partial cortado (render interrumpido) no alcanza a escribir `moov`
+    # o deja una caja que se sale del archivo: es lo que termina en InvalidDataError.
+    size = path.stat().st_size
+    boxes = set()
+    pos = 0
+    with path.open("rb") as handle:
+        while pos < size:
+            handle.seek(pos)
+            header = handle.read(8)
+            if len(header) < 8:
+                return False
+            box_size, box_type = struct.unpack(">I4s", header)
+            if box_size == 1:
+                extended = handle.read(8)
+                if len(extended) < 8:
+                    return False
+                box_size = struct.unpack(">Q", extended)[0]
+            elif box_size == 0:
+                box_size = size - pos
+            if box_size < 8 or pos + box_size > size:
+                return False
+            boxes.add(box_type)
+            pos += box_size
+    return {b"ftyp", b"moov", b"mdat"} <= boxes
+
+
+def probe_file(path: Path, kind: str) -> bool:
+    try:
+        if path.stat().st_size == 0:
+            return False
+        if kind == "partial":
+            if path.suffix in {".mp4", ".mov"}:
+                return _mp4_complete(path)
+            with path.open("rb") as handle:
+                return handle.read(4) == b"\x1a\x45\xdf\xa3"
+        if path.suffix == ".svg":
+            ET.parse(path)
+        return True
+    except (OSError, ET.ParseError, struct.error):
+        return False
+
+
+def classify(rel: Path) -> str | None:
+    parts = rel.parts
+    if parts and parts[0] == "videos" and "partial_movie_files" in parts and rel.suffix in MOVIE_SUFFIXES:
+        return "partial"
+    if parts and parts[0] == "texts" and rel.suffix == ".svg":
+        return "text"
+    if parts and parts[0] == "Tex":
+        return "tex"
+    return None
+
+
+def parse_size(raw: str) -> int:
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+    raw = raw.strip().upper().rstrip("B")
+    try:
+        if raw and raw[-1] in units:
+            return int(float(raw[:-1]) * units[raw[-1]])
+        return int(raw)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tamano invalido: {raw} (ej: 500M, 2G)") from None
+
+
+class MediaCache:
+    def __init__(self, media_dir: Path) -> None:
+        self.media_dir = Path(media_dir)
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.media_dir / INDEX_NAME, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        # Varios renders en paralelo (variantes, cola) comparten el indice.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.evicted: list[str] = []
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _rel(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.media_dir.resolve()).as_posix()
+        except ValueError:
+            return Path(path).as_posix()
+
+    def entry(self, path: Path) -> sqlite3.Row | None:
+        return self.conn.execute("SELECT * FROM entries WHERE path = ?", (self._rel(path),)).fetchone()
+
+    def register(self, path: Path, kind: str, *, sha: str | None = None, last_used: float | None = None) -> None:
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO entries (path, kind, size, sha256, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET size = excluded.size, sha256 = excluded.sha256, last_used = excluded.last_used",
+                (self._rel(path), kind, path.stat().st_size, sha, now, last_used or now),
+            )
+
+    def evict(self, path: Path, reason: str) -> None:
+        path.unlink(missing_ok=True)
+        with self.conn:
+            self.conn.execute("DELETE FROM entries WHERE path = ?", (self._rel(path),))
+        self.evicted.append(f"{self._rel(path)} ({reason})")
+
+    def check(self, path: Path, kind: str, *, deep: bool = True) -> bool:
+        # True = se puede reutilizar. Un archivo invalido se borra y manim lo regenera.
+        if not path.exists():
+            return False
+        entry = self.entry(path)
+        size = path.stat().st_size
+        if entry is None:
+            if not probe_file(path, kind):
+                self.evict(path, "incompleto")
+                return False
+            self.register(path, kind, sha=file_sha256(path) if deep else None)
+            return True
+        if entry["size"] != size:
+            self.evict(path, f"tamano {size} != {entry['size']}")
+            return False
+        if deep:
+            sha = file_sha256(path)
+            if entry["sha256"] and entry["sha256"] != sha:
+                self.evict(path, "sha256 distinto")
+                return False
+            if not entry["sha256"]:
+                self.register(path, kind, sha=sha)
+        self.touch(path)
+        return True
+
+    def touch(self, path: Path) -> None:
+        with self.conn:
+            self.conn.execute("UPDATE entries SET last_used = ? WHERE path = ?", (time.time(), self._rel(path)))
+
+    def cache_files(self) -> list[tuple[Path, str]]:
+        found = []
+        for top in ("videos", "texts", "Tex"):
+            root = self.media_dir / top
+            if not root.exists():
+                continue
+            for path in root.rglob("*"):
+                if path.is_file():
+                    kind = classify(path.relative_to(self.media_dir))
+                    if kind:
+                        found.append((path, kind))
+        return found
+
+    def sweep(self, *, kinds: set[str] | None = None, deep: bool = False) -> dict[str, int]:
+        stats = {"checked": 0, "registered": 0, "evicted": 0}
+        known = {row["path"]: row for row in self.conn.execute("SELECT * FROM entries")}
+        on_disk = set()
+        for path, kind in self.cache_files():
+            if kinds and kind not in kinds:
+                continue
+            rel = self._rel(path)
+            on_disk.add(rel)
+            stats["checked"] += 1
+            before = len(self.evicted)
+            if rel not in known:
+                if probe_file(path, kind):
+                    # Archivo previo al indice: su antiguedad LRU parte desde el mtime.
+                    self.register(path, kind, last_used=path.stat().st_mtime)
+                    stats["registered"] += 1
+                else:
+                    self.evict(path, "incompleto")
+            elif known[rel]["size"] != path.stat().st_size or deep:
+                self.check(path, kind, deep=deep)
+            stats["evicted"] += len(self.evicted) - before
+        # Entradas cuyo archivo ya no existe (borrado a mano).
+        stale = [rel for rel, row in known.items() if rel not in on_disk and (not kinds or row["kind"] in kinds)]
+        with self.conn:
+            self.conn.executemany("DELETE FROM entries WHERE path = ?", [(rel,) for rel in stale])
+        return stats
+
+    def usage(self) -> dict[str, Any]:
+        rows = self.conn.execute("SELECT kind, COUNT(*) AS n, SUM(size) AS bytes FROM entries GROUP BY kind").fetchall()
+        by_version: dict[str, int] = {}
+        for row in self.conn.execute("SELECT path, size FROM entries WHERE kind = 'partial'"):
+            version = row["path"].split("/")[1]
+            by_version[version] = by_version.get(version, 0) + row["size"]
+        return {
+            "kinds": {row["kind"]: {"files": row["n"], "bytes": row["bytes"] or 0} for row in rows},
+            "versions": by_version,
+            "total": sum(row["bytes"] or 0 for row in rows),
+        }
+
+    def evict_to_budget(self, budget: int, *, min_idle: float = MIN_IDLE_SECONDS) -> int:
+        # LRU entre todas las versiones; lo usado hace menos de `min_idle` no se toca
+        # (puede ser de un render en curso en otro proceso).
+        total = self.usage()["total"]
+        freed = 0
+        cutoff = time.time() - min_idle
+        rows = self.conn.execute("SELECT path, size, last_used FROM entries ORDER BY last_used").fetchall()
+        for row in rows:
+            if total - freed <= budget or row["last_used"] > cutoff:
+                break
+            self.evict(self.media_dir / row["path"], "presupuesto LRU")
+            freed += row["size"]
+        self._prune_empty_dirs()
+        return freed
+
+    def _prune_empty_dirs(self) -> None:
+        videos = self.media_dir / "videos"
+        if not videos.exists():
+            return
+        for directory in sorted((p for p in videos.rglob("partial_movie_files") if p.is_dir()), reverse=True):
+            for sub in sorted(directory.glob("*"), reverse=True):
+                if sub.is_dir() and not any(sub.iterdir()):
+                    sub.rmdir()
+
+
+def attach_media_cache(scene: Any) -> MediaCache | None:
+    # Se engancha en la instancia: valida partials antes de reutilizarlos y los
+    # SVG de Text antes de que construct cree textos; registra lo nuevo al terminar.
+    if os.environ.get(CACHE_ENV, "").strip().lower() in {"0", "off", "no"}:
+        return None
+    from manim import config
+
+    cache = MediaCache(Path(config.media_dir))
+    cache.sweep(kinds={"text"})
+    writer = scene.renderer.file_writer
+    original_cached: Callable = writer.is_already_cached
+    original_finish: Callable = writer.finish
+
+    @functools.wraps(original_cached)
+    def is_already_cached(hash_invocation: str) -> bool:
+        if not original_cached(hash_invocation):
+            return False
+        path = Path(writer.partial_movie_directory) / f"{hash_invocation}{config.movie_file_extension}"
+        return cache.check(path, "partial")
+
+    @functools.wraps(original_finish)
+    def finish(*args, **kwargs):
+        try:
+            return original_finish(*args, **kwargs)
+        finally:
+            for name in getattr(writer, "partial_movie_files", []) or []:
+                path = Path(name) if name else None
+                if path and path.exists() and cache.entry(path) is None:
+                    cache.register(path, "partial", sha=file_sha256(path))
+            cache.sweep(kinds={"text"})
+            budget_mb = os.environ.get(BUDGET_ENV, "").strip()
+            if budget_mb:
+                cache.evict_to_budget(int(float(budget_mb) * (1 << 20)))
+            for line in cache.evicted:
+                print(f"media_cache: eliminado {line}")
+            cache.close()
+
+    writer.is_already_cached = is_already_cached
+    writer.finish = finish
+    return cache
+
+
+def _fmt_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    cache = MediaCache(Path(args.media_dir))
+    cache.sweep()
+    usage = cache.usage()
+    for kind, data in sorted(usage["kinds"].items()):
+        print(f"{kind:<8} {data['files']:>6} archivos  {_fmt_bytes(data['bytes']):>10}")
+    for version, size in sorted(usage["versions"].items(), key=lambda item: -item[1]):
+        print(f"  partials {version:<32} {_fmt_bytes(size):>10}")
+    print(f"total    {_fmt_bytes(usage['total']):>27}")
+    cache.close()
+
+
+def cmd_verify(args: argparse.Namespace) -> None:
+    cache = MediaCache(Path(args.media_dir))
+    stats = cache.sweep(deep=args.deep)
+    for line in cache.evicted:
+        print(f"ELIMINADO: {line}")
+    print(f"OK: {stats['checked']} revisados, {stats['registered']} nuevos en el indice, {stats['evicted']} eliminados")
+    cache.close()
+
+
+def cmd_evict(args: argparse.Namespace) -> None:
+    cache = MediaCache(Path(args.media_dir))
+    cache.sweep()
+    freed = cache.evict_to_budget(args.budget, min_idle=args.min_idle)
+    print(f"OK: liberados {_fmt_bytes(freed)} ({len(cache.evicted)} archivos); total {_fmt_bytes(cache.usage()['total'])}")
+    cache.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="media_cache.py",
+        description="Validate and budget manim's media cache (partial movie files, Text SVGs, Tex) across scene versions",
+    )
+    p.add_argument("--media-dir", default="media")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_stats = sub.add_parser("stats", help="Cache size per kind and per scene version")
+    p_stats.set_defaults(func=cmd_stats)
+
+    p_verify = sub.add_parser("verify", help="Check every cached file and delete corrupt ones")
+    p_verify.add_argument("--deep", action="store_true", help="Also compare sha256 with the index")
+    p_verify.set_defaults(func=cmd_verify)
+
+    p_evict = sub.add_parser("evict", help="Delete least recently used entries until under the budget")
+    p_evict.add_argument("--budget", type=parse_size, required=True, help="e.g. 500M, 2G")
+    p_evict.add_argument("--min-idle", type=float, default=MIN_IDLE_SECONDS, help="Keep entries used in the last N seconds")
+    p_evict.set_defaults(func=cmd_evict)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from render_variants import scenario_overrides
+from scene_plan import COLORS, FRAME_HEIGHT, FRAME_WIDTH, LEGEND, ScenePlan, compile_plan, keyframes
+
+
+# Preview de layout sin Cairo ni ffmpeg: el plan de la escena (mismas posiciones
+# y tiempos que el render) se dibuja como wireframe con NumPy en una hoja de
+# contactos. Las etiquetas se dibujan como cajas; las que se solapan van en rojo.
+
+# Caja aproximada de Text de manim por punto de font_size (alto de linea, ancho por glifo).
+TEXT_HEIGHT_PER_PT = 0.0075
+TEXT_WIDTH_PER_PT = 0.0055
+BOX_COLOR = "#5A5A5A"
+OVERLAP_COLOR = COLORS["RED"]
+DOT_RADIUS = 0.06
+
+
+@dataclass(frozen=True)
+class Box:
+    name: str
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+
+    def overlaps(self, other: Box) -> bool:
+        return self.x0 < other.x1 and other.x0 < self.x1 and self.y0 < other.y1 and other.y0 < self.y1
+
+
+def text_size(text: str, font_size: int) -> tuple[float, float]:
+    lines = text.split("\n")
+    width = max(len(line.strip()) for line in lines) * font_size * TEXT_WIDTH_PER_PT
+    return width, len(lines) * font_size * TEXT_HEIGHT_PER_PT
+
+
+def label_boxes(plan: ScenePlan, t: float) -> list[Box]:
+    # Misma colocacion que construct: next_to/to_edge/to_corner con los buff por defecto de manim.
+    steps = {step.name: step for step in reversed(plan.steps)}
+    boxes = []
+    for node in plan.nodes.values():
+        if plan.node_opacity(node.id, t) <= 0:
+            continue
+        w, h = text_size(node.label, node.label_size)
+        if node.label_side == "up":
+            y0 = node.y + node.radius + node.label_buff
+            boxes.append(Box(node.label, node.x - w / 2, y0, node.x + w / 2, y0 + h))
+        else:
+            y1 = node.y - node.radius - node.label_buff
+            boxes.append(Box(node.label, node.x - w / 2, y1 - h, node.x + w / 2, y1))
+
+    title_w, title_h = text_size(plan.title_at(t), 40)
+    title_top = FRAME_HEIGHT / 2 - 0.5
+    boxes.append(Box("titulo", -title_w / 2, title_top - title_h, title_w / 2, title_top))
+    footer_w, footer_h = text_size(f"by eCORE - PNLöP v³ & Manim v0.19.1   versión {plan.scenario['version_label']}", 9)
+    footer_top = title_top - title_h - 0.1
+    boxes.append(Box("firma", title_w / 2 - footer_w, footer_top - footer_h, title_w / 2, footer_top))
+
+    # Con `captions` el subtitulo y el titulo del hito van en un .vtt, no en el frame.
+    captions = bool(plan.scenario.get("captions"))
+    if t >= steps["timeline_intro"].start:
+        if not captions:
+            sub_w, sub_h = text_size(plan.milestone_at(t).detail, 9)
+            boxes.append(Box("subtitulo", -title_w / 2, footer_top - sub_h, -title_w / 2 + sub_w, footer_top))
+        right = FRAME_WIDTH / 2 - 0.6
+        bottom = -FRAME_HEIGHT / 2 + 0.3
+        boxes.append(Box("timeline", right - footer_w, bottom, right, bottom + 0.5))
+    if t >= steps["timeline_event"].start and not captions:
+        event_w, event_h = text_size(plan.milestone_at(t).title, 14)
+        center = FRAME_WIDTH / 2 - 0.6 - footer_w / 2
+        y0 = -FRAME_HEIGHT / 2 + 0.3 + 0.5 + 0.14
+        boxes.append(Box("hito", center - event_w / 2, y0, center + event_w / 2, y0 + event_h))
+    if t >= steps["legend"].start:
+        item_h = max(0.12, 10 * TEXT_HEIGHT_PER_PT)
+        width = 0.12 + 0.15 + max(text_size(text, 10)[0] for _, text in LEGEND)
+        height = len(LEGEND) * item_h + (len(LEGEND) - 1) * 0.1
+        x0 = -FRAME_WIDTH / 2 + 0.5 + 0.2
+        y0 = -FRAME_HEIGHT / 2 + 0.5 + 0.2
+        boxes.append(Box("leyenda", x0, y0, x0 + width, y0 + height))
+    return boxes
+
+
+class Canvas:
+    def __init__(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.pixels = np.zeros((height, width, 3), dtype=np.float32)
+        self.scale = width / FRAME_WIDTH
+
+    def to_px(self, x: Any, y: Any) -> tuple[Any, Any]:
+        px = (np.asarray(x) + FRAME_WIDTH / 2) * self.scale
+        py = (FRAME_HEIGHT / 2 - np.asarray(y)) * self.scale
+        return px, py
+
+    def _blend(self, px: Any, py: Any, color: str, alpha: float) -> None:
+        xs = np.round(px).astype(int)
+        ys = np.round(py).astype(int)
+        keep = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        rgb = np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float32)
+        xs, ys = xs[keep], ys[keep]
+        self.pixels[ys, xs] = self.pixels[ys, xs] * (1 - alpha) + rgb * alpha
+
+    def polyline(self, points: list[tuple[float, float]], color: str, alpha: float = 1.0) -> None:
+        if alpha <= 0 or len(points) < 2:
+            return
+        px, py = self.to_px([p[0] for p in points], [p[1] for p in points])
+        xs, ys = [], []
+        for i in range(len(points) - 1):
+            n = int(max(abs(px[i + 1] - px[i]), abs(py[i + 1] - py[i]))) + 1
+            xs.append(np.linspace(px[i], px[i + 1], n))
+            ys.append(np.linspace(py[i], py[i + 1], n))
+        self.pixels_blended(np.concatenate(xs), np.concatenate(ys), color, alpha)
+
+    def pixels_blended(self, px: Any, py: Any, color: str, alpha: float) -> None:
+        # Sin duplicados: un pixel compartido por dos segmentos no se mezcla dos veces.
+        coords = np.unique(np.stack([np.round(px), np.round(py)], axis=1), axis=0)
+        self._blend(coords[:, 0], coords[:, 1], color, alpha)
+
+    def circle(self, center: tuple[float, float], radius: float, color: str, alpha: float = 1.0) -> None:
+        if alpha <= 0:
+            return
+        n = max(16, int(2 * np.pi * radius * self.scale))
+        angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+        px, py = self.to_px(center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles))
+        self.pixels_blended(px, py, color, alpha)
+
+    def disc(self, center: tuple[float, float], radius: float, color: str) -> None:
+        cx, cy = self.to_px(center[0], center[1])
+        r = max(1.0, radius * self.scale)
+        ys, xs = np.mgrid[int(cy - r):int(cy + r) + 1, int(cx - r):int(cx + r) + 1]
+        mask = (xs - cx) ** 2 + (ys - cy) ** 2 <= r * r
+        self._blend(xs[mask], ys[mask], color, 1.0)
+
+    def rect(self, box: Box, color: str) -> None:
+        corners = [(box.x0, box.y0), (box.x1, box.y0), (box.x1, box.y1), (box.x0, box.y1), (box.x0, box.y0)]
+        self.polyline(corners, color)
+
+    def to_uint8(self) -> np.ndarray:
+        return np.clip(self.pixels, 0, 255).astype(np.uint8)
+
+
+def render_tile(plan: ScenePlan, t: float, width: int, height: int) -> tuple[np.ndarray, list[tuple[str, str]]]:
+    canvas = Canvas(width, height)
+    base_opacity = max(0.25, float(plan.scenario["visual_config"]["base_line"]["opacity"]))
+    for edge in plan.edges:
+        drawn, opacity = edge.visible_at(t)
+        if drawn > 0:
+            end = (edge.a[0] + (edge.b[0] - edge.a[0]) * drawn, edge.a[1] + (edge.b[1] - edge.a[1]) * drawn)
+            canvas.polyline([edge.a, end], COLORS["WHITE"], base_opacity * opacity)
+    resets = [(start, start + duration, node_id) for start, duration, node_id, _ in plan.node_events]
+    for node in plan.nodes.values():
+        color = COLORS["WHITE"] if any(s <= t <= e and n == node.id for s, e, n in resets) else node.color
+        canvas.circle(node.center, node.radius, color, plan.node_opacity(node.id, t))
+    trail_opacity = float(plan.scenario["visual_config"]["trail"]["opacity"])
+    for tx in plan.transactions:
+        if t < tx.start:
+            continue
+        drawn, alpha = tx.trail_at(t)
+        if alpha > 0 and drawn > 0:
+            lengths = np.cumsum([0.0] + [np.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(tx.points, tx.points[1:])])
+            head = tx.position_at(min(t, tx.arrive))
+            trail = [p for p, length in zip(tx.points, lengths) if length <= drawn * lengths[-1]] + [head]
+            canvas.polyline(trail, COLORS["WHITE"], trail_opacity * alpha)
+        canvas.disc(tx.position_at(t), DOT_RADIUS, tx.color_at(t))
+    boxes = label_boxes(plan, t)
+    pairs = [(a.name, b.name) for i, a in enumerate(boxes) for b in boxes[i + 1:] if a.overlaps(b)]
+    overlapping = {name for pair in pairs for name in pair}
+    for box in boxes:
+        canvas.rect(box, OVERLAP_COLOR if box.name in overlapping else BOX_COLOR)
+    return canvas.to_uint8(), pairs
+
+
+def contact_sheet(
+    plan: ScenePlan,
+    times: list[float],
+    *,
+    columns: int,
+    tile_width: int,
+) -> tuple[np.ndarray, list[list[tuple[str, str]]]]:
+    tile_height = tile_width * 9 // 16
+    gap = 4
+    bar = 4
+    rows = (len(times) + columns - 1) // columns
+    sheet = np.full(
+        (rows * (tile_height + bar + gap) + gap, columns * (tile_width + gap) + gap, 3), 24, dtype=np.uint8
+    )
+    overlaps = []
+    for idx, t in enumerate(times):
+        tile, pairs = render_tile(plan, t, tile_width, tile_height)
+        overlaps.append(pairs)
+        y = gap + (idx // columns) * (tile_height + bar + gap)
+        x = gap + (idx % columns) * (tile_width + gap)
+        sheet[y:y + tile_height, x:x + tile_width] = tile
+        # Barra de progreso bajo cada cuadro: posicion en el video y marcas de inicio de hito.
+        progress = int(tile_width * min(1.0, t / plan.duration))
+        sheet[y + tile_height:y + tile_height + bar, x:x + tile_width] = 60
+        sheet[y + tile_height:y + tile_height + bar, x:x + progress] = (0x83, 0xC1, 0x67)
+        for milestone in plan.milestones:
+            if milestone.start:
+                mark = x + int(tile_width * milestone.start / plan.duration)
+                sheet[y + tile_height:y + tile_height + bar, mark] = 255
+    return sheet, overlaps
+
+
+def write_png(path: Path, rgb: np.ndarray) -> None:
+    height, width, _ = rgb.shape
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, -1)], axis=1).tobytes()
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def _parse_times(raw: str) -> list[float]:
+    try:
+        times = [float(item) for item in raw.split(",") if item.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tiempos invalidos: {raw} (ej: 10,23.5,44)") from None
+    if any(t < 0 for t in times):
+        raise argparse.ArgumentTypeError(f"tiempos invalidos: {raw} (deben ser >= 0)")
+    return times
+
+
+def _positive_int(raw: str) -> int:
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"se espera un entero >= 1 (no {raw})")
+    return value
+
+
+def _positive_float(raw: str) -> float:
+    try:
+        value = float(raw)
+    except ValueError:
+        value = 0.0
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"se espera un numero > 0 (no {raw})")
+    return value
+
+
+def cmd_preview(args: argparse.Namespace) -> None:
+    scenario = scenario_overrides(Path(args.variants), args.variant) if args.variant else {}
+    started = time.perf_counter()
+    plan = compile_plan(scenario)
+    if args.times:
+        names = [f"t={t:.1f}s" for t in args.times]
+        times = args.times
+    elif args.every:
+        times = list(np.arange(0.0, plan.duration, args.every)) + [plan.duration]
+        names = [f"t={t:.1f}s" for t in times]
+    else:
+        frames = keyframes(plan)
+        names = [frame.name for frame in frames]
+        times = [frame.time for frame in frames]
+    sheet, overlaps = contact_sheet(plan, times, columns=args.columns, tile_width=args.tile_width)
+    output = Path(args.output)
+    write_png(output, sheet)
+    for idx, (name, t, pairs) in enumerate(zip(names, times, overlaps)):
+        warn = "  SOLAPE: " + ", ".join(f"{a}/{b}" for a, b in pairs) if pairs else ""
+        print(f"[{idx:>2}] {name:<26} t={t:7.2f}s{warn}")
+    print(f"OK: {output.as_posix()} ({len(times)} cuadros) en {time.perf_counter() - started:.2f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="preview_wireframe.py",
+        description="Draw the scene plan as a NumPy wireframe contact sheet (layout check without Cairo/ffmpeg)",
+    )
+    p.add_argument("-o", "--output", default="media/preview/contact_sheet.png")
+    p.add_argument("--times", type=_parse_times, help="Comma separated seconds (default: snapshot keyframes)")
+    p.add_argument("--every", type=_positive_float, help="One frame every N seconds")
+    p.add_argument("--columns", type=_positive_int, default=4)
+    p.add_argument("--tile-width", type=_positive_int, default=320)
+    p.add_argument("--variant", help="Scenario name from the variants catalog")
+    p.add_argument("--variants", default="variants.yaml")
+    p.set_defaults(func=cmd_preview)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import time
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from typing import Any
+
+import av
+import numpy as np
+from manim import config
+from manim.renderer.cairo_renderer import CairoRenderer
+from manim.scene.scene_file_writer import SceneFileWriter, to_av_frame_rate
+
+from captions import write_sidecar
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, load_scene_class
+from scene_plan import compile_plan
+
+
+# Entregables del README: 1080p MP4, 4K MP4 y 1080p WebM.
+DEFAULT_OUTPUTS = ["1920x1080:mp4", "3840x2160:mp4", "1920x1080:webm"]
+CODECS = {
+    "mp4": ("libx264", {"crf": "23"}),
+    "webm": ("libvpx-vp9", {"crf": "32", "b": "0", "auto-alt-ref": "1"}),
+}
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    width: int
+    height: int
+    fmt: str
+
+    @property
+    def area(self) -> int:
+        return self.width * self.height
+
+
+def parse_output(raw: str) -> OutputSpec:
+    size, _, fmt = raw.partition(":")
+    fmt = (fmt or "mp4").strip().lower()
+    if fmt not in CODECS:
+        raise argparse.ArgumentTypeError(f"formato no soportado: {fmt} (usa {', '.join(CODECS)})")
+    parts = size.replace(",", "x").lower().split("x")
+    if len(parts) != 2:
+        raise argparse.ArgumentTypeError(f"resolucion invalida: {size} (ej: 1920x1080)")
+    try:
+        width, height = int(parts[0]), int(parts[1])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"resolucion invalida: {size} (ej: 1920x1080)") from None
+    if width <= 0 or height <= 0 or width % 2 or height % 2:
+        raise argparse.ArgumentTypeError(f"resolucion invalida: {size} (ancho/alto pares)")
+    return OutputSpec(width, height, fmt)
+
+
+def output_path(media_dir: Path, scene_file: Path, scene_name: str, spec: OutputSpec, fps: int) -> Path:
+    # Misma estructura que manim: media/videos/<modulo>/<alto>p<fps>/<Escena>.<ext>
+    return media_dir / "videos" / scene_file.stem / f"{spec.height}p{fps}" / f"{scene_name}.{spec.fmt}"
+
+
+class FrameEncoder:
+    # Un encoder por entregable; corre en su propio hilo (PyAV libera el GIL al
+    # escalar y codificar) y recibe los frames por una cola acotada.
+    def __init__(self, spec: OutputSpec, path: Path, fps: int, queue_size: int) -> None:
+        self.spec = spec
+        self.path = path
+        self.frames = 0
+        self.error: BaseException | None = None
+        self._closed = False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        codec, options = CODECS[spec.fmt]
+        self.container = av.open(str(path), mode="w")
+        self.stream = self.container.add_stream(codec, rate=to_av_frame_rate(fps), options=dict(options))
+        self.stream.pix_fmt = "yuv420p"
+        self.stream.width = spec.width
+        self.stream.height = spec.height
+        self.queue: Queue[tuple[int, np.ndarray | None]] = Queue(maxsize=queue_size)
+        self.thread = Thread(target=self._run, name=f"encoder-{path.name}", daemon=True)
+        self.thread.start()
+
+    def put(self, frame: np.ndarray, num_frames: int) -> None:
+        self.queue.put((num_frames, frame))
+
+    def _scale(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        if (width, height) == (self.spec.width, self.spec.height):
+            return frame
+        src = av.VideoFrame.from_ndarray(frame, format="rgba")
+        return src.reformat(width=self.spec.width, height=self.spec.height, interpolation="AREA").to_ndarray()
+
+    def _run(self) -> None:
+        while True:
+            num_frames, frame = self.queue.get()
+            if frame is None:
+                break
+            if self.error is not None:
+                continue
+            try:
+                scaled = self._scale(frame)
+                for _ in range(num_frames):
+                    # Igual que manim: no se reutiliza el VideoFrame entre encodes.
+                    av_frame = av.VideoFrame.from_ndarray(scaled, format="rgba")
+                    for packet in self.stream.encode(av_frame):
+                        self.container.mux(packet)
+                    self.frames += 1
+            except BaseException as exc:
+                self.error = exc
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put((0, None))
+        self.thread.join()
+        try:
+            if self.error is None:
+                for packet in self.stream.encode():
+                    self.container.mux(packet)
+        finally:
+            self.container.close()
+        if self.error is not None:
+            raise RuntimeError(f"encoder {self.path.as_posix()} fallo: {self.error}") from self.error
+
+
+class FanOutFileWriter(SceneFileWriter):
+    # Reemplaza los partial movie files de manim: cada frame rasterizado se
+    # reparte a todos los encoders, sin volver a ejecutar `construct`.
+    def __init__(self, renderer: Any, scene_name: str, encoders: list[FrameEncoder], **kwargs: Any) -> None:
+        self.encoders = encoders
+        super().__init__(renderer, scene_name, **kwargs)
+
+    def write_frame(self, frame_or_renderer: Any, num_frames: int = 1) -> None:
+        frame = frame_or_renderer if isinstance(frame_or_renderer, np.ndarray) else frame_or_renderer.get_frame()
+        for encoder in self.encoders:
+            encoder.put(frame, num_frames)
+
+    def finish(self) -> None:
+        close_encoders(self.encoders)
+
+
+def close_encoders(encoders: list[FrameEncoder]) -> None:
+    errors: list[str] = []
+    for encoder in encoders:
+        try:
+            encoder.close()
+        except RuntimeError as exc:
+            errors.append(str(exc))
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+
+def render_multi(
+    *,
+    scene_file: Path,
+    scene_name: str,
+    outputs: list[OutputSpec],
+    fps: int,
+    media_dir: Path,
+    queue_size: int = 8,
+) -> list[Path]:
+    if not outputs:
+        raise ValueError("se requiere al menos un output")
+    source = max(outputs, key=lambda spec: spec.area)
+    for spec in outputs:
+        if spec.width * source.height != spec.height * source.width:
+            raise ValueError(
+                f"{spec.width}x{spec.height} no tiene la misma relacion de aspecto que {source.width}x{source.height}"
+            )
+
+    # Se rasteriza una sola vez, a la resolucion mas alta pedida.
+    config.media_dir = str(media_dir)
+    config.input_file = str(scene_file)
+    config.pixel_width = source.width
+    config.pixel_height = source.height
+    config.frame_rate = fps
+    config.write_to_movie = False
+    config.disable_caching = True
+    config.preview = False
+
+    scene_cls = load_scene_class(scene_file, scene_name)
+    paths = [output_path(media_dir, scene_file, scene_name, spec, fps) for spec in outputs]
+    encoders: list[FrameEncoder] = []
+    try:
+        for spec, path in zip(outputs, paths):
+            encoders.append(FrameEncoder(spec, path, fps, queue_size))
+        renderer = CairoRenderer(file_writer_class=partial(FanOutFileWriter, encoders=encoders))
+        scene = scene_cls(renderer=renderer)
+        scene.render()
+    finally:
+        # Idempotente: si `construct` falla igual se cierran los contenedores.
+        close_encoders(encoders)
+    # FanOutFileWriter no tiene movie_file_path: los captions se escriben junto a cada output.
+    plan = compile_plan(getattr(scene_cls, "scenario", None))
+    for path in paths:
+        write_sidecar(plan, path)
+    return paths
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    outputs = args.output or [parse_output(raw) for raw in DEFAULT_OUTPUTS]
+    started = time.perf_counter()
+    paths = render_multi(
+        scene_file=Path(args.scene_file),
+        scene_name=args.scene_name,
+        outputs=outputs,
+        fps=args.fps,
+        media_dir=Path(args.media_dir),
+        queue_size=args.queue_size,
+    )
+    elapsed = time.perf_counter() - started
+    for path in paths:
+        print(f"OK: {path.as_posix()}")
+    print(f"OK: {len(paths)} outputs en {elapsed:.1f}s (una sola rasterizacion)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="render_multi.py",
+        description="Render once at the highest resolution and encode several outputs in parallel",
+    )
+    p.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p.add_argument(
+        "-o",
+        "--output",
+        action="append",
+        type=parse_output,
+        help="WIDTHxHEIGHT:FORMAT (mp4/webm), repeatable. Default: " + " ".join(DEFAULT_OUTPUTS),
+    )
+    p.add_argument("--fps", type=int, default=60)
+    p.add_argument("--media-dir", default="media")
+    p.add_argument("--queue-size", type=int, default=8, help="Frames buffered per encoder")
+    p.set_defaults(func=cmd_render)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
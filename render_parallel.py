@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from captions import caption_format, write_sidecar
+from render_variants import quality_config, warm_caches
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES, load_scene_class
+from scene_plan import compile_plan
+
+
+# Render paralelo por frames: la escena se parte en chunks de frames contiguos
+# (plays cortos agrupados; los LaggedStart largos partidos en tramos) y cada
+# worker rasteriza solo su chunk. Para llegar al estado del inicio del chunk el
+# worker repite construct saltando los play anteriores (como `manim -n`) y, dentro
+# de un play partido, salta directo al primer frame del tramo: las animaciones de
+# la escena son funciones del tiempo (MoveAlongPath/Create/FadeOut con alpha y
+# always_redraw sin dt), asi que no hace falta recorrer los frames previos.
+# Cada chunk se codifica a un segmento y al final se concatenan en orden sin
+# recodificar, igual que manim une sus partial movie files.
+CHUNKS_PER_WORKER = 3
+MIN_CHUNK_FRAMES = 24
+CHUNK_DIR = Path("parallel")
+
+
+@dataclass(frozen=True)
+class Chunk:
+    index: int
+    first_play: int
+    last_play: int
+    frames: int
+    start_time: float  # renderer.time al primer frame, igual que en el render secuencial
+    frame_from: int = 0  # tramo dentro de first_play (solo si first_play == last_play)
+    frame_to: int | None = None
+
+    @property
+    def sliced(self) -> bool:
+        return self.frame_from > 0 or self.frame_to is not None
+
+
+# Con captions la escena no crea esos Text y los reemplaza por self.wait() de igual duracion.
+CAPTION_WAITS = {"timeline_event", "milestone_title", "milestone_subtitle"}
+
+
+def unsliceable_plays(plan: Any) -> set[int]:
+    # Un Wait estatico no pasa por get_time_progression (manim congela el frame y
+    # escribe la espera completa): recortarlo repetiria sus frames en cada tramo.
+    names = {"wait"} | (CAPTION_WAITS if caption_format(plan.scenario.get("captions")) else set())
+    return {step.index for step in plan.steps if step.name in names}
+
+
+def plan_chunks(
+    frame_counts: list[int],
+    fps: float,
+    workers: int,
+    chunk_frames: int = 0,
+    atomic: set[int] | None = None,
+) -> list[Chunk]:
+    total = sum(frame_counts)
+    target = chunk_frames or max(MIN_CHUNK_FRAMES, math.ceil(total / max(1, workers * CHUNKS_PER_WORKER)))
+    chunks: list[Chunk] = []
+    elapsed = 0
+    group: list[int] = []
+
+    def add(first: int, last: int, frames: int, start: int, frame_from: int = 0, frame_to: int | None = None) -> None:
+        chunks.append(Chunk(len(chunks), first, last, frames, start / fps, frame_from, frame_to))
+
+    def flush() -> None:
+        if group:
+            frames = sum(frame_counts[i] for i in group)
+            add(group[0], group[-1], frames, elapsed - frames)
+            group.clear()
+
+    for play, frames in enumerate(frame_counts):
+        if frames > target and play not in (atomic or ()):
+            flush()
+            slices = math.ceil(frames / target)
+            bounds = [round(frames * k / slices) for k in range(slices + 1)]
+            for k in range(slices):
+                # El ultimo tramo queda abierto: cubre el play completo aunque manim cuente un frame mas.
+                frame_to = bounds[k + 1] if k + 1 < slices else None
+                add(play, play, bounds[k + 1] - bounds[k], elapsed + bounds[k], bounds[k], frame_to)
+            elapsed += frames
+            continue
+        if group and sum(frame_counts[i] for i in group) + frames > target:
+            flush()
+        group.append(play)
+        elapsed += frames
+    flush()
+    return chunks
+
+
+class _Progression:
+    # Lo minimo que play_internal usa del tqdm de manim.
+    def __init__(self, times: Any) -> None:
+        self.times = times
+
+    def __iter__(self):
+        return iter(self.times)
+
+    def close(self) -> None:
+        pass
+
+
+def _restrict_to_chunk(scene: Any, chunk: Chunk, fps: float) -> None:
+    import numpy as np
+
+    original = scene.get_time_progression
+
+    def get_time_progression(run_time, description, n_iterations=None, override_skip_animations=False):
+        progression = original(run_time, description, n_iterations, override_skip_animations)
+        renderer = scene.renderer
+        if renderer.skip_animations or renderer.num_plays != chunk.first_play:
+            return progression
+        progression.close()
+        # Tiempo de escena exacto (los play saltados suman su duracion, no sus frames)
+        # para que los updaters que leen self.time dibujen lo mismo que en secuencial.
+        renderer.time = chunk.start_time
+        times = np.arange(0, run_time, 1 / fps)[chunk.frame_from : chunk.frame_to]
+        return _Progression(times)
+
+    scene.get_time_progression = get_time_progression
+
+
+def render_chunk(
+    scene_file: str,
+    scene_name: str,
+    chunk: Chunk,
+    quality: str,
+    media_dir: str,
+    out_dir: str,
+) -> dict[str, Any]:
+    from manim import tempconfig
+    from manim.renderer.cairo_renderer import CairoRenderer
+
+    from render_multi import FanOutFileWriter, FrameEncoder, OutputSpec
+
+    scene_cls = load_scene_class(Path(scene_file), scene_name)
+    width, height, fps = QUALITY_SIZES[quality]
+    path = Path(out_dir) / f"chunk-{chunk.index:04d}.mp4"
+    temp = quality_config(quality, media_dir) | {
+        "input_file": scene_file,
+        "from_animation_number": chunk.first_play,
+        "upto_animation_number": chunk.last_play,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+        "progress_bar": "none",
+    }
+    started = time.perf_counter()
+    with tempconfig(temp):
+        encoder = FrameEncoder(OutputSpec(width, height, "mp4"), path, fps, queue_size=8)
+        try:
+            renderer = CairoRenderer(file_writer_class=partial(FanOutFileWriter, encoders=[encoder]))
+            scene = scene_cls(renderer=renderer)
+            _restrict_to_chunk(scene, chunk, fps)
+            scene.render()
+        finally:
+            encoder.close()
+    return {
+        "index": chunk.index,
+        "path": str(path),
+        "frames": encoder.frames,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def concat_segments(paths: list[Path], output: Path) -> None:
+    import av
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    file_list = paths[0].parent / "segments.txt"
+    file_list.write_text("".join(f"file 'file:{p.absolute().as_posix()}'\n" for p in paths), encoding="utf-8")
+    source = av.open(str(file_list), options={"safe": "0", "an": "1"}, format="concat")
+    target = av.open(str(output), mode="w")
+    try:
+        stream = source.streams.video[0]
+        out_stream = target.add_stream(template=stream)
+        for packet in source.demux(stream):
+            if packet.dts is None:
+                continue
+            # Los segmentos empiezan en 0: libav recalcula dts al concatenar.
+            packet.dts = None
+            packet.stream = out_stream
+            target.mux(packet)
+    finally:
+        source.close()
+        target.close()
+
+
+def render_parallel(
+    *,
+    scene_file: str,
+    scene_name: str,
+    quality: str,
+    media_dir: str,
+    workers: int,
+    chunk_frames: int = 0,
+    keep_chunks: bool = False,
+) -> dict[str, Any]:
+    from render_multi import OutputSpec, output_path
+
+    warm_caches([scene_file], media_dir)
+    scene_cls = load_scene_class(Path(scene_file), scene_name)
+    width, height, fps = QUALITY_SIZES[quality]
+    plan = compile_plan(getattr(scene_cls, "scenario", None))
+    chunks = plan_chunks(plan.frame_counts(fps), fps, workers, chunk_frames, unsliceable_plays(plan))
+    out_dir = Path(media_dir) / CHUNK_DIR / Path(scene_file).stem / quality
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    started = time.perf_counter()
+    args = (quality, media_dir, str(out_dir))
+    results: dict[int, dict[str, Any]] = {}
+    # Los chunks mas largos primero para que ningun worker quede al final con uno grande.
+    pending = sorted(chunks, key=lambda chunk: chunk.frames, reverse=True)
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_caches, initargs=([scene_file], media_dir)) as pool:
+        futures = [pool.submit(render_chunk, scene_file, scene_name, chunk, *args) for chunk in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            results[result["index"]] = result
+    rendered = time.perf_counter() - started
+
+    output = output_path(Path(media_dir), Path(scene_file), scene_name, OutputSpec(width, height, "mp4"), fps)
+    concat_segments([Path(results[chunk.index]["path"]) for chunk in chunks], output)
+    write_sidecar(plan, output)
+    if not keep_chunks:
+        shutil.rmtree(out_dir)
+    return {
+        "output": output,
+        "chunks": len(chunks),
+        "frames": sum(result["frames"] for result in results.values()),
+        "planned_frames": sum(chunk.frames for chunk in chunks),
+        "render_seconds": rendered,
+        "worker_seconds": sum(result["seconds"] for result in results.values()),
+        "total_seconds": time.perf_counter() - started,
+    }
+
+
+def cmd_chunks(args: argparse.Namespace) -> None:
+    fps = QUALITY_SIZES[args.quality][2]
+    plan = compile_plan(None)
+    workers = args.workers or os.cpu_count() or 1
+    chunks = plan_chunks(plan.frame_counts(fps), fps, workers, args.chunk_frames, unsliceable_plays(plan))
+    for chunk in chunks:
+        plays = f"{chunk.first_play}" if chunk.first_play == chunk.last_play else f"{chunk.first_play}-{chunk.last_play}"
+        names = plan.steps[chunk.first_play].name if chunk.first_play == chunk.last_play else f"{chunk.last_play - chunk.first_play + 1} plays"
+        part = f"  frames {chunk.frame_from}-{'fin' if chunk.frame_to is None else chunk.frame_to}" if chunk.sliced else ""
+        print(f"chunk {chunk.index:>3}  play {plays:<8} {chunk.frames:>5} frames  t={chunk.start_time:7.2f}s  {names}{part}")
+    print(f"OK: {len(chunks)} chunks para {workers} worker(s), {sum(c.frames for c in chunks)} frames a {fps} fps")
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    workers = args.workers or os.cpu_count() or 1
+    result = render_parallel(
+        scene_file=args.scene_file,
+        scene_name=args.scene_name,
+        quality=args.quality,
+        media_dir=args.media_dir,
+        workers=workers,
+        chunk_frames=args.chunk_frames,
+        keep_chunks=args.keep_chunks,
+    )
+    if result["frames"] != result["planned_frames"]:
+        print(f"AVISO: {result['frames']} frames renderizados, el plan esperaba {result['planned_frames']}")
+    print(
+        f"OK: {result['output'].as_posix()}: {result['frames']} frames en {result['chunks']} chunks, "
+        f"{result['render_seconds']:.1f}s con {workers} proceso(s) ({result['worker_seconds']:.1f}s de CPU en workers)"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="render_parallel.py",
+        description="Render the scene with frame ranges (even within one long play) spread across worker processes",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def add_common(parser: argparse.ArgumentParser) -> None:
+        parser.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+        parser.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (0 = one per core)")
+        parser.add_argument("--chunk-frames", type=int, default=0, help="Frames per chunk (0 = total / (3 x workers))")
+
+    p_chunks = sub.add_parser("chunks", help="Show how plays are grouped and split into chunks (no manim)")
+    add_common(p_chunks)
+    p_chunks.set_defaults(func=cmd_chunks)
+
+    p_render = sub.add_parser("render", help="Render chunks in parallel and concatenate them in order")
+    p_render.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p_render.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    add_common(p_render)
+    p_render.add_argument("--media-dir", default="media")
+    p_render.add_argument("--keep-chunks", action="store_true", help="Keep per-chunk segments in media/parallel/")
+    p_render.set_defaults(func=cmd_render)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
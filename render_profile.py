@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Callable
+
+from render_variants import quality_config, scenario_overrides
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES, load_scene_class
+from scene_plan import compile_plan
+
+
+# Profiling opt-in de un render real: se envuelven (solo en esta instancia) los
+# puntos del loop de manim para repartir el tiempo de cada self.play/self.wait:
+#   animations = update_to_time - updaters (interpolate, MoveAlongPath, Create)
+#   updaters   = Scene.update_mobjects (always_redraw, ValueTracker)
+#   camera     = CairoRenderer.update_frame (rasterizado Cairo)
+#   writer     = SceneFileWriter.write_frame (pipe al encoder)
+#   setup      = construct entre plays (creacion de Text, layout)
+# `text` es el tiempo dentro de Text.__init__ y se solapa con setup/updaters.
+BUCKETS = ["setup", "animations", "updaters", "camera", "writer", "text"]
+
+
+class RenderProfiler:
+    def __init__(self, scene: Any, step_names: list[str], memory: bool) -> None:
+        self.scene = scene
+        self.step_names = step_names
+        self.memory = memory
+        self.records: list[dict[str, Any]] = []
+        self.current: dict[str, float] = defaultdict(float)
+        self.frames = 0
+        self.last_end = time.perf_counter()
+        self._restore: list[Callable[[], None]] = []
+
+    def _timed(self, bucket: str, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.current[bucket] += time.perf_counter() - started
+
+        return wrapper
+
+    def _patch(self, obj: Any, name: str, wrapper: Callable) -> None:
+        had_own = name in vars(obj)
+        original = vars(obj).get(name)
+        setattr(obj, name, wrapper)
+        self._restore.append(lambda: setattr(obj, name, original) if had_own else delattr(obj, name))
+
+    def install(self) -> None:
+        from manim import Text
+
+        scene = self.scene
+        renderer = scene.renderer
+        writer = renderer.file_writer
+        self._patch(scene, "update_to_time", self._timed("step", scene.update_to_time))
+        self._patch(scene, "update_mobjects", self._timed("updaters", scene.update_mobjects))
+        self._patch(renderer, "update_frame", self._timed("camera", renderer.update_frame))
+        original_write = writer.write_frame
+
+        def write_frame(frame, num_frames: int = 1):
+            self.frames += num_frames
+            return original_write(frame, num_frames)
+
+        self._patch(writer, "write_frame", self._timed("writer", write_frame))
+        self._patch(renderer, "play", self._profiled_play(renderer.play))
+        # Text se instancia tambien dentro de always_redraw, por eso se mide a nivel de clase.
+        self._patch(Text, "__init__", self._timed("text", Text.__init__))
+        if self.memory:
+            tracemalloc.start()
+
+    def uninstall(self) -> None:
+        for restore in reversed(self._restore):
+            restore()
+        self._restore.clear()
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def _profiled_play(self, play: Callable) -> Callable:
+        @functools.wraps(play)
+        def wrapper(scene, *args, **kwargs):
+            renderer = scene.renderer
+            index = renderer.num_plays
+            started = time.perf_counter()
+            setup = started - self.last_end
+            text_before = self.current["text"]
+            self.current = defaultdict(float, {"text": text_before})
+            frames_before = self.frames
+            if self.memory:
+                tracemalloc.reset_peak()
+            try:
+                return play(scene, *args, **kwargs)
+            finally:
+                ended = time.perf_counter()
+                self.last_end = ended
+                sections = renderer.file_writer.sections
+                step = self.current.pop("step", 0.0)
+                record = {
+                    "kind": "play",
+                    "index": index,
+                    "name": self.step_names[index] if index < len(self.step_names) else "",
+                    "animations": "+".join(type(a).__name__ for a in args) or "Wait",
+                    "section": sections[-1].name if sections else "",
+                    "skipped": bool(renderer.skip_animations),
+                    "wall_s": round(ended - started, 4),
+                    "frames": self.frames - frames_before,
+                    "setup_s": round(setup, 4),
+                    "animations_s": round(step - self.current["updaters"], 4),
+                    "updaters_s": round(self.current["updaters"], 4),
+                    "camera_s": round(self.current["camera"], 4),
+                    "writer_s": round(self.current["writer"], 4),
+                    "text_s": round(self.current["text"], 4),
+                    "mobjects": len(scene.mobjects),
+                    "family": sum(len(m.get_family()) for m in scene.mobjects),
+                }
+                if self.memory:
+                    record["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                self.records.append(record)
+                self.current = defaultdict(float)
+
+        return wrapper
+
+
+def summarize(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    # Un registro por hito (seccion) + total, en el mismo orden en que se renderizaron.
+    groups: dict[str, list[dict[str, Any]]] = {}
+    for record in records:
+        groups.setdefault(record["section"], []).append(record)
+    groups["total"] = records
+    summary = []
+    for section, items in groups.items():
+        row: dict[str, Any] = {"kind": "milestone" if section != "total" else "total", "section": section}
+        row["plays"] = len(items)
+        row["frames"] = sum(r["frames"] for r in items)
+        for key in ["wall_s", *(f"{b}_s" for b in BUCKETS)]:
+            row[key] = round(sum(r[key] for r in items), 3)
+        if items and "peak_mb" in items[0]:
+            row["peak_mb"] = max(r["peak_mb"] for r in items)
+        summary.append(row)
+    return summary
+
+
+def print_table(records: list[dict[str, Any]], summary: list[dict[str, Any]], top: int) -> None:
+    cols = ["wall_s", *(f"{b}_s" for b in BUCKETS)]
+    header = f"{'':<28}{'frames':>7}" + "".join(f"{c[:-2]:>11}" for c in cols) + f"{'peak MB':>9}"
+    print(header)
+    for row in summary:
+        peak = f"{row['peak_mb']:>9.1f}" if "peak_mb" in row else f"{'-':>9}"
+        print(f"{row['section']:<28}{row['frames']:>7}" + "".join(f"{row[c]:>11.2f}" for c in cols) + peak)
+    print()
+    print(f"Top {top} plays por tiempo:")
+    for r in sorted(records, key=lambda r: r["wall_s"], reverse=True)[:top]:
+        label = f"#{r['index']} {r['name'] or r['animations']}"
+        peak = f"{r['peak_mb']:>9.1f}" if "peak_mb" in r else f"{'-':>9}"
+        print(f"{label[:28]:<28}{r['frames']:>7}" + "".join(f"{r[c]:>11.2f}" for c in cols) + peak)
+
+
+def profile_render(
+    scene_file: Path,
+    scene_name: str,
+    *,
+    scenario: dict[str, Any] | None,
+    quality: str,
+    media_dir: str,
+    memory: bool,
+    cache: bool,
+) -> list[dict[str, Any]]:
+    from manim import tempconfig
+
+    scene_cls = load_scene_class(scene_file, scene_name)
+    attrs = {"scenario": scenario} if scenario else {}
+    profiled_cls = type(scene_cls.__name__, (scene_cls,), attrs)
+    step_names = [step.name for step in compile_plan(profiled_cls.scenario).steps]
+    temp = quality_config(quality, media_dir) | {
+        "input_file": str(scene_file),
+        "output_file": f"{scene_name}.profile",
+        "disable_caching": not cache,
+    }
+    with tempconfig(temp):
+        scene = profiled_cls()
+        profiler = RenderProfiler(scene, step_names, memory)
+        profiler.install()
+        try:
+            scene.render()
+        finally:
+            profiler.uninstall()
+    return profiler.records
+
+
+def cmd_profile(args: argparse.Namespace) -> None:
+    scenario = scenario_overrides(Path(args.variants), args.variant) if args.variant else None
+    started = time.perf_counter()
+    records = profile_render(
+        Path(args.scene_file),
+        args.scene_name,
+        scenario=scenario,
+        quality=args.quality,
+        media_dir=args.media_dir,
+        memory=not args.no_memory,
+        cache=args.cache,
+    )
+    summary = summarize(records)
+    output = Path(args.output or Path(args.media_dir) / "profile" / f"{args.scene_name}.{args.quality}.jsonl")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("w", encoding="utf-8") as handle:
+        for row in records + summary:
+            handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+    print_table(records, summary, args.top)
+    print(f"OK: {len(records)} plays perfilados en {time.perf_counter() - started:.1f}s -> {output.as_posix()}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="render_profile.py",
+        description="Render the scene once with per-play/per-milestone timing (updaters, camera, writer, Text) and tracemalloc peaks",
+    )
+    p.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p.add_argument("--variant", help="Scenario name from the variants catalog")
+    p.add_argument("--variants", default="variants.yaml")
+    p.add_argument("--media-dir", default="media")
+    p.add_argument("-o", "--output", help="JSONL output (default: media/profile/<Scene>.<q>.jsonl)")
+    p.add_argument("--top", type=int, default=15, help="Slowest plays to list")
+    p.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (it slows the render down)")
+    p.add_argument("--cache", action="store_true", help="Keep manim's partial movie cache (default: disabled)")
+    p.set_defaults(func=cmd_profile)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import os
+import socket
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+
+# Eventos de progreso de un render en curso (JSONL o datagramas UDP/unix).
+# Se activa con MDP_PROGRESS=<destino> sin tocar el comando de manim:
+#   media/progress/job-12.jsonl    -> append de una linea por evento
+#   udp://127.0.0.1:9555           -> datagrama por evento (sin listener no pasa nada)
+#   unix:///tmp/mdp-progress.sock  -> datagrama unix
+PROGRESS_ENV = "MDP_PROGRESS"
+PROGRESS_DIR = Path("media/progress")
+EMIT_INTERVAL = 1.0
+STALE_SECONDS = 300
+
+
+class ProgressSink:
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self._handle = None
+        self._sock = None
+        self._addr: Any = None
+        if target.startswith("udp://"):
+            host, _, port = target[len("udp://"):].rpartition(":")
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._addr = (host or "127.0.0.1", int(port))
+        elif target.startswith("unix://"):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._addr = target[len("unix://"):]
+        else:
+            path = Path(target)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = path.open("a", encoding="utf-8", buffering=1)
+
+    def emit(self, event: dict[str, Any]) -> None:
+        line = json.dumps(event, ensure_ascii=False)
+        if self._handle is not None:
+            self._handle.write(line + "\n")
+            return
+        try:
+            self._sock.sendto(line.encode("utf-8"), self._addr)
+        except OSError:
+            # Sin dashboard escuchando: el render sigue igual.
+            pass
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        if self._sock is not None:
+            self._sock.close()
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        sink: ProgressSink,
+        *,
+        scene_name: str,
+        output: str,
+        frame_counts: list[int],
+        skipped_plays: set[int],
+        interval: float = EMIT_INTERVAL,
+    ) -> None:
+        self.sink = sink
+        self.scene_name = scene_name
+        self.output = output
+        self.interval = interval
+        # Total planificado: los play de hitos saltados (render_sections) no generan frames.
+        self.planned = [0 if idx in skipped_plays else n for idx, n in enumerate(frame_counts)]
+        self.frames_total = sum(self.planned)
+        self.done_before = [sum(self.planned[:idx]) for idx in range(len(self.planned))]
+        self.started = time.monotonic()
+        self.last_emit = 0.0
+        self.play = 0
+        self.section = ""
+        self.play_frames = 0
+        self.frames_written = 0
+
+    def frames_done(self) -> int:
+        if self.play >= len(self.planned):
+            return self.frames_total
+        return self.done_before[self.play] + min(self.play_frames, self.planned[self.play])
+
+    def event(self, kind: str, **extra: Any) -> dict[str, Any]:
+        elapsed = time.monotonic() - self.started
+        done = self.frames_done()
+        rate = done / elapsed if elapsed > 0 else 0.0
+        return {
+            "event": kind,
+            "ts": datetime.now().astimezone().isoformat(timespec="seconds"),
+            "t": round(time.time(), 3),
+            "pid": os.getpid(),
+            "scene": self.scene_name,
+            "output": self.output,
+            "milestone": self.section,
+            "play": self.play,
+            "plays_total": len(self.planned),
+            "frames": done,
+            "frames_total": self.frames_total,
+            "percent": round(100.0 * done / self.frames_total, 1) if self.frames_total else 100.0,
+            "fps": round(self.frames_written / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_s": round((self.frames_total - done) / rate, 1) if rate > 0 else None,
+            "elapsed_s": round(elapsed, 1),
+        } | extra
+
+    def emit(self, kind: str, **extra: Any) -> None:
+        self.last_emit = time.monotonic()
+        self.sink.emit(self.event(kind, **extra))
+
+    def on_play_start(self, index: int, section: str) -> None:
+        self.play = index
+        self.play_frames = 0
+        if section != self.section:
+            self.section = section
+            self.emit("milestone")
+
+    def on_play_end(self, index: int) -> None:
+        # Play cacheado o saltado: no escribe frames pero cuenta como hecho.
+        self.play = index + 1
+        self.play_frames = 0
+
+    def on_frames(self, count: int) -> None:
+        self.play_frames += count
+        self.frames_written += count
+        if time.monotonic() - self.last_emit >= self.interval:
+            self.emit("progress")
+
+    def on_done(self, output: str) -> None:
+        self.play = len(self.planned)
+        self.emit("done", output=output)
+        self.sink.close()
+
+
+def attach_progress(scene: Any, plan: Any, target: str) -> ProgressReporter:
+    # Se envuelven metodos de esta instancia (renderer.play, write_frame, finish);
+    # el costo por frame es un contador y un time.monotonic().
+    from manim import config
+
+    renderer = scene.renderer
+    writer = renderer.file_writer
+    sections = getattr(scene, "render_sections", None)
+    skipped = set() if sections is None else {s.index for s in plan.steps if s.section not in sections}
+    reporter = ProgressReporter(
+        ProgressSink(target),
+        scene_name=type(scene).__name__,
+        output=str(getattr(writer, "movie_file_path", "") or ""),
+        frame_counts=plan.frame_counts(config.frame_rate),
+        skipped_plays=skipped,
+    )
+    original_play: Callable = renderer.play
+    original_write: Callable = writer.write_frame
+    original_finish: Callable = writer.finish
+
+    @functools.wraps(original_play)
+    def play(scene_, *args, **kwargs):
+        index = renderer.num_plays
+        reporter.on_play_start(index, writer.sections[-1].name if writer.sections else "")
+        try:
+            return original_play(scene_, *args, **kwargs)
+        finally:
+            reporter.on_play_end(index)
+
+    @functools.wraps(original_write)
+    def write_frame(frame, num_frames: int = 1):
+        result = original_write(frame, num_frames)
+        reporter.on_frames(num_frames)
+        return result
+
+    @functools.wraps(original_finish)
+    def finish(*args, **kwargs):
+        result = original_finish(*args, **kwargs)
+        reporter.on_done(str(getattr(writer, "movie_file_path", "") or ""))
+        return result
+
+    renderer.play = play
+    writer.write_frame = write_frame
+    writer.finish = finish
+    reporter.emit("start")
+    return reporter
+
+
+def attach_progress_from_env(scene: Any, plan: Any) -> ProgressReporter | None:
+    target = os.environ.get(PROGRESS_ENV, "").strip()
+    if not target:
+        return None
+    return attach_progress(scene, plan, target)
+
+
+def read_last_event(path: Path) -> dict[str, Any] | None:
+    # Solo el final del archivo: el JSONL de un render 4K puede tener miles de lineas.
+    try:
+        with path.open("rb") as handle:
+            handle.seek(0, os.SEEK_END)
+            size = handle.tell()
+            handle.seek(max(0, size - 4096))
+            lines = handle.read().decode("utf-8", errors="replace").strip().splitlines()
+    except FileNotFoundError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def render_status(event: dict[str, Any], now: float | None = None) -> str:
+    if event.get("event") == "done":
+        return "done"
+    now = time.time() if now is None else now
+    return "stale" if now - float(event.get("t") or 0) > STALE_SECONDS else "running"
+
+
+def latest_events(progress_dir: Path = PROGRESS_DIR) -> list[dict[str, Any]]:
+    events = []
+    for path in sorted(progress_dir.glob("*.jsonl")):
+        event = read_last_event(path)
+        if event:
+            events.append(event | {"source": path.name, "status": render_status(event)})
+    events.sort(key=lambda e: float(e.get("t") or 0), reverse=True)
+    return events
+
+
+def format_event(event: dict[str, Any]) -> str:
+    eta = event.get("eta_s")
+    eta_text = f"ETA {eta:.0f}s" if isinstance(eta, (int, float)) else "ETA -"
+    return (
+        f"{event.get('status', event.get('event', '')):<8} {event.get('percent', 0):5.1f}%  "
+        f"{event.get('frames', 0)}/{event.get('frames_total', 0)} frames  {event.get('fps', 0):.1f} fps  "
+        f"{eta_text}  {event.get('milestone', '')}  {event.get('output', '')}"
+    )
+
+
+def cmd_status(args: argparse.Namespace) -> None:
+    while True:
+        events = latest_events(Path(args.dir))
+        for event in events:
+            print(f"{event['source']:<24} {format_event(event)}")
+        if not events:
+            print(f"Sin renders en {Path(args.dir).as_posix()}")
+        if not args.follow:
+            return
+        time.sleep(args.interval)
+        print()
+
+
+def cmd_listen(args: argparse.Namespace) -> None:
+    if args.target.startswith("unix://"):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        path = args.target[len("unix://"):]
+        Path(path).unlink(missing_ok=True)
+        sock.bind(path)
+    else:
+        host, _, port = args.target[len("udp://"):].rpartition(":")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((host or "127.0.0.1", int(port)))
+    print(f"Escuchando {args.target} (Ctrl+C para salir)")
+    try:
+        while True:
+            data, _ = sock.recvfrom(65536)
+            event = json.loads(data.decode("utf-8"))
+            print(f"{event.get('scene', ''):<24} {format_event(event | {'status': event.get('event')})}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="render_progress.py",
+        description=f"Show live render progress events (renders emit them when {PROGRESS_ENV} is set)",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_status = sub.add_parser("status", help="Latest event of each JSONL progress file")
+    p_status.add_argument("--dir", default=str(PROGRESS_DIR))
+    p_status.add_argument("-f", "--follow", action="store_true")
+    p_status.add_argument("--interval", type=float, default=2.0)
+    p_status.set_defaults(func=cmd_status)
+
+    p_listen = sub.add_parser("listen", help="Print events received on a UDP/unix datagram socket")
+    p_listen.add_argument("target", nargs="?", default="udp://127.0.0.1:9555")
+    p_listen.set_defaults(func=cmd_listen)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
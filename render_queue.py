@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import getpass
+import hashlib
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from changelog import ChangelogWriter
+from render_progress import PROGRESS_ENV, format_event, read_last_event, render_status
+from render_variants import load_variants
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES
+
+
+# Drafts (-ql/-qm) salen antes que los finales.
+DRAFT_QUALITIES = {"l", "m"}
+PRIORITY_DRAFT = 0
+PRIORITY_FINAL = 1
+# Estimacion gruesa de RSS por render (Cairo + encoder + escena) segun alto en pixeles.
+JOB_MEMORY_MB = [(480, 700), (1080, 1200), (1440, 1800), (2160, 2600)]
+CONFIG_INPUTS = ["scene_plan.py", "cronos.yaml", "archMDP-ASIS.yaml"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    input_hash TEXT NOT NULL UNIQUE,
+    scene_file TEXT NOT NULL,
+    scene_name TEXT NOT NULL,
+    variant TEXT NOT NULL DEFAULT '',
+    variants_file TEXT NOT NULL DEFAULT '',
+    quality TEXT NOT NULL,
+    resolution TEXT NOT NULL DEFAULT '',
+    format TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    requested_by TEXT NOT NULL DEFAULT '',
+    requests INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    finished_at TEXT,
+    output TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority, id);
+"""
+
+
+@dataclass
+class Job:
+    id: int
+    input_hash: str
+    scene_file: str
+    scene_name: str
+    variant: str
+    variants_file: str
+    quality: str
+    resolution: str
+    format: str
+    priority: int
+    status: str
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Job:
+        return cls(**{name: row[name] for name in cls.__dataclass_fields__})
+
+
+def _now() -> str:
+    return datetime.now().astimezone().isoformat(timespec="seconds")
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _variant_entry(variants_file: str, variant: str) -> dict[str, Any]:
+    if not variant:
+        return {}
+    for item in load_variants(Path(variants_file)):
+        if item["name"] == variant:
+            return item
+    raise SystemExit(f"Variante no encontrada en {variants_file}: {variant}")
+
+
+def input_hash(
+    *,
+    scene_file: str,
+    scene_name: str,
+    variant: str,
+    variants_file: str,
+    quality: str,
+    resolution: str,
+    fmt: str,
+) -> str:
+    # Mismo script + mismos YAML + misma variante/resolucion/formato = mismo video.
+    h = hashlib.sha256()
+    h.update(Path(scene_file).read_bytes())
+    entry = _variant_entry(variants_file, variant)
+    config_inputs = list(CONFIG_INPUTS)
+    for key in ("timeline_path", "visual_path"):
+        if entry.get(key):
+            config_inputs.append(str(entry[key]))
+    for name in config_inputs:
+        path = Path(name)
+        h.update(name.encode("utf-8"))
+        h.update(path.read_bytes() if path.exists() else b"")
+    params = {
+        "scene_name": scene_name,
+        "variant": entry,
+        "quality": quality,
+        "resolution": resolution,
+        "format": fmt,
+    }
+    h.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def submit(
+    conn: sqlite3.Connection,
+    *,
+    scene_file: str,
+    scene_name: str,
+    variant: str,
+    variants_file: str,
+    quality: str,
+    resolution: str,
+    fmt: str,
+    requested_by: str,
+) -> tuple[int, str]:
+    digest = input_hash(
+        scene_file=scene_file,
+        scene_name=scene_name,
+        variant=variant,
+        variants_file=variants_file,
+        quality=quality,
+        resolution=resolution,
+        fmt=fmt,
+    )
+    priority = PRIORITY_DRAFT if quality in DRAFT_QUALITIES else PRIORITY_FINAL
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT id, status FROM jobs WHERE input_hash = ?", (digest,)).fetchone()
+        if row is None:
+            cur = conn.execute(
+                "INSERT INTO jobs (input_hash, scene_file, scene_name, variant, variants_file, quality, resolution,"
+                " format, priority, status, requested_by, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)",
+                (digest, scene_file, scene_name, variant, variants_file, quality, resolution, fmt, priority,
+                 requested_by, _now()),
+            )
+            conn.execute("COMMIT")
+            return int(cur.lastrowid), "queued"
+        if row["status"] == "error":
+            # Un fallo previo no bloquea: se vuelve a encolar el mismo job.
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', requests = requests + 1, error = NULL, started_at = NULL,"
+                " finished_at = NULL WHERE id = ?",
+                (row["id"],),
+            )
+            conn.execute("COMMIT")
+            return int(row["id"]), "requeued"
+        conn.execute("UPDATE jobs SET requests = requests + 1 WHERE id = ?", (row["id"],))
+        conn.execute("COMMIT")
+        return int(row["id"]), f"dedupe ({row['status']})"
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def claim_next(conn: sqlite3.Connection) -> Job | None:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE status = 'queued' ORDER BY priority, id LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (_now(), row["id"]))
+        conn.execute("COMMIT")
+        return Job.from_row(row)
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def finish_job(conn: sqlite3.Connection, job: Job, *, ok: bool, output: str, error: str) -> None:
+    conn.execute(
+        "UPDATE jobs SET status = ?, finished_at = ?, output = ?, error = ? WHERE id = ?",
+        ("done" if ok else "error", _now(), output, error or None, job.id),
+    )
+
+
+def job_size(job: Job) -> tuple[int, int, int]:
+    width, height, fps = QUALITY_SIZES[job.quality]
+    if job.resolution:
+        width, height = (int(x) for x in job.resolution.split(","))
+    return width, height, fps
+
+
+def expected_output(job: Job, media_dir: str) -> Path:
+    _, height, fps = job_size(job)
+    name = job.variant or job.scene_name
+    return Path(media_dir) / "videos" / Path(job.scene_file).stem / f"{height}p{fps}" / f"{name}.{job.format}"
+
+
+def progress_path(job: Job, media_dir: str) -> Path:
+    return Path(media_dir) / "progress" / f"job-{job.id}.jsonl"
+
+
+def job_command(job: Job, media_dir: str) -> list[str]:
+    if job.variant:
+        cmd = [sys.executable, "render_variants.py", job.variants_file, "--only", job.variant, "-q", job.quality,
+               "--format", job.format, "--media-dir", media_dir]
+    else:
+        cmd = [sys.executable, "-m", "manim", "render", f"-q{job.quality}", "--disable_preview",
+               "--format", job.format, "--media_dir", media_dir]
+    if job.resolution:
+        cmd += ["-r", job.resolution]
+    if not job.variant:
+        cmd += [job.scene_file, job.scene_name]
+    return cmd
+
+
+def _available_memory_mb() -> int | None:
+    try:
+        for line in Path("/proc/meminfo").read_text(encoding="utf-8").splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def job_memory_mb(height: int) -> int:
+    for max_height, mb in JOB_MEMORY_MB:
+        if height <= max_height:
+            return mb
+    return JOB_MEMORY_MB[-1][1]
+
+
+def pool_size(conn: sqlite3.Connection, requested: int) -> int:
+    cores = os.cpu_count() or 1
+    if requested > 0:
+        return requested
+    # Peor caso entre los jobs pendientes: sin pasarse de cores ni de RAM disponible.
+    heights = [job_size(Job.from_row(r))[1] for r in conn.execute("SELECT * FROM jobs WHERE status = 'queued'")]
+    per_job = job_memory_mb(max(heights, default=1080))
+    available = _available_memory_mb()
+    by_memory = max(1, available // per_job) if available else cores
+    return max(1, min(cores, by_memory))
+
+
+class QueueRunner:
+    def __init__(self, db_path: Path, *, media_dir: str, log_path: Path) -> None:
+        self.db_path = db_path
+        self.media_dir = media_dir
+        self.log_path = log_path
+        # Un writer compartido por los workers: las entradas salen en group commit.
+        self.changelog = ChangelogWriter(log_path, actor="render_queue")
+        self.done = 0
+        self.failed = 0
+
+    def _log(
+        self, job: Job, cmd: list[str], ok: bool, output: str, error: str, seconds: float, version_label: str
+    ) -> None:
+        notes = f"render_queue job {job.id} ({job.quality} {job.resolution or 'default'} {job.format}) en {seconds:.1f}s"
+        if error:
+            notes += f": {error}"
+        self.changelog.log(
+            action="render",
+            version_file=job.scene_file,
+            version_label=version_label,
+            command=" ".join(cmd),
+            result="ok" if ok else "error",
+            notes=notes,
+            files_changed=[output] if ok and output else [],
+        )
+
+    def run_job(self, job: Job) -> bool:
+        started = time.perf_counter()
+        cmd: list[str] = []
+        output = ""
+        version_label = ""
+        try:
+            # La variante puede haber cambiado o desaparecido desde el submit.
+            version_label = str(_variant_entry(job.variants_file, job.variant).get("version_label") or "")
+            cmd = job_command(job, self.media_dir)
+            progress = progress_path(job, self.media_dir)
+            progress.unlink(missing_ok=True)
+            env = os.environ | {PROGRESS_ENV: str(progress)}
+            proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+            ok = proc.returncode == 0
+            error = ""
+            if ok:
+                output = expected_output(job, self.media_dir).as_posix()
+            else:
+                tail = (proc.stderr or proc.stdout or "").strip().splitlines()[-5:]
+                error = f"exit {proc.returncode}: " + " | ".join(tail)
+        except (Exception, SystemExit) as exc:
+            # Un job que no se pudo lanzar queda en error, no en 'running' hasta el --recover.
+            ok = False
+            error = f"{type(exc).__name__}: {exc}"
+        seconds = time.perf_counter() - started
+        conn = connect(self.db_path)
+        try:
+            finish_job(conn, job, ok=ok, output=output, error=error)
+        finally:
+            conn.close()
+        self._log(job, cmd, ok, output, error, seconds, version_label)
+        print(f"{'OK' if ok else 'ERROR'}: job {job.id} {job.variant or job.scene_file} ({seconds:.1f}s)")
+        return ok
+
+    def worker(self) -> None:
+        conn = connect(self.db_path)
+        try:
+            while True:
+                job = claim_next(conn)
+                if job is None:
+                    return
+                if self.run_job(job):
+                    self.done += 1
+                else:
+                    self.failed += 1
+        finally:
+            conn.close()
+
+    def drain(self, workers: int) -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(self.worker) for _ in range(workers)]
+                # Un error fuera de run_job (ej. sqlite bloqueado) no debe perderse en silencio.
+                for future in futures:
+                    future.result()
+        finally:
+            self.changelog.close()
+
+
+def cmd_submit(args: argparse.Namespace) -> None:
+    if args.variant and not Path(args.variants).exists():
+        raise SystemExit(f"No existe {args.variants}")
+    conn = connect(Path(args.db))
+    job_id, state = submit(
+        conn,
+        scene_file=args.scene_file,
+        scene_name=args.scene_name,
+        variant=args.variant or "",
+        variants_file=args.variants if args.variant else "",
+        quality=args.quality,
+        resolution=args.resolution or "",
+        fmt=args.format,
+        requested_by=args.by,
+    )
+    print(f"OK: job {job_id} {state}")
+
+
+def cmd_list(args: argparse.Namespace) -> None:
+    conn = connect(Path(args.db))
+    query = "SELECT * FROM jobs"
+    params: tuple[Any, ...] = ()
+    if args.status:
+        query += " WHERE status = ?"
+        params = (args.status,)
+    query += " ORDER BY CASE status WHEN 'running' THEN 0 WHEN 'queued' THEN 1 ELSE 2 END, priority, id"
+    for row in conn.execute(query, params):
+        target = row["variant"] or row["scene_file"]
+        print(
+            f"{row['id']:>5}  {row['status']:<8} p{row['priority']}  -q{row['quality']} "
+            f"{row['resolution'] or '-':<10} {row['format']:<5} x{row['requests']}  {target}"
+            + (f"  {row['output']}" if row["output"] else "")
+        )
+        if row["status"] == "running":
+            event = read_last_event(Path(args.media_dir) / "progress" / f"job-{row['id']}.jsonl")
+            if event:
+                print(f"       {format_event(event | {'status': render_status(event)})}")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    db_path = Path(args.db)
+    conn = connect(db_path)
+    # Jobs que quedaron 'running' por un runner caido vuelven a la cola.
+    if args.recover:
+        conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+    workers = pool_size(conn, args.workers)
+    conn.close()
+    runner = QueueRunner(db_path, media_dir=args.media_dir, log_path=Path(args.log))
+    print(f"OK: procesando cola con {workers} worker(s)")
+    runner.drain(workers)
+    print(f"OK: {runner.done} render(s) ok, {runner.failed} con error")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="render_queue.py", description="Local render job queue (SQLite)")
+    p.add_argument("--db", default="media/render_queue.sqlite")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_submit = sub.add_parser("submit", help="Queue a render (deduplicated by input hash)")
+    p_submit.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p_submit.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p_submit.add_argument("--variant", default="", help="Variant name from the variants file")
+    p_submit.add_argument("--variants", default="variants.yaml")
+    p_submit.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p_submit.add_argument("-r", "--resolution", default="", help="WIDTH,HEIGHT")
+    p_submit.add_argument("--format", default="mp4", choices=["mp4", "webm"])
+    p_submit.add_argument("--by", default=getpass.getuser())
+    p_submit.set_defaults(func=cmd_submit)
+
+    p_list = sub.add_parser("list", help="Show jobs")
+    p_list.add_argument("--status", choices=["queued", "running", "done", "error"])
+    p_list.add_argument("--media-dir", default="media")
+    p_list.set_defaults(func=cmd_list)
+
+    p_run = sub.add_parser("run", help="Drain the queue with a bounded worker pool")
+    p_run.add_argument("-j", "--workers", type=int, default=0, help="0 = sized to cores and free memory")
+    p_run.add_argument("--media-dir", default="media")
+    p_run.add_argument("--log", default="logs/CHANGELOG.log")
+    p_run.add_argument("--recover", action="store_true", help="Requeue jobs left 'running' by a dead runner")
+    p_run.set_defaults(func=cmd_run)
+
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
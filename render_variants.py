@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from scene_loader import (
+    DEFAULT_SCENE_FILE,
+    DEFAULT_SCENE_NAME,
+    QUALITY_SIZES,
+    load_scene_class,
+    load_scene_module,
+)
+from scene_plan import ScenarioError, compile_plan
+
+
+# Claves del catalogo que usa el runner; el resto se pasa a la escena como `scenario`.
+RUNNER_KEYS = {"name", "scene_file", "scene_name"}
+
+
+def load_variants(path: Path) -> list[dict[str, Any]]:
+    if not path.exists():
+        raise FileNotFoundError(f"No existe {path.as_posix()}")
+    data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    defaults = {"scene_file": DEFAULT_SCENE_FILE, "scene_name": DEFAULT_SCENE_NAME} | (data.get("defaults") or {})
+    variants: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    for idx, item in enumerate(data.get("variants") or []):
+        variant = defaults | (item or {})
+        name = str(variant.get("name") or "").strip()
+        if not name:
+            raise ValueError(f"{path.as_posix()}: variants[{idx}] sin name")
+        if name in seen:
+            raise ValueError(f"{path.as_posix()}: variante duplicada {name}")
+        seen.add(name)
+        variant["name"] = name
+        variants.append(variant)
+    if not variants:
+        raise ValueError(f"{path.as_posix()}: no hay variantes en variants")
+    return variants
+
+
+def variant_scenario(variant: dict[str, Any]) -> dict[str, Any]:
+    # Lo que recibe la escena como `scenario`: la variante sin las claves del runner.
+    return {k: v for k, v in variant.items() if k not in RUNNER_KEYS}
+
+
+def scenario_overrides(variants_file: Path, name: str) -> dict[str, Any]:
+    for variant in load_variants(Path(variants_file)):
+        if variant["name"] == name:
+            return variant_scenario(variant)
+    raise SystemExit(f"Variante no encontrada: {name}")
+
+
+def parse_resolution(raw: str) -> tuple[int, int]:
+    parts = raw.replace("x", ",").split(",")
+    if len(parts) != 2:
+        raise argparse.ArgumentTypeError(f"resolucion invalida: {raw} (ej: 1920,1080)")
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"resolucion invalida: {raw} (ej: 1920,1080)") from None
+
+
+def quality_config(
+    flag: str,
+    media_dir: str,
+    resolution: tuple[int, int] | None = None,
+    fmt: str = "mp4",
+) -> dict[str, Any]:
+    q_width, q_height, fps = QUALITY_SIZES[flag]
+    width, height = resolution or (q_width, q_height)
+    return {
+        "pixel_width": width,
+        "pixel_height": height,
+        "frame_rate": fps,
+        "format": fmt,
+        "media_dir": media_dir,
+        "preview": False,
+    }
+
+
+def warm_caches(scene_files: list[str], media_dir: str) -> None:
+    # Import de manim/escenas y fuentes de Pango se pagan una vez por proceso;
+    # los Text siguientes reutilizan el cache de SVG parseados de manim.
+    from manim import Text, config
+
+    config.media_dir = media_dir
+    for scene_file in scene_files:
+        load_scene_module(Path(scene_file))
+    Text("LBTR", font_size=9)
+
+
+def render_variant(
+    variant: dict[str, Any],
+    quality: str,
+    media_dir: str,
+    resolution: tuple[int, int] | None = None,
+    fmt: str = "mp4",
+) -> dict[str, Any]:
+    from manim import tempconfig
+
+    scene_file = Path(variant["scene_file"])
+    scene_cls = load_scene_class(scene_file, variant["scene_name"])
+    scenario = variant_scenario(variant)
+    # Mismo nombre de clase: los partial movie files quedan en la carpeta de la escena
+    # y las animaciones identicas entre variantes se reutilizan por hash.
+    variant_cls = type(scene_cls.__name__, (scene_cls,), {"scenario": scenario})
+    started = time.perf_counter()
+    temp = quality_config(quality, media_dir, resolution, fmt) | {
+        "input_file": str(scene_file),
+        "output_file": variant["name"],
+    }
+    with tempconfig(temp):
+        scene = variant_cls()
+        scene.render()
+        output = getattr(scene.renderer.file_writer, "movie_file_path", None)
+    return {
+        "name": variant["name"],
+        "output": str(output or ""),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def render_variants(
+    variants: list[dict[str, Any]],
+    *,
+    quality: str,
+    media_dir: str,
+    workers: int,
+    resolution: tuple[int, int] | None = None,
+    fmt: str = "mp4",
+) -> list[dict[str, Any]]:
+    scene_files = sorted({str(v["scene_file"]) for v in variants})
+    if workers <= 1:
+        warm_caches(scene_files, media_dir)
+        return [render_variant(v, quality, media_dir, resolution, fmt) for v in variants]
+
+    # Se calienta el proceso padre antes de crear el pool: con fork los workers
+    # heredan manim y los modulos ya importados; con spawn lo hace el initializer.
+    warm_caches(scene_files, media_dir)
+    results: list[dict[str, Any]] = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=warm_caches,
+        initargs=(scene_files, media_dir),
+    ) as pool:
+        futures = {
+            pool.submit(render_variant, v, quality, media_dir, resolution, fmt): v["name"] for v in variants
+        }
+        for future in as_completed(futures):
+            results.append(future.result())
+    order = {v["name"]: idx for idx, v in enumerate(variants)}
+    results.sort(key=lambda r: order[r["name"]])
+    return results
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    variants = load_variants(Path(args.variants))
+    if args.only:
+        wanted = set(args.only)
+        missing = wanted - {v["name"] for v in variants}
+        if missing:
+            raise SystemExit(f"Variantes no encontradas: {', '.join(sorted(missing))}")
+        variants = [v for v in variants if v["name"] in wanted]
+    # Errores de configuracion antes de importar manim o levantar workers.
+    for variant in variants:
+        try:
+            compile_plan(variant_scenario(variant))
+        except ScenarioError as exc:
+            raise SystemExit(f"{variant['name']}: {exc}") from None
+    workers = args.workers or min(len(variants), os.cpu_count() or 1)
+    started = time.perf_counter()
+    results = render_variants(
+        variants,
+        quality=args.quality,
+        media_dir=args.media_dir,
+        workers=workers,
+        resolution=args.resolution,
+        fmt=args.format,
+    )
+    for result in results:
+        print(f"OK: {result['name']} ({result['seconds']}s) -> {result['output']}")
+    print(f"OK: {len(results)} variantes en {time.perf_counter() - started:.1f}s con {workers} proceso(s)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="render_variants.py",
+        description="Render scene variants (title, milestones, topology, failures, version) in one process or a warm pool",
+    )
+    p.add_argument("variants", nargs="?", default="variants.yaml")
+    p.add_argument("--only", action="append", help="Render only this variant name (repeatable)")
+    p.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p.add_argument("-r", "--resolution", type=parse_resolution, help="WIDTH,HEIGHT (overrides the quality size)")
+    p.add_argument("--format", default="mp4", choices=["mp4", "webm"])
+    p.add_argument("-j", "--workers", type=int, default=1, help="Worker processes (0 = one per core)")
+    p.add_argument("--media-dir", default="media")
+    p.set_defaults(func=cmd_render)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
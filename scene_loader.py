@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+
+DEFAULT_SCENE_FILE = "archMDP-ASIS.py"
+DEFAULT_SCENE_NAME = "ArquitecturaMDPLBTR"
+# Flags -q de manim: (ancho, alto, fps).
+QUALITY_SIZES = {
+    "l": (854, 480, 15),
+    "m": (1280, 720, 30),
+    "h": (1920, 1080, 60),
+    "p": (2560, 1440, 60),
+    "k": (3840, 2160, 60),
+}
+
+
+def load_scene_module(scene_file: Path) -> types.ModuleType:
+    # Los scripts tienen guiones/puntos en el nombre (archMDP-ASIS.v221.py),
+    # asi que se cargan por ruta igual que lo hace `manim`.
+    scene_file = Path(scene_file)
+    if not scene_file.exists():
+        raise FileNotFoundError(f"No existe {scene_file.as_posix()}")
+    module_name = ".".join(scene_file.with_suffix("").parts)
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, scene_file)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No se pudo cargar {scene_file.as_posix()}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    parent = str(scene_file.parent.absolute())
+    if parent not in sys.path:
+        sys.path.insert(0, parent)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_scene_class(scene_file: Path, scene_name: str = DEFAULT_SCENE_NAME) -> type:
+    module = load_scene_module(scene_file)
+    scene_cls = getattr(module, scene_name, None)
+    if scene_cls is None:
+        raise AttributeError(f"{Path(scene_file).as_posix()}: no define la escena {scene_name}")
+    return scene_cls
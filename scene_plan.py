@@ -0,0 +1,1144 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+# Plan de la escena ArquitecturaMDPLBTR sin depender de manim: configuracion,
+# layout de nodos, rutas, calendario de transacciones y tiempos de cada play.
+# `construct` toma de aqui posiciones, rutas y tiempos de las transacciones;
+# `build_plan` refleja la secuencia de self.play/self.wait (mantener sincronizado).
+# No importar manim aqui: `python3 scene_plan.py validate|plan|dry-run` debe
+# partir en milisegundos (yaml tambien se importa solo si hay que parsear).
+
+Point = tuple[float, float]
+
+COLORS = {
+    "BLUE": "#58C4DD",
+    "GREEN": "#83C167",
+    "YELLOW": "#FFFF00",
+    "ORANGE": "#FF862F",
+    "PURPLE": "#9A72AC",
+    "GRAY": "#888888",
+    "RED": "#FC6255",
+    "WHITE": "#FFFFFF",
+}
+
+LEGEND = [
+    ("YELLOW", "Morande"),
+    ("ORANGE", "Longovilo"),
+    ("PURPLE", "Aconcagua"),
+    ("GRAY", "Inactivo"),
+    ("WHITE", "Intento de Pago"),
+    ("RED", "Pago Timeout"),
+    ("GREEN", "Pago Exitoso"),
+    ("WHITE", "Reset Apache"),
+]
+
+DEFAULT_SUBTITLE = "Arquitectura sin HA\ndesde marzo 2024\n hasta enero 2025\naproximadamente."
+# Titulo de hito cuando cronos.yaml no trae `title` (mismo texto en la escena y en captions.py).
+DEFAULT_MILESTONE_TITLE = "Creando Escenario"
+FALLBACK_TITLES = {2: "Bypass Apache", 3: "Falla Apache L1", 4: "RollBack F5"}
+CAPTION_FORMATS = ("vtt", "srt")
+
+MOVE_TIME = 2.0
+STUCK_MOVE_TIME = 0.6
+L1_STUCK_MOVE_TIME = 0.8
+LAG_RATIO = 0.08
+L1_STUCK_LAG_RATIO = 0.1
+TIMELINE_MOVE_TIME = 2.0
+
+STUCK_OFFSETS: list[Point] = [(-0.05, 0.12), (0.05, -0.12), (0.12, 0.05), (-0.12, -0.18)]
+TANDEM_OFFSETS: list[Point] = [(-0.05, 0.1), (0.05, -0.1), (0.1, 0.05), (-0.1, -0.15), (0.0, 0.0)]
+L1_STUCK_OFFSETS: list[Point] = [(-0.04, 0.08), (0.04, -0.08), (0.08, 0.04), (-0.08, -0.10)]
+
+# Frame de manim a 16:9 (config.frame_width/frame_height) para las vistas sin manim.
+FRAME_WIDTH = 14.222
+FRAME_HEIGHT = 8.0
+
+# Planes compilados (escenario + YAML ya validados); la clave es el hash de las entradas.
+PLAN_CACHE_DIR = Path("media/plans")
+PLAN_CACHE_KEEP = 32
+# Modulos que calculan parte del plan (schedule, f5_stuck_indices, f5_routes).
+PLAN_SOURCES = ("scene_plan.py", "incident_sim.py", "trace_reader.py")
+
+
+class ScenarioError(ValueError):
+    # Todos los problemas del escenario juntos, antes de crear la escena.
+    def __init__(self, errors: list[str]) -> None:
+        self.errors = errors
+        super().__init__("escenario invalido:\n" + "\n".join(f"  - {error}" for error in errors))
+
+
+def _read_yaml(path: Path) -> dict:
+    import yaml
+
+    try:
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as exc:
+        raise ScenarioError([f"{path}: YAML invalido ({exc})"]) from None
+    if not isinstance(data, dict):
+        raise ScenarioError([f"{path}: se esperaba un mapeo en la raiz"])
+    return data
+
+
+def load_timeline_config(path: Path = Path("cronos.yaml")) -> dict:
+    if not path.exists():
+        return {
+            "labels": ["Ene 2024", "Mar 2024", "Nov 2025", "Dic 2025", "Ene 2026"],
+            "titles": [
+                "Creando Escenario",
+                "Timeout F5",
+                "Bypass Apache",
+                "Falla Apache L1",
+                "RollBack F5",
+            ],
+            "details": ["", "", "", "", ""],
+            "duration_seconds": 77,
+        }
+    return timeline_from_data(_read_yaml(path))
+
+
+def timeline_from_data(data: dict) -> dict:
+    timeline = data.get("timeline") or {}
+    milestones = timeline.get("milestones") or []
+    if len(milestones) < 2:
+        raise ScenarioError(["cronos.yaml: se requieren minimo 2 hitos en timeline.milestones"])
+    if not all(isinstance(item, dict) for item in milestones):
+        raise ScenarioError(["cronos.yaml: cada hito debe ser un mapeo con label/title/detail"])
+    if len(milestones) > 6:
+        print("cronos.yaml: se paso el maximo de 6 hitos, se usaran solo los primeros 6.")
+        milestones = milestones[:6]
+    labels = [str(item.get("label") or "") for item in milestones]
+    titles = [str(item.get("title") or "") for item in milestones]
+    details = [str(item.get("detail") or "") for item in milestones]
+    duration_seconds = timeline.get("duration_seconds") or 77
+    return {
+        "labels": labels,
+        "titles": titles,
+        "details": details,
+        "duration_seconds": duration_seconds,
+    }
+
+def load_visual_config(path: Path = Path("archMDP-ASIS.yaml")) -> dict:
+    defaults = {
+        "base_line": {
+            "width": 1.0,
+            "opacity": 0.07,
+        },
+        "trail": {
+            "width": 2.0,
+            "opacity": 0.75,
+            "fade_time": 3.2,
+            "linger_time": 0.6,
+        },
+        "trail_stuck": {
+            "fade_time": 0.4,
+            "linger_time": 0.2,
+        },
+    }
+    if not path.exists():
+        return defaults
+    return merge_visual_config(defaults, _read_yaml(path))
+
+
+def merge_visual_config(defaults: dict, data: dict) -> dict:
+    config = defaults | data
+    config["base_line"] = defaults["base_line"] | (data.get("base_line") or {})
+    config["trail"] = defaults["trail"] | (data.get("trail") or {})
+    config["trail_stuck"] = defaults["trail_stuck"] | (data.get("trail_stuck") or {})
+    return config
+
+
+def label_to_month_index(label: str) -> int | None:
+    parts = label.strip().split()
+    if len(parts) < 2:
+        return None
+    month_key = parts[0][:3].lower()
+    try:
+        year = int(parts[1])
+    except ValueError:
+        return None
+    months = {
+        "ene": 1,
+        "feb": 2,
+        "mar": 3,
+        "abr": 4,
+        "may": 5,
+        "jun": 6,
+        "jul": 7,
+        "ago": 8,
+        "sep": 9,
+        "oct": 10,
+        "nov": 11,
+        "dic": 12,
+    }
+    month = months.get(month_key)
+    if not month:
+        return None
+    return year * 12 + month
+
+
+def timeline_positions(labels: list[str]) -> list[float]:
+    label_indexes = [label_to_month_index(label) for label in labels]
+    if all(idx is not None for idx in label_indexes):
+        min_idx = min(label_indexes)
+        max_idx = max(label_indexes)
+        denom = max(1, max_idx - min_idx)
+        return [(idx - min_idx) / denom for idx in label_indexes]
+    return [i / max(1, len(labels) - 1) for i in range(len(labels))]
+
+
+DEFAULT_SCENARIO = {
+    "title": "Arquitectura Motor de Pagos LBTR - ASIS - 2025",
+    "final_title": "Arquitectura Motor de Pagos LBTR - TOBE - 2026",
+    "version_label": "v2.2.16",
+    "timeline_path": "cronos.yaml",
+    "visual_path": "archMDP-ASIS.yaml",
+    "topology": {
+        "osb_morande": 4,
+        "osb_longovilo": 4,
+    },
+    "transactions": 16,
+    "failures": {
+        "f5_stuck_indices": [3, 7, 11, 15],
+        "apache_l1_queued": 8,
+    },
+}
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def file_errors(scenario: dict) -> list[str]:
+    # Archivos que la escena lee al renderizar; se revisan tambien con el plan en cache.
+    errors = []
+    if scenario.get("trace_bins") and not Path(scenario["trace_bins"]).exists():
+        errors.append(f"trace_bins: no existe {scenario['trace_bins']} (generar con trace_bins.py build)")
+    ticker = scenario.get("changelog_ticker")
+    if ticker:
+        # `changelog_ticker: true`, `<ruta>` o `{path, lines, chars}` (ver changelog_ticker.py).
+        ticker = ticker if isinstance(ticker, dict) else {"path": ticker} if isinstance(ticker, str) else {}
+        log_path = ticker.get("path", "logs/CHANGELOG.log")
+        if not isinstance(log_path, str) or not Path(log_path).exists():
+            errors.append(f"changelog_ticker: no existe {log_path}")
+    return errors
+
+
+def validate_scenario(scenario: dict) -> list[str]:
+    errors = []
+    for key in ("title", "final_title", "version_label"):
+        if not isinstance(scenario.get(key), str) or not scenario[key].strip():
+            errors.append(f"{key}: se requiere un texto")
+    topology = scenario["topology"]
+    for key in ("osb_morande", "osb_longovilo"):
+        if not _is_int(topology.get(key)) or topology[key] < 0:
+            errors.append(f"topology.{key}: se requiere un entero >= 0")
+    if _is_int(topology.get("osb_longovilo")) and topology["osb_longovilo"] < 1:
+        errors.append("topology.osb_longovilo: se requiere minimo 1 OSB Longovilo (ruta Apache L1)")
+    transactions = scenario.get("transactions")
+    if not _is_int(transactions) or transactions < 2:
+        errors.append("transactions: se requiere un entero >= 2")
+    failures = scenario["failures"]
+    stuck_indices = failures.get("f5_stuck_indices")
+    if not isinstance(stuck_indices, list) or not all(_is_int(i) for i in stuck_indices):
+        errors.append("failures.f5_stuck_indices: se requiere una lista de enteros")
+    elif _is_int(transactions):
+        stuck = [i for i in stuck_indices if 0 <= i < transactions]
+        if not stuck or len(stuck) >= transactions:
+            errors.append("failures.f5_stuck_indices: debe dejar al menos 1 pago atascado y 1 exitoso")
+    if not _is_int(failures.get("apache_l1_queued")) or failures["apache_l1_queued"] < 1:
+        errors.append("failures.apache_l1_queued: se requiere minimo 1 pago encolado en Apache L1")
+
+    errors += file_errors(scenario)
+    ticker = scenario.get("changelog_ticker")
+    if ticker:
+        ticker = ticker if isinstance(ticker, dict) else {}
+        for key in ("lines", "chars"):
+            if key in ticker and (not _is_int(ticker[key]) or ticker[key] < 1):
+                errors.append(f"changelog_ticker.{key}: se requiere un entero >= 1")
+
+    captions = scenario.get("captions")
+    if captions not in (None, False, True) and captions not in CAPTION_FORMATS:
+        errors.append(f"captions: se espera true, vtt o srt (no {captions!r})")
+
+    timeline = scenario["timeline_config"]
+    months = [label_to_month_index(label) for label in timeline["labels"]]
+    if not all(timeline["labels"]):
+        errors.append("cronos.yaml: todos los hitos necesitan label")
+    elif all(month is not None for month in months) and months != sorted(months):
+        errors.append(f"cronos.yaml: hitos fuera de orden cronologico ({', '.join(timeline['labels'])})")
+    if not _is_number(timeline.get("duration_seconds")) or timeline["duration_seconds"] <= 0:
+        errors.append("cronos.yaml: timeline.duration_seconds debe ser un numero > 0")
+
+    visual = scenario["visual_config"]
+    for group in ("base_line", "trail", "trail_stuck"):
+        for key, value in (visual.get(group) or {}).items():
+            if not _is_number(value) or value < 0:
+                errors.append(f"archMDP-ASIS.yaml: {group}.{key} debe ser un numero >= 0")
+            elif key == "opacity" and value > 1:
+                errors.append(f"archMDP-ASIS.yaml: {group}.opacity debe estar entre 0 y 1")
+    return errors
+
+
+def resolve_scenario(overrides: dict | None) -> dict:
+    overrides = overrides or {}
+    scenario = DEFAULT_SCENARIO | overrides
+    scenario["topology"] = DEFAULT_SCENARIO["topology"] | (overrides.get("topology") or {})
+    scenario["failures"] = DEFAULT_SCENARIO["failures"] | (overrides.get("failures") or {})
+    # Sin cronos.yaml/archMDP-ASIS.yaml se usan los valores por defecto, salvo
+    # que el escenario pida un archivo explicito.
+    missing = [
+        f"{key}: no existe {scenario[key]}"
+        for key in ("timeline_path", "visual_path")
+        if key in overrides and not Path(scenario[key]).exists()
+    ]
+    if missing:
+        raise ScenarioError(missing)
+    if "trace" in overrides and "incidents" in overrides:
+        raise ScenarioError(["trace e incidents no se pueden combinar: ambos definen el hito inicial"])
+    if "incidents" in overrides:
+        # Historia de incidentes: la simulacion decide ruta y resultado de cada pago.
+        from incident_sim import IncidentError, scenario_from_story
+
+        try:
+            from_story = scenario_from_story(overrides["incidents"], node_layout(scenario["topology"]))
+        except IncidentError as exc:
+            raise ScenarioError([f"incidents: {error}" for error in exc.errors]) from None
+        scenario["transactions"] = from_story["transactions"]
+        scenario["failures"] = scenario["failures"] | from_story["failures"]
+        scenario["schedule"] = from_story["schedule"]
+    if "trace" in overrides:
+        # Traza real: cantidad, timeouts y rutas del hito inicial salen del archivo.
+        from trace_reader import TraceError, scenario_from_trace
+
+        try:
+            from_trace = scenario_from_trace(overrides["trace"], set(node_layout(scenario["topology"])))
+        except (OSError, TraceError, KeyError) as exc:
+            raise ScenarioError([f"trace: {exc}"]) from None
+        scenario["transactions"] = from_trace["transactions"]
+        scenario["failures"] = scenario["failures"] | from_trace["failures"]
+        scenario["f5_routes"] = from_trace["f5_routes"]
+    if "timeline" in overrides:
+        scenario["timeline_config"] = timeline_from_data({"timeline": overrides["timeline"]})
+    else:
+        scenario["timeline_config"] = load_timeline_config(Path(scenario["timeline_path"]))
+    visual_config = load_visual_config(Path(scenario["visual_path"]))
+    if "visual" in overrides:
+        visual_config = merge_visual_config(visual_config, overrides["visual"] or {})
+    scenario["visual_config"] = visual_config
+    errors = validate_scenario(scenario)
+    if errors:
+        raise ScenarioError(errors)
+    return scenario
+
+
+# Elementos que aparecen en cada hito (seccion); watch_render.py lo usa para
+# re-renderizar solo los hitos afectados por un cambio en archMDP-ASIS.yaml.
+SECTION_FEATURES = {
+    1: {"base_line", "trail", "trail_stuck"},
+    2: {"base_line", "trail"},
+    3: {"base_line", "trail", "trail_stuck"},
+    4: {"base_line", "trail"},
+}
+
+
+@dataclass(frozen=True)
+class Node:
+    id: str
+    label: str
+    x: float
+    y: float
+    radius: float
+    color: str
+    label_size: int
+    label_side: str = "down"
+    label_buff: float = 0.25
+
+    @property
+    def center(self) -> Point:
+        return (self.x, self.y)
+
+    @property
+    def left(self) -> Point:
+        return (self.x - self.radius, self.y)
+
+    @property
+    def right(self) -> Point:
+        return (self.x + self.radius, self.y)
+
+
+def node_layout(topology: dict) -> dict[str, Node]:
+    # Columnas: MDP → F5/Apache → OSBs → Tuxedos → Tandem
+    nodes = [
+        Node("mdp", "MDP", -6.0, 0.0, 0.5, COLORS["BLUE"], 24),
+        Node("f5", "F5", -3.0, 0.0, 0.5, COLORS["GREEN"], 24),
+    ]
+    for i in range(int(topology["osb_morande"])):
+        nodes.append(Node(f"osb_m{i + 1}", f"OSB M{i + 1}", 0.0, 2.5 - i * 0.8, 0.2, COLORS["YELLOW"], 12, label_buff=0.1))
+    for i in range(int(topology["osb_longovilo"])):
+        nodes.append(Node(f"osb_l{i + 1}", f"OSB L{i + 1}", 0.0, -(i * 0.8 + 1), 0.2, COLORS["ORANGE"], 12, label_buff=0.1))
+    nodes += [
+        Node("tux_a", "Tux A", 3.0, 0.8, 0.5, COLORS["PURPLE"], 20),
+        Node("tux_l", "Tux L", 3.0, -0.8, 0.5, COLORS["ORANGE"], 20),
+        Node("tandem_a", "Tandem A", 6.0, 0.8, 0.5, COLORS["PURPLE"], 20),
+        Node("tandem_l", "Tandem L", 6.0, -0.8, 0.5, COLORS["GRAY"], 20),
+        Node("apache_m1", "Apache Proxy M1", -3.0, 1.4, 0.3, COLORS["YELLOW"], 14, "up", 0.1),
+        Node("apache_l1", "Apache Proxy L1", -3.0, -1.8, 0.3, COLORS["ORANGE"], 14, "down", 0.1),
+    ]
+    return {node.id: node for node in nodes}
+
+
+def osb_ids(nodes: dict[str, Node]) -> list[str]:
+    return [node_id for node_id in nodes if node_id.startswith("osb_")]
+
+
+def route_points(nodes: dict[str, Node], node_ids: list[str]) -> list[Point]:
+    # Entrada por la izquierda y salida por la derecha de cada nodo intermedio (180°).
+    points = [nodes[node_ids[0]].right]
+    for node_id in node_ids[1:-1]:
+        points += [nodes[node_id].left, nodes[node_id].right]
+    points.append(nodes[node_ids[-1]].left)
+    return points
+
+
+def offset_point(point: Point, offset: Point) -> Point:
+    return (point[0] + offset[0], point[1] + offset[1])
+
+
+def f5_route_cycle(nodes: dict[str, Node]) -> list[list[str]]:
+    routes = []
+    for osb in osb_ids(nodes):
+        routes.append(["mdp", "f5", osb, "tux_a", "tandem_a"])
+        routes.append(["mdp", "f5", osb, "tux_l", "tandem_a"])
+    return routes
+
+
+def apache_l1_route(nodes: dict[str, Node], index: int) -> list[str]:
+    first_longovilo = next(node_id for node_id in nodes if node_id.startswith("osb_l"))
+    next_tux = "tux_a" if index % 2 == 0 else "tux_l"
+    return ["mdp", "apache_l1", first_longovilo, next_tux, "tandem_a"]
+
+
+def write_time(text: str) -> float:
+    # Igual que Write de manim: 1s si el texto tiene menos de 15 glifos, si no 2s.
+    return 1.0 if len("".join(text.split())) < 15 else 2.0
+
+
+def smooth(t: float, inflection: float = 10.0) -> float:
+    # rate_func por defecto de manim (Create, FadeIn, .animate).
+    def sigmoid(x: float) -> float:
+        return 1.0 / (1.0 + math.exp(-x))
+
+    error = sigmoid(-inflection / 2)
+    return min(max((sigmoid(inflection * (t - 0.5)) - error) / (1 - 2 * error), 0.0), 1.0)
+
+
+def _progress(t: float, start: float, duration: float) -> float:
+    if duration <= 0:
+        return 1.0 if t >= start else 0.0
+    return min(max((t - start) / duration, 0.0), 1.0)
+
+
+def lerp_point(a: Point, b: Point, k: float) -> Point:
+    return (a[0] + (b[0] - a[0]) * k, a[1] + (b[1] - a[1]) * k)
+
+
+def point_along(points: list[Point], proportion: float) -> Point:
+    # Igual que MoveAlongPath sobre set_points_as_corners: proporcional al largo de arco.
+    lengths = [math.dist(a, b) for a, b in zip(points, points[1:])]
+    target = proportion * sum(lengths)
+    for (a, b), length in zip(zip(points, points[1:]), lengths):
+        if target <= length and length > 0:
+            return lerp_point(a, b, target / length)
+        target -= length
+    return points[-1]
+
+
+def _hex_rgb(color: str) -> tuple[int, int, int]:
+    return int(color[1:3], 16), int(color[3:5], 16), int(color[5:7], 16)
+
+
+def mix_color(a: str, b: str, k: float) -> str:
+    ra, rb = _hex_rgb(a), _hex_rgb(b)
+    return "#" + "".join(f"{round(x + (y - x) * k):02X}" for x, y in zip(ra, rb))
+
+
+@dataclass(frozen=True)
+class Step:
+    index: int
+    name: str
+    section: int
+    start: float
+    duration: float
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+
+@dataclass
+class Transaction:
+    id: int
+    phase: str
+    points: list[Point]
+    move_time: float
+    linger_time: float
+    fade_time: float
+    outcome: str
+    start: float = 0.0
+    colors: list[tuple[float, float, str]] = field(default_factory=list)
+    settle: tuple[float, float, Point] | None = None
+
+    @property
+    def duration(self) -> float:
+        return self.move_time + self.linger_time + self.fade_time
+
+    @property
+    def arrive(self) -> float:
+        return self.start + self.move_time
+
+    def position_at(self, t: float) -> Point:
+        point = point_along(self.points, _progress(t, self.start, self.move_time))
+        if self.settle and t >= self.settle[0]:
+            start, duration, target = self.settle
+            point = lerp_point(point, target, smooth(_progress(t, start, duration)))
+        return point
+
+    def color_at(self, t: float) -> str:
+        color = COLORS["WHITE"]
+        for start, duration, target in self.colors:
+            if t < start:
+                break
+            color = mix_color(color, target, smooth(_progress(t, start, duration)))
+        return color
+
+    def trail_at(self, t: float) -> tuple[float, float]:
+        # (proporcion dibujada, opacidad relativa) del rastro; FadeOut lineal tras `linger_time`.
+        if t < self.start:
+            return 0.0, 0.0
+        drawn = _progress(t, self.start, self.move_time)
+        fade_start = self.arrive + self.linger_time
+        return drawn, 1.0 - _progress(t, fade_start, self.fade_time)
+
+
+@dataclass
+class Edge:
+    id: str
+    a: Point
+    b: Point
+    appear: float
+    create_time: float
+    disappear: float | None = None
+
+    def visible_at(self, t: float) -> tuple[float, float]:
+        # (proporcion creada, opacidad relativa); FadeOut dura 1s.
+        if t < self.appear:
+            return 0.0, 0.0
+        fade = 1.0 if self.disappear is None else 1.0 - smooth(_progress(t, self.disappear, 1.0))
+        return smooth(_progress(t, self.appear, self.create_time)), fade
+
+
+@dataclass(frozen=True)
+class Milestone:
+    index: int
+    label: str
+    title: str
+    detail: str
+    position: float
+    start: float | None
+    end: float | None = None
+
+
+@dataclass(frozen=True)
+class ScenePlan:
+    scenario: dict
+    nodes: dict[str, Node]
+    node_appear: dict[str, float]
+    edges: list[Edge]
+    transactions: list[Transaction]
+    steps: list[Step]
+    milestones: list[Milestone]
+    marker: list[tuple[float, float]]
+    titles: list[tuple[float, str]]
+    node_events: list[tuple[float, float, str, str]]
+
+    @property
+    def duration(self) -> float:
+        return self.steps[-1].end if self.steps else 0.0
+
+    def frame_counts(self, fps: float) -> list[int]:
+        # Frames por play como en manim (np.arange(0, run_time, 1 / fps)).
+        return [max(1, math.ceil(step.duration * fps - 1e-6)) for step in self.steps]
+
+    def phase(self, name: str) -> list[Transaction]:
+        return [tx for tx in self.transactions if tx.phase == name]
+
+    def node_opacity(self, node_id: str, t: float) -> float:
+        appear = self.node_appear.get(node_id)
+        return 0.0 if appear is None else smooth(_progress(t, appear, 1.0))
+
+    def milestone_at(self, t: float) -> Milestone:
+        current = self.milestones[self.section_at(0.0)]
+        for milestone in self.milestones:
+            if milestone.start is not None and milestone.start <= t:
+                current = milestone
+        return current
+
+    def title_at(self, t: float) -> str:
+        return [text for start, text in self.titles if start <= t][-1]
+
+    def marker_at(self, t: float) -> float:
+        value = self.marker[0][1]
+        for (t0, p0), (t1, p1) in zip(self.marker, self.marker[1:]):
+            if t >= t1:
+                value = p1
+            elif t > t0:
+                return p0 + (p1 - p0) * smooth(_progress(t, t0, t1 - t0))
+        return value
+
+    def section_at(self, t: float) -> int:
+        section = self.steps[0].section if self.steps else 0
+        for step in self.steps:
+            if step.start > t:
+                break
+            section = step.section
+        return section
+
+
+class _PlanBuilder:
+    def __init__(self, section: int) -> None:
+        self.t = 0.0
+        self.section = section
+        self.steps: list[Step] = []
+        self.edges: dict[str, Edge] = {}
+
+    def play(self, name: str, duration: float) -> Step:
+        step = Step(len(self.steps), name, self.section, self.t, duration)
+        self.steps.append(step)
+        self.t += duration
+        return step
+
+    def wait(self, duration: float) -> Step:
+        return self.play("wait", duration)
+
+    def play_for(self, name: str, duration: float, transactions: list[Transaction]) -> Step:
+        # Sin pagos que animar la escena espera lo mismo en vez de un play vacio.
+        return self.play(name, duration) if transactions else self.wait(duration)
+
+    def lagged(self, name: str, transactions: list[Transaction], lag_ratio: float) -> Step:
+        # Mismos tiempos que LaggedStart/AnimationGroup de manim (rate_func lineal).
+        offset = 0.0
+        for tx in transactions:
+            tx.start = self.t + offset
+            offset += tx.duration * lag_ratio
+        duration = max(tx.start + tx.duration for tx in transactions) - self.t
+        return self.play(name, duration)
+
+    def create_edge(self, edge_id: str, a: Point, b: Point, step: Step) -> None:
+        self.edges[f"{edge_id}@{step.start:.3f}"] = Edge(edge_id, a, b, step.start, step.duration)
+
+    def fade_edges(self, edge_ids: list[str], step: Step) -> None:
+        for edge in self.edges.values():
+            if edge.id in edge_ids and edge.disappear is None:
+                edge.disappear = step.start
+
+
+def build_plan(scenario: dict) -> ScenePlan:
+    # `scenario` ya resuelto con resolve_scenario.
+    timeline = scenario["timeline_config"]
+    visual = scenario["visual_config"]
+    trail = visual["trail"]
+    trail_stuck = visual["trail_stuck"]
+    labels = timeline["labels"]
+    titles = timeline.get("titles") or []
+    details = timeline.get("details") or []
+    positions = timeline_positions(labels)
+    start_index = 1 if len(labels) > 1 else 0
+    nodes = node_layout(scenario["topology"])
+    osbs = osb_ids(nodes)
+    transactions_per_phase = int(scenario["transactions"])
+    stuck_indices = {int(i) for i in scenario["failures"]["f5_stuck_indices"]}
+    tx_ids = iter(range(1_000_000))
+
+    b = _PlanBuilder(start_index)
+    node_appear: dict[str, float] = {}
+    node_events: list[tuple[float, float, str, str]] = []
+    milestone_start: dict[int, float] = {start_index: 0.0}
+    marker = [(0.0, positions[start_index])]
+    current = [start_index]
+
+    def move_timeline_to(index: int) -> None:
+        target = max(0, min(index, len(positions) - 1))
+        b.section = target
+        step = b.play("timeline", TIMELINE_MOVE_TIME)
+        milestone_start.setdefault(target, step.start)
+        marker.extend([(step.start, positions[current[0]]), (step.end, positions[target])])
+        current[0] = target
+
+    def delivered(phase: str, node_ids: list[str]) -> Transaction:
+        return Transaction(
+            next(tx_ids), phase, route_points(nodes, node_ids), MOVE_TIME,
+            float(trail["linger_time"]), float(trail["fade_time"]), "delivered",
+        )
+
+    def stuck(phase: str, points: list[Point], move_time: float) -> Transaction:
+        return Transaction(
+            next(tx_ids), phase, points, move_time,
+            float(trail_stuck["linger_time"]), float(trail_stuck["fade_time"]), "timeout",
+        )
+
+    schedule = scenario.get("schedule")
+
+    def scheduled(phase: str) -> list[Transaction]:
+        # Pagos de la simulacion (incident_sim.py): los no entregados quedan en su nodo.
+        txs = []
+        stuck_count = 0
+        for payment in schedule[phase]:
+            route = payment["route"]
+            if payment["outcome"] == "delivered":
+                txs.append(delivered(phase, route))
+                continue
+            node = payment["stuck_at"]
+            at_l1 = node == "apache_l1"
+            offsets = L1_STUCK_OFFSETS if at_l1 else STUCK_OFFSETS
+            points = route_points(nodes, route[: route.index(node) + 1])
+            if payment["outcome"] == "timeout":
+                # Timeout: entra al nodo y se queda adentro; encolado: espera en la entrada.
+                points.pop()
+            points.append(offset_point(nodes[node].center, offsets[stuck_count % len(offsets)]))
+            txs.append(stuck(phase, points, L1_STUCK_MOVE_TIME if at_l1 else STUCK_MOVE_TIME))
+            stuck_count += 1
+        return txs
+
+    def edge_pair(a: str, b_id: str) -> tuple[str, Point, Point]:
+        return f"{a}-{b_id}", nodes[a].right, nodes[b_id].left
+
+    b.play("title", max(write_time(scenario["title"]), 1.0))
+    b.play("timeline_intro", 1.0)
+    b.play("timeline_event", 0.6)
+    for group, pause in [(["mdp"], 0.3), (["f5"], 0.3), (osbs, 0.2), (["tux_a", "tux_l"], 0.3), (["tandem_a", "tandem_l"], None)]:
+        step = b.play("nodes", max(1.0, *(write_time(nodes[n].label) for n in group)))
+        for node_id in group:
+            node_appear[node_id] = step.start
+        if pause is not None:
+            b.wait(pause)
+    b.play("legend", 1.0)
+
+    f5_edges = [edge_pair("mdp", "f5")]
+    step = b.play("edges", 1.0)
+    b.create_edge(*f5_edges[0], step)
+    for osb in osbs:
+        edge = edge_pair("f5", osb)
+        b.create_edge(*edge, b.play("edges", 0.2))
+        f5_edges.append(edge)
+    for osb in osbs:
+        for tux in ("tux_a", "tux_l"):
+            edge = edge_pair(osb, tux)
+            b.create_edge(*edge, b.play("edges", 0.2))
+            f5_edges.append(edge)
+    step = b.play("edges", 1.0)
+    for tux in ("tux_a", "tux_l"):
+        edge = edge_pair(tux, "tandem_a")
+        b.create_edge(*edge, step)
+        f5_edges.append(edge)
+
+    # Hito inicial: transacciones por F5, algunas quedan en timeout
+    cycle = f5_route_cycle(nodes)
+    trace_routes = scenario.get("f5_routes") or []
+    initial: list[Transaction] = []
+    stuck_count = 0
+    for i in range(0 if schedule else transactions_per_phase):
+        if i in stuck_indices:
+            offset = STUCK_OFFSETS[stuck_count % len(STUCK_OFFSETS)]
+            points = [nodes["mdp"].right, offset_point(nodes["f5"].center, offset)]
+            initial.append(stuck("f5_initial", points, STUCK_MOVE_TIME))
+            stuck_count += 1
+        else:
+            route = trace_routes[i] if i < len(trace_routes) and trace_routes[i] else cycle[i % len(cycle)]
+            initial.append(delivered("f5_initial", route))
+    if schedule:
+        initial = scheduled("f5_initial")
+    b.lagged("f5_initial", initial, LAG_RATIO)
+    ok = [tx for tx in initial if tx.outcome == "delivered"]
+    timeouts = [tx for tx in initial if tx.outcome == "timeout"]
+    step = b.play_for("delivered_green", 1.0, ok)
+    for tx in ok:
+        tx.colors.append((step.start, step.duration, COLORS["GREEN"]))
+    step = b.play_for("settle_tandem", 0.6, ok)
+    for i, tx in enumerate(ok):
+        tx.settle = (step.start, step.duration, offset_point(nodes["tandem_a"].center, TANDEM_OFFSETS[i % len(TANDEM_OFFSETS)]))
+    b.wait(1.0)
+    step = b.play_for("timeout_red", 1.0, timeouts)
+    for tx in timeouts:
+        tx.colors.append((step.start, step.duration, COLORS["RED"]))
+    b.play("timeout_callout", 1.0)
+    b.wait(3.0)
+    b.play("timeout_callout_out", 1.0)
+    b.play("success_callout", 1.0)
+    b.wait(3.0)
+    b.play("success_callout_out", 1.0)
+    step = b.play_for("timeout_gray", 1.0, timeouts)
+    for tx in timeouts:
+        tx.colors.append((step.start, step.duration, COLORS["GRAY"]))
+    b.play_for("settle_tandem", 0.6, ok)
+
+    # Hito: bypass por Apache
+    move_timeline_to(2)
+    b.play("milestone_title", 0.8)
+    b.play("milestone_subtitle", 0.4)
+    step = b.play("disconnect_f5", 1.0)
+    b.fade_edges([e[0] for e in f5_edges], step)
+    step = b.play("nodes", max(1.0, write_time(nodes["apache_m1"].label)))
+    node_appear["apache_m1"] = node_appear["apache_l1"] = step.start
+    first_longovilo = osbs[int(scenario["topology"]["osb_morande"])]
+    apache_edges = [
+        (edge_pair("mdp", "apache_l1"), 0.3),
+        (edge_pair("apache_l1", first_longovilo), 0.3),
+        (edge_pair(first_longovilo, "tux_a"), 0.25),
+        (edge_pair(first_longovilo, "tux_l"), 0.25),
+    ]
+    for edge, run_time in apache_edges:
+        b.create_edge(*edge, b.play("edges", run_time))
+    tux_tan = [edge_pair("tux_a", "tandem_a"), edge_pair("tux_l", "tandem_a")]
+    step = b.play("edges", 0.3)
+    for edge in tux_tan:
+        b.create_edge(*edge, step)
+    bypass = scheduled("apache_bypass") if schedule else [
+        delivered("apache_bypass", apache_l1_route(nodes, i)) for i in range(transactions_per_phase)
+    ]
+    b.lagged("apache_bypass", bypass, LAG_RATIO)
+
+    # Hito: falla Apache L1, pagos encolados y reinicio
+    move_timeline_to(3)
+    b.play("milestone_title", 0.4)
+    b.play("milestone_subtitle", 0.4)
+    downstream = [edge for edge, _ in apache_edges[1:]] + tux_tan
+    b.fade_edges([e[0] for e in downstream], b.play("disconnect_l1", 1.0))
+    queued = scheduled("apache_l1_queued") if schedule else []
+    for i in range(0 if schedule else int(scenario["failures"]["apache_l1_queued"])):
+        offset = L1_STUCK_OFFSETS[i % len(L1_STUCK_OFFSETS)]
+        points = [nodes["mdp"].right, nodes["apache_l1"].left, offset_point(nodes["apache_l1"].center, offset)]
+        queued.append(stuck("apache_l1_queued", points, L1_STUCK_MOVE_TIME))
+    b.lagged("apache_l1_queued", queued, L1_STUCK_LAG_RATIO)
+    # Con una historia de incidentes algunos encolados pueden llegar a entregarse.
+    queued_stuck = [tx for tx in queued if tx.outcome == "timeout"]
+    for color in ("RED", "GRAY"):
+        step = b.play_for(f"queued_{color.lower()}", 0.8, queued_stuck)
+        for tx in queued_stuck:
+            tx.colors.append((step.start, step.duration, COLORS[color]))
+    reset_start = b.play("l1_reset", 0.2).start
+    b.play("l1_reset", 0.1)
+    for _ in range(8):
+        b.play("l1_reset", 0.08)
+    b.play("l1_reset", 0.2)
+    reset_end = b.play("l1_reset", 0.2).end
+    node_events.append((reset_start, reset_end - reset_start, "apache_l1", "reset"))
+    for edge, run_time in apache_edges[1:]:
+        b.create_edge(*edge, b.play("edges", run_time))
+    step = b.play("edges", 0.3)
+    for edge in tux_tan:
+        b.create_edge(*edge, step)
+    round2 = scheduled("apache_l1_round2") if schedule else [
+        delivered("apache_l1_round2", apache_l1_route(nodes, i)) for i in range(transactions_per_phase)
+    ]
+    b.lagged("apache_l1_round2", round2, LAG_RATIO)
+
+    # Hito: rollback a F5 sin timeouts (TOBE)
+    move_timeline_to(4)
+    b.play("milestone_title", 0.8)
+    b.play("milestone_subtitle", 0.4)
+    title_step = b.play("title_tobe", 0.6)
+    b.fade_edges([e[0] for e, _ in apache_edges] + [e[0] for e in tux_tan], b.play("disconnect_apache", 1.0))
+    edge = edge_pair("mdp", "f5")
+    b.create_edge(*edge, b.play("edges", 1.0))
+    for osb in osbs:
+        b.create_edge(*edge_pair("f5", osb), b.play("edges", 0.2))
+    for osb in osbs:
+        for tux in ("tux_a", "tux_l"):
+            b.create_edge(*edge_pair(osb, tux), b.play("edges", 0.2))
+    final = scheduled("f5_final") if schedule else [
+        delivered("f5_final", cycle[i % len(cycle)]) for i in range(transactions_per_phase)
+    ]
+    b.lagged("f5_final", final, LAG_RATIO)
+    final_ok = [tx for tx in final if tx.outcome == "delivered"]
+    step = b.play_for("delivered_green", 1.0, final_ok)
+    for tx in final_ok:
+        tx.colors.append((step.start, step.duration, COLORS["GREEN"]))
+    step = b.play_for("settle_tandem", 0.6, final_ok)
+    for i, tx in enumerate(final_ok):
+        tx.settle = (step.start, step.duration, offset_point(nodes["tandem_a"].center, TANDEM_OFFSETS[i % len(TANDEM_OFFSETS)]))
+    b.wait(2.0)
+
+    milestones = [
+        Milestone(
+            index=idx,
+            label=label,
+            title=titles[idx] if idx < len(titles) else "",
+            detail=(details[idx] if idx < len(details) else "") or DEFAULT_SUBTITLE,
+            position=positions[idx],
+            start=milestone_start.get(idx),
+            end=max((step.end for step in b.steps if step.section == idx), default=None),
+        )
+        for idx, label in enumerate(labels)
+    ]
+    return ScenePlan(
+        scenario=scenario,
+        nodes=nodes,
+        node_appear=node_appear,
+        edges=list(b.edges.values()),
+        transactions=initial + bypass + queued + round2 + final,
+        steps=b.steps,
+        milestones=milestones,
+        marker=marker,
+        titles=[(0.0, scenario["title"]), (title_step.start, scenario["final_title"])],
+        node_events=node_events,
+    )
+
+
+def plan_cache_key(overrides: dict | None) -> str:
+    # Escenario + contenido de los YAML + modulos del plan: cualquier cambio invalida el plan.
+    overrides = overrides or {}
+    scenario = DEFAULT_SCENARIO | overrides
+    digest = hashlib.sha256()
+    for name in PLAN_SOURCES:
+        source = Path(__file__).with_name(name)
+        digest.update(source.read_bytes() if source.exists() else b"<sin modulo>")
+    digest.update(json.dumps(overrides, sort_keys=True, default=str).encode("utf-8"))
+    for key in ("timeline_path", "visual_path"):
+        path = Path(scenario[key])
+        digest.update(key.encode("utf-8"))
+        digest.update(path.read_bytes() if path.exists() else b"<sin archivo>")
+    if isinstance(overrides.get("incidents"), str):
+        story = Path(overrides["incidents"])
+        digest.update(story.read_bytes() if story.exists() else b"<sin historia>")
+    if isinstance(overrides.get("trace"), dict) and overrides["trace"].get("path"):
+        # Trazas de millones de filas: tamano + mtime en vez de leer el archivo.
+        trace = Path(overrides["trace"]["path"])
+        stat = trace.stat() if trace.exists() else None
+        digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode() if stat else b"<sin traza>")
+    return digest.hexdigest()[:24]
+
+
+def compile_plan(overrides: dict | None = None, cache_dir: Path | None = PLAN_CACHE_DIR) -> ScenePlan:
+    # Render, dry-run y previews parten del mismo plan ya validado; con cache
+    # (cache_dir) no se vuelve a leer ni parsear YAML mientras nada cambie.
+    if cache_dir is None:
+        return build_plan(resolve_scenario(overrides))
+    path = Path(cache_dir) / f"{plan_cache_key(overrides)}.pickle"
+    try:
+        with path.open("rb") as handle:
+            plan = pickle.load(handle)
+        if isinstance(plan, ScenePlan):
+            errors = file_errors(plan.scenario)
+            if errors:
+                raise ScenarioError(errors)
+            # mtime = ultimo uso: la poda descarta los planes que nadie pide hace mas tiempo.
+            os.utime(path)
+            return plan
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        pass
+    plan = build_plan(resolve_scenario(overrides))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp.open("wb") as handle:
+            pickle.dump(plan, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        prune_plan_cache(path.parent, PLAN_CACHE_KEEP)
+    except OSError:
+        # Directorio de solo lectura: el plan igual sirve, solo no queda en cache.
+        pass
+    return plan
+
+
+def prune_plan_cache(cache_dir: Path, keep: int = PLAN_CACHE_KEEP) -> None:
+    plans = []
+    for path in cache_dir.glob("*.pickle"):
+        try:
+            plans.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            continue
+    for _, path in sorted(plans, reverse=True)[keep:]:
+        path.unlink(missing_ok=True)
+
+
+@dataclass(frozen=True)
+class Keyframe:
+    name: str
+    step: int
+    fraction: float
+    time: float
+
+
+def keyframes(plan: ScenePlan) -> list[Keyframe]:
+    # Checklist de entrega: leyenda visible, fin de cada hito, transacciones a
+    # mitad de camino (rutas y estados) y Apache L1 tras el reinicio.
+    frames = []
+    legend = next(step for step in plan.steps if step.name == "legend")
+    frames.append(Keyframe("leyenda", legend.index, 1.0, legend.end))
+    for section in sorted({step.section for step in plan.steps}):
+        last = [step for step in plan.steps if step.section == section][-1]
+        frames.append(Keyframe(f"hito_{section}_fin", last.index, 1.0, last.end))
+    for step in plan.steps:
+        if any(tx.phase == step.name for tx in plan.transactions):
+            frames.append(Keyframe(f"{step.name}_mitad", step.index, 0.5, step.start + step.duration / 2))
+    for start, duration, node_id, kind in plan.node_events:
+        last = [step for step in plan.steps if step.start < start + duration][-1]
+        frames.append(Keyframe(f"{node_id}_{kind}", last.index, 1.0, last.end))
+    return sorted(frames, key=lambda frame: frame.time)
+
+
+def _variant_scenarios(args: argparse.Namespace) -> list[tuple[str, dict | None]]:
+    if not (args.variant or getattr(args, "all_variants", False)):
+        return [("default", None)]
+    from render_variants import load_variants, scenario_overrides, variant_scenario
+
+    if args.variant:
+        return [(args.variant, scenario_overrides(Path(args.variants), args.variant))]
+    return [(v["name"], variant_scenario(v)) for v in load_variants(Path(args.variants))]
+
+
+def _parse_sections(raw: str | None) -> set[int] | None:
+    if not raw:
+        return None
+    try:
+        return {int(part) for part in raw.split(",") if part.strip()}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"hitos invalidos: {raw} (ej: 2,3)") from None
+
+
+def _section_rows(plan: ScenePlan, fps: float) -> list[dict]:
+    frames = plan.frame_counts(fps)
+    rows = []
+    for milestone in plan.milestones:
+        steps = [step for step in plan.steps if step.section == milestone.index]
+        rows.append({
+            "index": milestone.index,
+            "label": milestone.label,
+            "title": milestone.title,
+            "position": round(milestone.position, 4),
+            "start": None if milestone.start is None else round(milestone.start, 3),
+            "end": None if milestone.end is None else round(milestone.end, 3),
+            "plays": len(steps),
+            "frames": sum(frames[step.index] for step in steps),
+        })
+    return rows
+
+
+def cmd_validate(args: argparse.Namespace) -> None:
+    failed = 0
+    for name, scenario in _variant_scenarios(args):
+        try:
+            plan = compile_plan(scenario, None if args.no_cache else PLAN_CACHE_DIR)
+        except ScenarioError as exc:
+            failed += 1
+            print(f"FALLA: {name}")
+            for error in exc.errors:
+                print(f"  - {error}")
+            continue
+        print(f"OK: {name} ({len(plan.milestones)} hitos, {len(plan.steps)} plays, {plan.duration:.2f}s)")
+    if failed:
+        raise SystemExit(1)
+
+
+def cmd_plan(args: argparse.Namespace) -> None:
+    (name, scenario), = _variant_scenarios(args)
+    plan = compile_plan(scenario)
+    rows = _section_rows(plan, args.fps)
+    if args.json:
+        steps = [
+            {"index": s.index, "name": s.name, "section": s.section, "start": round(s.start, 3), "duration": round(s.duration, 3)}
+            for s in plan.steps
+        ]
+        print(json.dumps({"variant": name, "duration": round(plan.duration, 3), "milestones": rows, "steps": steps}, ensure_ascii=False, indent=2))
+        return
+    print(f"{'hito':<5}{'label':<11}{'pos':>6}{'inicio':>9}{'fin':>9}{'plays':>7}{'frames':>8}  titulo")
+    for row in rows:
+        start = "-" if row["start"] is None else f"{row['start']:.2f}"
+        end = "-" if row["end"] is None else f"{row['end']:.2f}"
+        print(f"{row['index']:<5}{row['label']:<11}{row['position']:>6.2f}{start:>9}{end:>9}{row['plays']:>7}{row['frames']:>8}  {row['title']}")
+    if args.steps:
+        print()
+        for step in plan.steps:
+            print(f"  #{step.index:<4}{step.name:<22}hito {step.section}  {step.start:8.2f}s  +{step.duration:.2f}s")
+    print(f"OK: {name}: {len(plan.steps)} plays, {plan.duration:.2f}s, {sum(plan.frame_counts(args.fps))} frames a {args.fps:g} fps")
+
+
+def cmd_dry_run(args: argparse.Namespace) -> None:
+    from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES
+
+    width, height, fps = QUALITY_SIZES[args.quality]
+    sections = args.sections
+    for name, scenario in _variant_scenarios(args):
+        plan = compile_plan(scenario)
+        rows = _section_rows(plan, fps)
+        rendered = [row for row in rows if row["plays"] and (sections is None or row["index"] in sections)]
+        frames = sum(row["frames"] for row in rendered)
+        # Misma ruta que arma SceneFileWriter: videos/<script>/<alto>p<fps>/<salida>.<formato>.
+        scene_file = Path((scenario or {}).get("scene_file") or DEFAULT_SCENE_FILE)
+        output_name = name if scenario is not None else DEFAULT_SCENE_NAME
+        output = Path(args.media_dir) / "videos" / scene_file.stem / f"{height}p{fps}" / f"{output_name}.mp4"
+        print(f"{name}: {width}x{height} @ {fps} fps")
+        for row in rows:
+            if not row["plays"]:
+                continue
+            state = "render" if row in rendered else "salta"
+            print(f"  hito {row['index']} {row['title'][:28]:<28} {row['plays']:>4} plays {row['frames']:>6} frames  {state}")
+        print(f"OK: {frames} frames ({frames / fps:.1f}s de video) -> {output.as_posix()}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="scene_plan.py",
+        description="Validate the scenario and inspect the scene plan without importing manim",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def add_variant_args(parser: argparse.ArgumentParser) -> None:
+        parser.add_argument("--variant", help="Scenario name from the variants catalog (default: the base scene)")
+        parser.add_argument("--variants", default="variants.yaml")
+
+    p_validate = sub.add_parser("validate", help="Check cronos.yaml, archMDP-ASIS.yaml and the scenario")
+    add_variant_args(p_validate)
+    p_validate.add_argument("--all-variants", action="store_true", help="Validate every variant in the catalog")
+    p_validate.add_argument("--no-cache", action="store_true", help="Re-parse even if a compiled plan exists")
+    p_validate.set_defaults(func=cmd_validate)
+
+    p_plan = sub.add_parser("plan", help="Milestone positions and timing (and optionally every play)")
+    add_variant_args(p_plan)
+    p_plan.add_argument("--fps", type=float, default=15)
+    p_plan.add_argument("--steps", action="store_true", help="List every self.play/self.wait")
+    p_plan.add_argument("--json", action="store_true")
+    p_plan.set_defaults(func=cmd_plan)
+
+    p_dry = sub.add_parser("dry-run", help="What a render would produce: frames per milestone and output path")
+    add_variant_args(p_dry)
+    p_dry.add_argument("--all-variants", action="store_true")
+    p_dry.add_argument("-q", "--quality", default="l", choices=["l", "m", "h", "p", "k"])
+    p_dry.add_argument("--sections", type=_parse_sections, help="Only these milestones, e.g. 2,3")
+    p_dry.add_argument("--media-dir", default="media")
+    p_dry.set_defaults(func=cmd_dry_run)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
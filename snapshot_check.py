@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+from render_variants import quality_config, warm_caches
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, QUALITY_SIZES, load_scene_class
+from scene_plan import Keyframe, compile_plan, keyframes
+
+
+# Regresion visual por keyframes: cada keyframe se renderiza en su propio proceso
+# saltando (sin rasterizar) todos los play anteriores, como `manim -n`.
+BASELINE_DIR = Path("snapshots")
+DEFAULT_TOLERANCE = 0.03
+BLOCK_SIZE = 8
+
+
+def _frame_capture_writer_class():
+    from manim.scene.scene_file_writer import SceneFileWriter
+
+    class FrameCaptureWriter(SceneFileWriter):
+        # No codifica nada: solo guarda el frame numero `target` del play renderizado.
+        def __init__(self, renderer, scene_name, *, target: int, **kwargs) -> None:
+            super().__init__(renderer, scene_name, **kwargs)
+            self.target = target
+            self.frames_seen = 0
+            self.captured = None
+
+        def write_frame(self, frame_or_renderer, num_frames: int = 1) -> None:
+            if self.captured is None and self.frames_seen + num_frames > self.target:
+                self.captured = frame_or_renderer.copy()
+            self.frames_seen += num_frames
+
+    return FrameCaptureWriter
+
+
+def render_keyframe(
+    scene_file: str,
+    scene_name: str,
+    keyframe: Keyframe,
+    quality: str,
+    media_dir: str,
+    out_dir: str,
+) -> dict[str, Any]:
+    from manim import tempconfig
+    from manim.renderer.cairo_renderer import CairoRenderer
+    from PIL import Image
+
+    scene_cls = load_scene_class(Path(scene_file), scene_name)
+    fps = QUALITY_SIZES[quality][2]
+    plan = compile_plan(getattr(scene_cls, "scenario", None))
+    step = plan.steps[keyframe.step]
+    started = time.perf_counter()
+    if keyframe.fraction >= 1.0:
+        # Fin de un play: se saltan todos hasta `step` inclusive y se rasteriza el estado final.
+        window = {"from_animation_number": step.index + 1, "upto_animation_number": step.index}
+        target = 0
+    else:
+        window = {"from_animation_number": step.index, "upto_animation_number": step.index}
+        target = int(keyframe.fraction * step.duration * fps)
+    temp = quality_config(quality, media_dir) | window | {
+        "input_file": scene_file,
+        "output_file": keyframe.name,
+        "write_to_movie": False,
+        "save_last_frame": False,
+        "disable_caching": True,
+    }
+    with tempconfig(temp):
+        writer_cls = partial(_frame_capture_writer_class(), target=target)
+        scene = scene_cls(renderer=CairoRenderer(file_writer_class=writer_cls))
+        scene.render()
+        frame = scene.renderer.file_writer.captured
+        if frame is None:
+            scene.renderer.update_frame(scene, ignore_skipping=True)
+            frame = scene.renderer.get_frame()
+    image = Image.fromarray(frame).convert("RGB")
+    path = Path(out_dir) / f"{keyframe.name}.png"
+    image.save(path)
+    return {
+        "name": keyframe.name,
+        "path": str(path),
+        "sha256": hashlib.sha256(image.tobytes()).hexdigest(),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def perceptual_score(current: Path, baseline: Path) -> tuple[float, Any]:
+    # Diferencia media por bloque de BLOCK_SIZE px (0..1): el antialiasing no pesa,
+    # un nodo/leyenda desplazado o una bolita de otro color si.
+    import numpy as np
+    from PIL import Image
+
+    a = np.asarray(Image.open(current).convert("RGB"), dtype=np.float32)
+    b = np.asarray(Image.open(baseline).convert("RGB"), dtype=np.float32)
+    if a.shape != b.shape:
+        return 1.0, None
+    diff = np.abs(a - b).mean(axis=2) / 255.0
+    h = diff.shape[0] // BLOCK_SIZE * BLOCK_SIZE
+    w = diff.shape[1] // BLOCK_SIZE * BLOCK_SIZE
+    blocks = diff[:h, :w].reshape(h // BLOCK_SIZE, BLOCK_SIZE, w // BLOCK_SIZE, BLOCK_SIZE).mean(axis=(1, 3))
+    return float(blocks.max()), diff
+
+
+def save_diff_image(diff: Any, path: Path) -> None:
+    import numpy as np
+    from PIL import Image
+
+    heat = np.zeros((*diff.shape, 3), dtype=np.uint8)
+    heat[..., 0] = np.clip(diff * 4 * 255, 0, 255).astype(np.uint8)
+    Image.fromarray(heat).save(path)
+
+
+def baseline_dir(scene_name: str, quality: str) -> Path:
+    return BASELINE_DIR / scene_name / quality
+
+
+def render_keyframes(
+    scene_file: str,
+    scene_name: str,
+    frames: list[Keyframe],
+    *,
+    quality: str,
+    media_dir: str,
+    out_dir: Path,
+    workers: int,
+) -> list[dict[str, Any]]:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    args = (quality, media_dir, str(out_dir))
+    if workers <= 1:
+        warm_caches([scene_file], media_dir)
+        return [render_keyframe(scene_file, scene_name, frame, *args) for frame in frames]
+    warm_caches([scene_file], media_dir)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_caches, initargs=([scene_file], media_dir)) as pool:
+        futures = [pool.submit(render_keyframe, scene_file, scene_name, frame, *args) for frame in frames]
+        for future in as_completed(futures):
+            results.append(future.result())
+    order = {frame.name: idx for idx, frame in enumerate(frames)}
+    results.sort(key=lambda r: order[r["name"]])
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: Path, tolerance: float) -> list[dict[str, Any]]:
+    manifest_path = baseline / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    approved = manifest.get("frames") or {}
+    report = []
+    for result in results:
+        expected = approved.get(result["name"])
+        row = {"name": result["name"], "path": result["path"], "score": 0.0}
+        baseline_png = baseline / f"{result['name']}.png"
+        if not expected or not baseline_png.exists():
+            row["status"] = "new"
+        elif expected == result["sha256"]:
+            row["status"] = "identical"
+        else:
+            score, diff = perceptual_score(Path(result["path"]), baseline_png)
+            row["score"] = round(score, 4)
+            row["status"] = "ok" if score <= tolerance else "diff"
+            if row["status"] == "diff" and diff is not None:
+                diff_path = Path(result["path"]).with_suffix(".diff.png")
+                save_diff_image(diff, diff_path)
+                row["diff"] = str(diff_path)
+        report.append(row)
+    return report
+
+
+def _selected_frames(args: argparse.Namespace, scene_cls: type) -> list[Keyframe]:
+    frames = keyframes(compile_plan(getattr(scene_cls, "scenario", None)))
+    if args.only:
+        wanted = set(args.only)
+        missing = wanted - {frame.name for frame in frames}
+        if missing:
+            raise SystemExit(f"Keyframes no encontrados: {', '.join(sorted(missing))}")
+        frames = [frame for frame in frames if frame.name in wanted]
+    return frames
+
+
+def cmd_list(args: argparse.Namespace) -> None:
+    plan = compile_plan(None)
+    for frame in keyframes(plan):
+        print(f"{frame.name:<26} play {frame.step:>3}  t={frame.time:7.2f}s")
+
+
+def _render_selected(args: argparse.Namespace) -> tuple[list[dict[str, Any]], Path]:
+    scene_cls = load_scene_class(Path(args.scene_file), args.scene_name)
+    frames = _selected_frames(args, scene_cls)
+    out_dir = Path(args.media_dir) / "snapshots" / Path(args.scene_file).stem / args.quality
+    workers = args.workers or min(len(frames), os.cpu_count() or 1)
+    started = time.perf_counter()
+    results = render_keyframes(
+        args.scene_file,
+        args.scene_name,
+        frames,
+        quality=args.quality,
+        media_dir=args.media_dir,
+        out_dir=out_dir,
+        workers=workers,
+    )
+    print(f"OK: {len(results)} keyframes en {time.perf_counter() - started:.1f}s con {workers} proceso(s)")
+    return results, out_dir
+
+
+def cmd_check(args: argparse.Namespace) -> None:
+    results, out_dir = _render_selected(args)
+    baseline = baseline_dir(args.scene_name, args.quality)
+    report = compare(results, baseline, args.tolerance)
+    (out_dir / "report.json").write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    for row in report:
+        extra = f" -> {row['diff']}" if "diff" in row else ""
+        print(f"{row['status']:<10} {row['score']:.4f}  {row['name']}{extra}")
+    failed = [row for row in report if row["status"] in ("diff", "new")]
+    if failed:
+        raise SystemExit(f"FALLA: {len(failed)} keyframe(s) distintos o sin baseline ({baseline.as_posix()})")
+    print(f"OK: sin regresiones contra {baseline.as_posix()}")
+
+
+def cmd_approve(args: argparse.Namespace) -> None:
+    results, _ = _render_selected(args)
+    baseline = baseline_dir(args.scene_name, args.quality)
+    baseline.mkdir(parents=True, exist_ok=True)
+    manifest_path = baseline / "manifest.json"
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    frames = manifest.get("frames") or {}
+    for result in results:
+        shutil.copyfile(result["path"], baseline / f"{result['name']}.png")
+        frames[result["name"]] = result["sha256"]
+    manifest = {"scene_file": Path(args.scene_file).name, "quality": args.quality, "frames": frames}
+    manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"OK: {len(results)} keyframes aprobados en {baseline.as_posix()}")
+
+
+def _add_render_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p.add_argument("--only", action="append", help="Keyframe name (repeatable)")
+    p.add_argument("-q", "--quality", default="l", choices=sorted(QUALITY_SIZES))
+    p.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (0 = one per core)")
+    p.add_argument("--media-dir", default="media")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="snapshot_check.py",
+        description="Render scene keyframes as PNGs in parallel and diff them against approved baselines",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_list = sub.add_parser("list", help="List keyframes (milestone ends, mid-transaction, Apache L1 reset)")
+    p_list.set_defaults(func=cmd_list)
+
+    p_check = sub.add_parser("check", help="Render keyframes and compare with the approved baseline")
+    _add_render_args(p_check)
+    p_check.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Max mean block difference (0..1)")
+    p_check.set_defaults(func=cmd_check)
+
+    p_approve = sub.add_parser("approve", help="Render keyframes and store them as the new baseline")
+    _add_render_args(p_approve)
+    p_approve.set_defaults(func=cmd_approve)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def repo_root(monkeypatch):
+    # cronos.yaml, variants.yaml e incidents.yaml se leen con rutas relativas a la raiz.
+    monkeypatch.chdir(ROOT)
+    return ROOT
+
+
+@pytest.fixture
+def plan_cache(tmp_path):
+    return tmp_path / "plans"
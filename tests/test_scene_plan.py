@@ -0,0 +1,116 @@
+import os
+import pickle
+import shutil
+
+import pytest
+import yaml
+
+import scene_plan
+from scene_plan import ScenarioError, compile_plan, plan_cache_key, prune_plan_cache
+
+
+def _pickles(cache_dir):
+    return sorted(cache_dir.glob("*.pickle"))
+
+
+def test_cache_key_is_stable_and_follows_overrides(repo_root):
+    assert plan_cache_key(None) == plan_cache_key({})
+    assert plan_cache_key({"title": "A"}) == plan_cache_key({"title": "A"})
+    assert plan_cache_key({"title": "A"}) != plan_cache_key({"title": "B"})
+
+
+def test_cache_key_follows_yaml_content(repo_root, tmp_path):
+    timeline = tmp_path / "cronos.yaml"
+    shutil.copyfile(repo_root / "cronos.yaml", timeline)
+    overrides = {"timeline_path": str(timeline)}
+    before = plan_cache_key(overrides)
+    data = yaml.safe_load(timeline.read_text(encoding="utf-8"))
+    data["timeline"]["milestones"][0]["detail"] = "otro detalle"
+    timeline.write_text(yaml.safe_dump(data, allow_unicode=True), encoding="utf-8")
+    assert plan_cache_key(overrides) != before
+
+
+def test_cache_key_follows_plan_sources(repo_root, monkeypatch):
+    before = plan_cache_key(None)
+    monkeypatch.setattr(scene_plan, "PLAN_SOURCES", ("scene_plan.py", "incident_sim.py"))
+    assert plan_cache_key(None) != before
+
+
+def test_compile_plan_reuses_the_cached_pickle(repo_root, plan_cache):
+    first = compile_plan(None, plan_cache)
+    [path] = _pickles(plan_cache)
+    assert path.stem == plan_cache_key(None)
+    # Un pickle marcado prueba que el segundo compile no reconstruye el plan.
+    first.scenario["_marca"] = True
+    path.write_bytes(pickle.dumps(first))
+    assert compile_plan(None, plan_cache).scenario["_marca"] is True
+
+
+def test_compile_plan_rebuilds_a_corrupt_pickle(repo_root, plan_cache):
+    compile_plan(None, plan_cache)
+    [path] = _pickles(plan_cache)
+    path.write_bytes(b"no es un pickle")
+    assert compile_plan(None, plan_cache).steps
+    assert pickle.loads(path.read_bytes()).steps
+
+
+def test_cache_hit_rechecks_scene_files(repo_root, plan_cache, tmp_path):
+    bins = tmp_path / "dia.npz"
+    bins.write_bytes(b"")
+    overrides = {"trace_bins": str(bins)}
+    compile_plan(overrides, plan_cache)
+    bins.unlink()
+    with pytest.raises(ScenarioError, match="trace_bins"):
+        compile_plan(overrides, plan_cache)
+
+
+def test_prune_keeps_the_most_recently_used(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"{i}.pickle"
+        path.write_bytes(b"")
+        os.utime(path, (1000 + i, 1000 + i))
+    prune_plan_cache(tmp_path, keep=2)
+    assert [p.stem for p in _pickles(tmp_path)] == ["3", "4"]
+
+
+def test_compile_plan_prunes_the_cache(repo_root, plan_cache, monkeypatch):
+    monkeypatch.setattr(scene_plan, "PLAN_CACHE_KEEP", 3)
+    for i in range(5):
+        compile_plan({"title": f"Escena {i}"}, plan_cache)
+    assert len(_pickles(plan_cache)) == 3
+
+
+def test_steps_are_contiguous(repo_root):
+    plan = compile_plan(None, None)
+    assert [step.index for step in plan.steps] == list(range(len(plan.steps)))
+    for prev, step in zip(plan.steps, plan.steps[1:]):
+        assert step.start == pytest.approx(prev.end)
+    assert len(plan.frame_counts(60)) == len(plan.steps)
+
+
+def test_story_without_deliveries_keeps_the_play_count(repo_root):
+    # Sin pagos entregados en f5_final la escena espera en vez de animar: mismos plays.
+    story = yaml.safe_load((repo_root / "incidents.yaml").read_text(encoding="utf-8"))
+    base = compile_plan({"incidents": story}, None)
+    story["events"].append({"at": 399, "type": "node_down", "node": "f5"})
+    broken = compile_plan({"incidents": story}, None)
+    assert not [tx for tx in broken.phase("f5_final") if tx.outcome == "delivered"]
+    assert len(broken.steps) == len(base.steps)
+    assert broken.steps[-2].name == "wait"
+
+
+@pytest.mark.parametrize("overrides", [None, {"captions": True}])
+def test_plan_steps_match_scene_plays(repo_root, overrides):
+    pytest.importorskip("manim")
+    from manim import tempconfig
+
+    from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, load_scene_class
+
+    scene_cls = load_scene_class(repo_root / DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME)
+    scene_cls = type(DEFAULT_SCENE_NAME, (scene_cls,), {"scenario": overrides})
+    with tempconfig({"dry_run": True, "quality": "low_quality"}):
+        scene = scene_cls()
+        scene.render()
+    plan = compile_plan(overrides, None)
+    assert scene.renderer.num_plays == len(plan.steps)
+    assert scene.renderer.time == pytest.approx(plan.duration)
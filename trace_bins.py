@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import time
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from trace_reader import TraceError, TraceRecord, iter_records, parse_timestamp, window
+
+
+# Un dia de produccion comprimido en el largo del video: miles de pagos por frame,
+# imposibles de dibujar uno a uno. Se agregan con NumPy por frame, ruta y resultado
+# (bincount por bloques, memoria acotada) y se guarda un .npz que la escena lee
+# directo; ademas se conservan algunos pagos individuales representativos.
+OUTCOME_CLASSES = ["delivered", "timeout_f5", "stuck_apache_l1", "timeout_other"]
+OUTCOME_LABELS = {
+    "delivered": "Entregados",
+    "timeout_f5": "Timeout F5",
+    "stuck_apache_l1": "Encolados Apache L1",
+    "timeout_other": "Otros timeouts",
+}
+MAX_ROUTES = 32
+OTHER_ROUTE = "otras"
+CHUNK_ROWS = 262_144
+SAMPLE_DTYPE = np.dtype([("frame", "i4"), ("route", "i2"), ("outcome", "i1"), ("ts", "f8"), ("latency_ms", "f4")])
+
+
+def outcome_class(record: TraceRecord) -> int:
+    if record.outcome == "delivered":
+        return 0
+    if "apache_l1" in record.route:
+        return 2
+    if record.route and record.route[-1] == "f5":
+        return 1
+    return 3
+
+
+@dataclass
+class TraceBins:
+    fps: float
+    start: float
+    end: float
+    routes: list[str]
+    counts: np.ndarray  # (frames, routes, outcomes) uint32
+    latency_sum: np.ndarray  # (frames,) ms
+    latency_n: np.ndarray  # (frames,)
+    samples: np.ndarray  # SAMPLE_DTYPE, ordenado por frame
+
+    @property
+    def frames(self) -> int:
+        return self.counts.shape[0]
+
+    @property
+    def seconds_per_frame(self) -> float:
+        # Segundos reales de la traza que representa cada frame.
+        return (self.end - self.start) / self.frames if self.frames else 0.0
+
+    def per_frame(self) -> np.ndarray:
+        return self.counts.sum(axis=1)
+
+    def cumulative(self) -> np.ndarray:
+        return np.cumsum(self.per_frame(), axis=0, dtype=np.uint64)
+
+    def mean_latency(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.latency_n > 0, self.latency_sum / np.maximum(self.latency_n, 1), np.nan)
+
+    def frame_at(self, t: float) -> int:
+        return max(0, min(self.frames - 1, int(t * self.fps)))
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            meta=np.array(json.dumps({"fps": self.fps, "start": self.start, "end": self.end, "routes": self.routes})),
+            counts=self.counts,
+            latency_sum=self.latency_sum,
+            latency_n=self.latency_n,
+            samples=self.samples,
+        )
+
+
+def load_bins(path: Path) -> TraceBins:
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        return TraceBins(
+            fps=float(meta["fps"]),
+            start=float(meta["start"]),
+            end=float(meta["end"]),
+            routes=list(meta["routes"]),
+            counts=data["counts"],
+            latency_sum=data["latency_sum"],
+            latency_n=data["latency_n"],
+            samples=data["samples"],
+        )
+
+
+class _Binner:
+    def __init__(self, start: float, end: float, frames: int, fps: float, sample_every: int) -> None:
+        self.start = start
+        self.scale = frames / (end - start)
+        self.frames = frames
+        self.fps = fps
+        self.routes: dict[tuple[str, ...], int] = {}
+        self.route_names: list[str] = []
+        self.counts = np.zeros((frames, MAX_ROUTES + 1, len(OUTCOME_CLASSES)), dtype=np.uint32)
+        self.latency_sum = np.zeros(frames, dtype=np.float64)
+        self.latency_n = np.zeros(frames, dtype=np.uint32)
+        # Un pago por (ventana de `sample_every` frames, resultado): el primero que llega.
+        self.sample_every = max(1, sample_every)
+        self.taken = np.zeros((math.ceil(frames / self.sample_every), len(OUTCOME_CLASSES)), dtype=bool)
+        self.samples: list[np.ndarray] = []
+        self._ts = array("d")
+        self._route = array("h")
+        self._outcome = array("b")
+        self._latency = array("f")
+        self._classes: dict[tuple[tuple[str, ...], str], tuple[int, int]] = {}
+
+    def route_index(self, route: tuple[str, ...]) -> int:
+        index = self.routes.get(route)
+        if index is None:
+            if len(self.route_names) < MAX_ROUTES:
+                index = len(self.route_names)
+                self.route_names.append(">".join(route))
+            else:
+                index = MAX_ROUTES
+            self.routes[route] = index
+        return index
+
+    def add(self, record: TraceRecord) -> None:
+        key = (record.route, record.outcome)
+        classes = self._classes.get(key)
+        if classes is None:
+            classes = self._classes[key] = (self.route_index(record.route), outcome_class(record))
+        self._ts.append(record.ts)
+        self._route.append(classes[0])
+        self._outcome.append(classes[1])
+        self._latency.append(math.nan if record.latency_ms is None else record.latency_ms)
+        if len(self._ts) >= CHUNK_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._ts:
+            return
+        ts = np.frombuffer(self._ts, dtype=np.float64)
+        route = np.frombuffer(self._route, dtype=np.int16)
+        outcome = np.frombuffer(self._outcome, dtype=np.int8)
+        latency = np.frombuffer(self._latency, dtype=np.float32)
+        frame = np.clip(((ts - self.start) * self.scale).astype(np.int64), 0, self.frames - 1)
+        shape = self.counts.shape
+        flat = (frame * shape[1] + route) * shape[2] + outcome
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(shape).astype(np.uint32)
+        has_latency = ~np.isnan(latency)
+        self.latency_sum += np.bincount(frame[has_latency], weights=latency[has_latency], minlength=self.frames)
+        self.latency_n += np.bincount(frame[has_latency], minlength=self.frames).astype(np.uint32)
+
+        slot = (frame // self.sample_every) * shape[2] + outcome
+        slots, first = np.unique(slot, return_index=True)
+        fresh = ~self.taken.reshape(-1)[slots]
+        picked = first[fresh]
+        if picked.size:
+            self.taken.reshape(-1)[slots[fresh]] = True
+            sample = np.empty(picked.size, dtype=SAMPLE_DTYPE)
+            sample["frame"] = frame[picked]
+            sample["route"] = route[picked]
+            sample["outcome"] = outcome[picked]
+            sample["ts"] = ts[picked]
+            sample["latency_ms"] = latency[picked]
+            self.samples.append(sample)
+        self._ts = array("d")
+        self._route = array("h")
+        self._outcome = array("b")
+        self._latency = array("f")
+
+    def result(self, end: float) -> TraceBins:
+        self.flush()
+        used = len(self.route_names)
+        overflow = bool(self.counts[:, MAX_ROUTES].any())
+        # Rutas mas alla de MAX_ROUTES quedan juntas en "otras", al final.
+        counts = self.counts[:, list(range(used)) + ([MAX_ROUTES] if overflow else [])]
+        samples = np.concatenate(self.samples) if self.samples else np.empty(0, dtype=SAMPLE_DTYPE)
+        samples.sort(order="frame")
+        if overflow:
+            samples["route"][samples["route"] == MAX_ROUTES] = used
+        return TraceBins(
+            fps=self.fps,
+            start=self.start,
+            end=end,
+            routes=self.route_names + ([OTHER_ROUTE] if overflow else []),
+            counts=counts,
+            latency_sum=self.latency_sum,
+            latency_n=self.latency_n,
+            samples=samples,
+        )
+
+
+def aggregate(
+    records: Iterable[TraceRecord],
+    *,
+    start: float,
+    end: float,
+    video_seconds: float,
+    fps: float,
+    sample_every: int | None = None,
+) -> TraceBins:
+    # Compresion = (end - start) / video_seconds segundos reales por segundo de video.
+    if end <= start:
+        raise TraceError("la ventana de la traza debe tener fin > inicio")
+    frames = max(1, math.ceil(video_seconds * fps - 1e-6))
+    binner = _Binner(start, end, frames, fps, sample_every or int(fps))
+    for record in window(records, start, end):
+        binner.add(record)
+    return binner.result(end)
+
+
+def trace_window(path: Path, fmt: str | None) -> tuple[float, float]:
+    # Sin --from/--to: primer y ultimo timestamp (una pasada extra, sin guardar filas).
+    first = last = None
+    for record in iter_records(path, fmt):
+        first = record.ts if first is None else min(first, record.ts)
+        last = record.ts if last is None else max(last, record.ts)
+    if first is None:
+        raise SystemExit(f"{path.as_posix()}: traza vacia")
+    return first, math.nextafter(last, math.inf)
+
+
+def cmd_build(args: argparse.Namespace) -> None:
+    trace = Path(args.trace)
+    started = time.perf_counter()
+    if args.start and args.end:
+        start, end = parse_timestamp(args.start), parse_timestamp(args.end)
+    else:
+        first, last = trace_window(trace, args.format)
+        start = parse_timestamp(args.start) if args.start else first
+        end = parse_timestamp(args.end) if args.end else last
+    seconds = args.seconds
+    if seconds is None:
+        from scene_plan import compile_plan
+
+        seconds = compile_plan(None).duration
+    bins = aggregate(
+        iter_records(trace, args.format),
+        start=start,
+        end=end,
+        video_seconds=seconds,
+        fps=args.fps,
+        sample_every=args.sample_every,
+    )
+    output = Path(args.output or Path("media/traces") / f"{trace.name.split('.')[0]}.npz")
+    bins.save(output)
+    totals = bins.per_frame().sum(axis=0)
+    summary = ", ".join(f"{OUTCOME_LABELS[name]} {int(n)}" for name, n in zip(OUTCOME_CLASSES, totals))
+    print(f"{bins.frames} frames a {bins.fps:g} fps, {bins.seconds_per_frame:.1f}s de traza por frame, {len(bins.routes)} rutas")
+    print(summary)
+    print(f"OK: {output.as_posix()} ({output.stat().st_size / 1024:.0f} KB, {len(bins.samples)} pagos de muestra) en {time.perf_counter() - started:.1f}s")
+
+
+def cmd_show(args: argparse.Namespace) -> None:
+    bins = load_bins(Path(args.bins))
+    per_frame = bins.per_frame()
+    step = max(1, int(round(bins.fps * args.every)))
+    print(f"{'seg':>6}" + "".join(f"{OUTCOME_LABELS[name][:14]:>16}" for name in OUTCOME_CLASSES) + f"{'lat ms':>9}")
+    for first in range(0, bins.frames, step):
+        block = per_frame[first : first + step].sum(axis=0)
+        lat_n = bins.latency_n[first : first + step].sum()
+        lat = bins.latency_sum[first : first + step].sum() / lat_n if lat_n else float("nan")
+        print(f"{first / bins.fps:>6.1f}" + "".join(f"{int(n):>16}" for n in block) + f"{lat:>9.0f}")
+    print(f"OK: {bins.frames} frames, {len(bins.routes)} rutas, {len(bins.samples)} muestras")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="trace_bins.py",
+        description="Bin a payment trace into per-frame, per-route, per-outcome counts (NumPy) for the scene overlay",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_build = sub.add_parser("build", help="Aggregate a CSV/JSONL trace into an .npz")
+    p_build.add_argument("trace")
+    p_build.add_argument("-o", "--output", help="Default: media/traces/<trace>.npz")
+    p_build.add_argument("--format", choices=["csv", "jsonl"])
+    p_build.add_argument("--from", dest="start", help="Window start (default: first record)")
+    p_build.add_argument("--to", dest="end", help="Window end (default: last record)")
+    p_build.add_argument("--seconds", type=float, help="Video length the window is compressed into (default: scene duration)")
+    p_build.add_argument("--fps", type=float, default=15)
+    p_build.add_argument("--sample-every", type=int, help="Keep one payment per outcome every N frames (default: 1 per second)")
+    p_build.set_defaults(func=cmd_build)
+
+    p_show = sub.add_parser("show", help="Per-second table of an .npz")
+    p_show.add_argument("bins")
+    p_show.add_argument("--every", type=float, default=5.0, help="Seconds of video per row")
+    p_show.set_defaults(func=cmd_show)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    try:
+        args.func(args)
+    except TraceError as exc:
+        print(f"FALLA: {exc}")
+        raise SystemExit(1) from None
+
+
+if __name__ == "__main__":
+    main()
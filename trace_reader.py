@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import functools
+import gzip
+import json
+import math
+import mmap
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+
+# Trazas reales de pagos LBTR (logs de MDP/F5/OSB exportados a CSV o JSONL).
+# Se leen registro a registro con un generador sobre mmap: la memoria no crece
+# con el archivo (decenas de millones de filas), y un escenario que pide 16
+# transacciones deja de leer apenas las tiene.
+#
+# Columnas reconocidas (CSV con encabezado o claves JSON):
+#   timestamp | ts | time        epoch en segundos o ISO 8601
+#   route | hops | path          "MDP>F5>OSB M1>Tux A>Tandem A" (CSV) o lista (JSONL)
+#   outcome | status | result    ok/delivered/success | timeout/error/failed
+#   latency_ms | latency         opcional
+#   id | tx_id                   opcional
+FIELD_ALIASES = {
+    "timestamp": ("timestamp", "ts", "time"),
+    "route": ("route", "hops", "path"),
+    "outcome": ("outcome", "status", "result"),
+    "latency_ms": ("latency_ms", "latency"),
+    "id": ("id", "tx_id"),
+}
+OUTCOMES = {
+    "ok": "delivered",
+    "delivered": "delivered",
+    "success": "delivered",
+    "exitoso": "delivered",
+    "timeout": "timeout",
+    "error": "timeout",
+    "failed": "timeout",
+    "fallido": "timeout",
+}
+HOP_ALIASES = {
+    "apache_proxy_m1": "apache_m1",
+    "apache_proxy_l1": "apache_l1",
+    "tuxedo_a": "tux_a",
+    "tuxedo_l": "tux_l",
+}
+ROUTE_SEPARATORS = re.compile(r"\s*(?:>|\||->)\s*")
+# Histograma logaritmico de latencias (1 ms .. ~1000 s): percentiles sin guardar filas.
+LATENCY_BUCKETS_PER_DECADE = 20
+
+
+class TraceError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class TraceRecord:
+    ts: float
+    route: tuple[str, ...]
+    outcome: str
+    latency_ms: float | None = None
+    id: str = ""
+
+
+@functools.lru_cache(maxsize=4096)
+def node_id(hop: str) -> str:
+    key = re.sub(r"[^a-z0-9]+", "_", hop.strip().lower()).strip("_")
+    return HOP_ALIASES.get(key, key)
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_route(raw: str) -> tuple[str, ...]:
+    # Las rutas se repiten en millones de filas: se normalizan una sola vez.
+    return tuple(node_id(hop) for hop in ROUTE_SEPARATORS.split(raw.strip()) if hop)
+
+
+def parse_timestamp(raw: Any) -> float:
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        return float(raw)
+    text = str(raw).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(text)
+    except ValueError:
+        raise TraceError(f"timestamp invalido {text!r} (usar ISO 8601 o epoch)") from None
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.timestamp()
+
+
+def _mapped_lines(path: Path) -> Iterator[bytes]:
+    if path.suffix == ".gz":
+        # gzip no se puede mapear: mismo generador, leyendo por bloques.
+        with gzip.open(path, "rb") as handle:
+            for line in handle:
+                yield line.rstrip(b"\r\n")
+        return
+    with path.open("rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        if size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            pos = 0
+            while pos < size:
+                end = mm.find(b"\n", pos)
+                if end == -1:
+                    end = size
+                yield mm[pos:end].rstrip(b"\r")
+                pos = end + 1
+
+
+def _resolve_columns(keys: Iterable[str], where: str) -> dict[str, str]:
+    available = {key.strip().lower(): key for key in keys}
+    columns = {}
+    for field, aliases in FIELD_ALIASES.items():
+        match = next((available[a] for a in aliases if a in available), None)
+        if match is not None:
+            columns[field] = match
+    missing = [f for f in ("timestamp", "route", "outcome") if f not in columns]
+    if missing:
+        raise TraceError(f"{where}: faltan columnas {', '.join(missing)}")
+    return columns
+
+
+def _record(row: dict[str, Any], columns: dict[str, str], where: str) -> TraceRecord:
+    try:
+        route = row[columns["route"]]
+        outcome_raw = str(row[columns["outcome"]]).strip().lower()
+        outcome = OUTCOMES.get(outcome_raw)
+        if outcome is None:
+            raise TraceError(f"{where}: outcome desconocido {outcome_raw!r}")
+        latency = row.get(columns["latency_ms"]) if "latency_ms" in columns else None
+        return TraceRecord(
+            ts=parse_timestamp(row[columns["timestamp"]]),
+            route=tuple(node_id(str(h)) for h in route if str(h).strip()) if isinstance(route, list) else parse_route(str(route)),
+            outcome=outcome,
+            latency_ms=float(latency) if latency not in (None, "") else None,
+            id=str(row.get(columns["id"], "")) if "id" in columns else "",
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        if isinstance(exc, TraceError) and str(exc).startswith(where):
+            raise
+        raise TraceError(f"{where}: registro invalido ({exc})") from None
+
+
+def record_from_json(raw: bytes | str, where: str = "feed") -> TraceRecord:
+    # Un evento suelto (socket o tail de JSONL): mismas columnas y alias que un archivo.
+    try:
+        row = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise TraceError(f"{where}: JSON invalido ({exc.msg})") from None
+    if not isinstance(row, dict):
+        raise TraceError(f"{where}: se esperaba un objeto JSON")
+    return _record(row, _resolve_columns(row, where), where)
+
+
+def detect_format(path: Path) -> str:
+    name = path.name[:-3] if path.suffix == ".gz" else path.name
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise TraceError(f"{path.as_posix()}: formato no reconocido (usar .csv o .jsonl, opcional .gz)")
+
+
+def iter_records(path: Path, fmt: str | None = None, *, strict: bool = False) -> Iterator[TraceRecord]:
+    # Registros en el orden del archivo. Con strict=False las filas invalidas se
+    # saltan (logs de produccion traen basura); con strict=True se corta en la primera.
+    path = Path(path)
+    fmt = fmt or detect_format(path)
+    lines = _mapped_lines(path)
+    if fmt == "jsonl":
+        columns: dict[str, str] | None = None
+        for number, raw in enumerate(lines, start=1):
+            if not raw.strip():
+                continue
+            where = f"{path.name}:{number}"
+            try:
+                row = json.loads(raw)
+            except json.JSONDecodeError as exc:
+                if strict:
+                    raise TraceError(f"{where}: JSON invalido ({exc.msg})") from None
+                continue
+            if not isinstance(row, dict):
+                if strict:
+                    raise TraceError(f"{where}: se esperaba un objeto JSON")
+                continue
+            if columns is None:
+                columns = _resolve_columns(row, where)
+            try:
+                yield _record(row, columns, where)
+            except TraceError:
+                if strict:
+                    raise
+        return
+    # Cada linea termina en "\n" para que csv arme los campos con comillas multilinea.
+    reader = csv.reader(line.decode("utf-8", errors="replace") + "\n" for line in lines)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _resolve_columns(header, f"{path.name}:1")
+    for number, values in enumerate(reader, start=2):
+        if not values:
+            continue
+        try:
+            yield _record(dict(zip(header, values)), columns, f"{path.name}:{number}")
+        except TraceError:
+            if strict:
+                raise
+
+
+def window(records: Iterable[TraceRecord], start: float | None = None, end: float | None = None) -> Iterator[TraceRecord]:
+    for record in records:
+        if start is not None and record.ts < start:
+            continue
+        if end is not None and record.ts >= end:
+            continue
+        yield record
+
+
+def scenario_from_trace(trace: dict[str, Any], node_ids: set[str]) -> dict[str, Any]:
+    # Primeras `limit` transacciones de la ventana -> hito inicial de la escena:
+    # cantidad, cuales quedan en timeout y la ruta real de cada pago exitoso
+    # (si pasa por nodos que la topologia no tiene, se usa la ruta ciclica por defecto).
+    path = Path(trace["path"])
+    start = parse_timestamp(trace["from"]) if trace.get("from") else None
+    end = parse_timestamp(trace["to"]) if trace.get("to") else None
+    limit = int(trace.get("limit") or 16)
+    selected = []
+    for record in window(iter_records(path, trace.get("format")), start, end):
+        selected.append(record)
+        if len(selected) >= limit:
+            break
+    if len(selected) < 2:
+        raise TraceError(f"{path.as_posix()}: la ventana tiene {len(selected)} transacciones (minimo 2)")
+    routes = [list(r.route) if r.outcome == "delivered" and set(r.route) <= node_ids else None for r in selected]
+    return {
+        "transactions": len(selected),
+        "failures": {"f5_stuck_indices": [i for i, r in enumerate(selected) if r.outcome == "timeout"]},
+        "f5_routes": routes,
+    }
+
+
+class LatencyHistogram:
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.total = 0
+
+    def add(self, latency_ms: float) -> None:
+        bucket = math.floor(math.log10(max(latency_ms, 1.0)) * LATENCY_BUCKETS_PER_DECADE)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+
+    def percentile(self, q: float) -> float | None:
+        if not self.total:
+            return None
+        target = q * self.total
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return 10 ** ((bucket + 1) / LATENCY_BUCKETS_PER_DECADE)
+        return None
+
+
+def trace_stats(records: Iterable[TraceRecord]) -> dict[str, Any]:
+    rows = 0
+    outcomes: dict[str, int] = {}
+    routes: dict[str, int] = {}
+    latencies = LatencyHistogram()
+    first = last = None
+    for record in records:
+        rows += 1
+        outcomes[record.outcome] = outcomes.get(record.outcome, 0) + 1
+        key = ">".join(record.route)
+        # Tope de rutas distintas: un log con ids en la ruta no debe llenar la memoria.
+        if key in routes or len(routes) < 1000:
+            routes[key] = routes.get(key, 0) + 1
+        if record.latency_ms is not None:
+            latencies.add(record.latency_ms)
+        first = record.ts if first is None else min(first, record.ts)
+        last = record.ts if last is None else max(last, record.ts)
+    return {
+        "rows": rows,
+        "first": first,
+        "last": last,
+        "outcomes": outcomes,
+        "routes": dict(sorted(routes.items(), key=lambda item: -item[1])[:10]),
+        "latency_ms": {f"p{int(q * 100)}": latencies.percentile(q) for q in (0.5, 0.95, 0.99)},
+    }
+
+
+def _iso(ts: float | None) -> str:
+    return "-" if ts is None else datetime.fromtimestamp(ts, timezone.utc).astimezone().isoformat(timespec="seconds")
+
+
+def cmd_stats(args: argparse.Namespace) -> None:
+    start = parse_timestamp(args.start) if args.start else None
+    end = parse_timestamp(args.end) if args.end else None
+    stats = trace_stats(window(iter_records(Path(args.trace), args.format, strict=args.strict), start, end))
+    print(f"filas      {stats['rows']}")
+    print(f"desde      {_iso(stats['first'])}")
+    print(f"hasta      {_iso(stats['last'])}")
+    for outcome, count in sorted(stats["outcomes"].items()):
+        print(f"{outcome:<10} {count} ({count / max(1, stats['rows']):.1%})")
+    latency = "  ".join(f"{k} {v:.0f} ms" if v is not None else f"{k} -" for k, v in stats["latency_ms"].items())
+    print(f"latencia   {latency}")
+    print("rutas mas frecuentes:")
+    for route, count in stats["routes"].items():
+        print(f"  {count:>10}  {route}")
+
+
+def cmd_scenario(args: argparse.Namespace) -> None:
+    from scene_plan import compile_plan
+
+    trace = {"path": args.trace, "from": args.start, "to": args.end, "limit": args.limit, "format": args.format}
+    trace = {k: v for k, v in trace.items() if v is not None}
+    plan = compile_plan({"trace": trace})
+    initial = plan.phase("f5_initial")
+    timeouts = sum(1 for tx in initial if tx.outcome == "timeout")
+    print(json.dumps({"trace": trace}, ensure_ascii=False))
+    print(f"OK: {len(initial)} transacciones ({timeouts} timeout), {len(plan.steps)} plays, {plan.duration:.2f}s")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="trace_reader.py",
+        description="Stream real LBTR payment traces (CSV/JSONL, optionally .gz) and turn a time window into a scene scenario",
+    )
+    p.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_stats = sub.add_parser("stats", help="Rows, outcomes, latency percentiles and top routes in one pass")
+    p_stats.add_argument("trace")
+    p_stats.add_argument("--from", dest="start", help="ISO 8601 or epoch")
+    p_stats.add_argument("--to", dest="end")
+    p_stats.add_argument("--strict", action="store_true", help="Fail on the first invalid row")
+    p_stats.set_defaults(func=cmd_stats)
+
+    p_scn = sub.add_parser("scenario", help="Print the `trace` scenario entry for a window and check its plan")
+    p_scn.add_argument("trace")
+    p_scn.add_argument("--from", dest="start")
+    p_scn.add_argument("--to", dest="end")
+    p_scn.add_argument("--limit", type=int, default=16, help="Transactions shown in the initial milestone")
+    p_scn.set_defaults(func=cmd_scenario)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    try:
+        args.func(args)
+    except TraceError as exc:
+        print(f"FALLA: {exc}")
+        raise SystemExit(1) from None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from render_variants import quality_config
+from scene_loader import DEFAULT_SCENE_FILE, DEFAULT_SCENE_NAME, load_scene_module
+
+
+ALL_SECTIONS = None
+
+
+def _read_yaml(path: Path) -> dict[str, Any]:
+    if not path.exists():
+        return {}
+    try:
+        return yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    except yaml.YAMLError as exc:
+        print(f"AVISO: {path.as_posix()} invalido, se ignora el cambio: {exc}")
+        return {}
+
+
+def timeline_changes(old: dict[str, Any], new: dict[str, Any]) -> set[int] | None:
+    old_tl = old.get("timeline") or {}
+    new_tl = new.get("timeline") or {}
+    old_ms = old_tl.get("milestones") or []
+    new_ms = new_tl.get("milestones") or []
+    if len(old_ms) != len(new_ms):
+        return ALL_SECTIONS
+    affected: set[int] = set()
+    for idx, (before, after) in enumerate(zip(old_ms, new_ms)):
+        before = before or {}
+        after = after or {}
+        # Las etiquetas y fechas se ven en la linea de tiempo de todos los hitos.
+        if before.get("label") != after.get("label"):
+            return ALL_SECTIONS
+        # `title`/`detail` solo se muestran mientras ese hito es el actual.
+        if before.get("title") != after.get("title") or before.get("detail") != after.get("detail"):
+            affected.add(idx)
+    # `duration_seconds` no se dibuja; cualquier otra clave nueva puede afectar todo.
+    for key in (set(old_tl) | set(new_tl)) - {"milestones", "duration_seconds"}:
+        if old_tl.get(key) != new_tl.get(key):
+            return ALL_SECTIONS
+    return affected
+
+
+def visual_changes(
+    old: dict[str, Any],
+    new: dict[str, Any],
+    section_features: dict[int, set[str]],
+) -> set[int] | None:
+    affected: set[int] = set()
+    for key in set(old) | set(new):
+        if old.get(key) == new.get(key):
+            continue
+        sections = {idx for idx, features in section_features.items() if key in features}
+        if not sections:
+            # Clave que no sabemos ubicar: mejor re-renderizar todo que mostrar un preview viejo.
+            return ALL_SECTIONS
+        affected |= sections
+    return affected
+
+
+def merge_sections(current: set[int] | None, extra: set[int] | None) -> set[int] | None:
+    if current is ALL_SECTIONS or extra is ALL_SECTIONS:
+        return ALL_SECTIONS
+    return current | extra
+
+
+class PreviewWatcher:
+    def __init__(
+        self,
+        *,
+        scene_file: Path,
+        scene_name: str,
+        timeline_path: Path,
+        visual_path: Path,
+        quality: str,
+        media_dir: str,
+    ) -> None:
+        self.scene_file = scene_file
+        self.scene_name = scene_name
+        self.timeline_path = timeline_path
+        self.visual_path = visual_path
+        self.quality = quality
+        self.media_dir = media_dir
+        # El plan (layout, rutas, tiempos) vive fuera de la escena; cambiarlo equivale a cambiar el script.
+        self.plan_file = scene_file.parent / "scene_plan.py"
+        self.paths = [scene_file, self.plan_file, timeline_path, visual_path]
+        self.mtimes = {path: self._mtime(path) for path in self.paths}
+        self.timeline = _read_yaml(timeline_path)
+        self.visual = _read_yaml(visual_path)
+        self.module: Any = None
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _load_module(self, reload: bool) -> Any:
+        if reload or self.module is None:
+            module_name = ".".join(self.scene_file.with_suffix("").parts)
+            sys.modules.pop(module_name, None)
+            sys.modules.pop("scene_plan", None)
+            self.module = load_scene_module(self.scene_file)
+        return self.module
+
+    def changed_paths(self) -> list[Path]:
+        changed = []
+        for path in self.paths:
+            mtime = self._mtime(path)
+            if mtime != self.mtimes[path]:
+                self.mtimes[path] = mtime
+                changed.append(path)
+        return changed
+
+    def affected_sections(self, changed: list[Path]) -> set[int] | None:
+        affected: set[int] | None = set()
+        if self.scene_file in changed or self.plan_file in changed:
+            affected = ALL_SECTIONS
+        if self.timeline_path in changed:
+            new = _read_yaml(self.timeline_path)
+            affected = merge_sections(affected, timeline_changes(self.timeline, new))
+            self.timeline = new
+        if self.visual_path in changed:
+            new = _read_yaml(self.visual_path)
+            # Import diferido: tras recargar la escena, sys.modules tiene el scene_plan vigente.
+            from scene_plan import SECTION_FEATURES
+
+            affected = merge_sections(affected, visual_changes(self.visual, new, SECTION_FEATURES))
+            self.visual = new
+        return affected
+
+    def render(self, sections: set[int] | None, *, reload: bool) -> Path | None:
+        from manim import tempconfig
+
+        module = self._load_module(reload)
+        scene_cls = getattr(module, self.scene_name)
+        # Un YAML por defecto que no existe se omite: el plan usa sus valores por defecto.
+        scenario = {
+            key: str(path)
+            for key, path, default in (
+                ("timeline_path", self.timeline_path, "cronos.yaml"),
+                ("visual_path", self.visual_path, "archMDP-ASIS.yaml"),
+            )
+            if path.exists() or path != Path(default)
+        }
+        preview_cls = type(self.scene_name, (scene_cls,), {"scenario": scenario, "render_sections": sections})
+        temp = quality_config(self.quality, self.media_dir) | {
+            "input_file": str(self.scene_file),
+            "output_file": f"{self.scene_name}.watch",
+            "save_sections": True,
+        }
+        started = time.perf_counter()
+        with tempconfig(temp):
+            scene = preview_cls()
+            scene.render()
+            writer = scene.renderer.file_writer
+            ext = f".{temp['format']}"
+            # Cada hito queda en su propio archivo; los no renderizados conservan el de la pasada anterior.
+            section_files = []
+            for idx, section in enumerate(writer.sections):
+                path = writer.sections_output_dir / f"{writer.output_name}_{idx:04}_{section.name}{ext}"
+                if path.exists():
+                    section_files.append(str(path))
+            if not section_files:
+                return None
+            preview = writer.movie_file_path.with_name(f"{self.scene_name}.preview{ext}")
+            writer.combine_files(section_files, preview)
+        label = "todos" if sections is None else ", ".join(f"hito_{i}" for i in sorted(sections))
+        print(f"OK: preview ({label}) en {time.perf_counter() - started:.1f}s -> {preview.as_posix()}")
+        return preview
+
+    def _render_checked(self, sections: set[int] | None, *, reload: bool) -> None:
+        try:
+            self.render(sections, reload=reload)
+        except Exception as exc:
+            # El modulo se recarga con la escena: la clase vigente es la de sys.modules.
+            import scene_plan
+
+            if not isinstance(exc, scene_plan.ScenarioError):
+                raise
+            print("FALLA: escenario invalido, se reintenta al siguiente guardado")
+            for error in exc.errors:
+                print(f"  - {error}")
+
+    def watch(self, interval: float, settle: float) -> None:
+        self._render_checked(ALL_SECTIONS, reload=False)
+        print(f"Observando {', '.join(p.as_posix() for p in self.paths)} (Ctrl+C para salir)")
+        while True:
+            time.sleep(interval)
+            changed = self.changed_paths()
+            if not changed:
+                continue
+            # Los editores guardan en varias escrituras: se espera a que el mtime se estabilice.
+            time.sleep(settle)
+            changed = sorted(set(changed) | set(self.changed_paths()), key=self.paths.index)
+            sections = self.affected_sections(changed)
+            if sections is not None and not sections:
+                print(f"Sin hitos afectados por {', '.join(p.as_posix() for p in changed)}")
+                continue
+            try:
+                self._render_checked(sections, reload=self.scene_file in changed or self.plan_file in changed)
+            except Exception as exc:
+                # Un error de sintaxis/YAML no debe matar el watch; se reintenta al siguiente guardado.
+                print(f"ERROR: render fallo: {exc}")
+
+
+def cmd_watch(args: argparse.Namespace) -> None:
+    watcher = PreviewWatcher(
+        scene_file=Path(args.scene_file),
+        scene_name=args.scene_name,
+        timeline_path=Path(args.timeline),
+        visual_path=Path(args.visual),
+        quality=args.quality,
+        media_dir=args.media_dir,
+    )
+    try:
+        watcher.watch(args.interval, args.settle)
+    except KeyboardInterrupt:
+        print("OK: watch detenido")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="watch_render.py",
+        description="Watch scene/YAML files and re-render only the affected milestone sections at draft quality",
+    )
+    p.add_argument("scene_file", nargs="?", default=DEFAULT_SCENE_FILE)
+    p.add_argument("scene_name", nargs="?", default=DEFAULT_SCENE_NAME)
+    p.add_argument("--timeline", default="cronos.yaml")
+    p.add_argument("--visual", default="archMDP-ASIS.yaml")
+    p.add_argument("-q", "--quality", default="l", choices=["l", "m"])
+    p.add_argument("--media-dir", default="media")
+    p.add_argument("--interval", type=float, default=0.5, help="Polling interval in seconds")
+    p.add_argument("--settle", type=float, default=0.3, help="Wait after a change before rendering")
+    p.set_defaults(func=cmd_watch)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
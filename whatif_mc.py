@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import yaml
+
+
+# What-if de timeouts y failover: el camino MDP -> F5/Apache -> OSB -> Tux -> Tandem
+# como estaciones en serie (c servidores FIFO, servicio exponencial, umbral de
+# timeout, ventana opcional de caida). Cada punto del barrido simula miles de
+# replicas a la vez en NumPy (vectorizado sobre replicas, secuencial sobre pagos)
+# y los puntos del barrido se reparten en un pool de procesos.
+DEFAULT_MODEL: dict[str, Any] = {
+    "payments": 16,
+    "arrival_rate": 4.0,  # pagos por segundo (Poisson)
+    "route": "f5",
+    "stations": {
+        "f5": {"servers": 1, "service_ms": 220, "timeout_ms": 1500},
+        "apache_l1": {"servers": 1, "service_ms": 150, "timeout_ms": 3000},
+        "osb": {"servers": 8, "service_ms": 400, "timeout_ms": 5000},
+        "tux": {"servers": 2, "service_ms": 120, "timeout_ms": 5000},
+        "tandem": {"servers": 1, "service_ms": 60, "timeout_ms": 5000},
+    },
+}
+ROUTES = {
+    "f5": ["f5", "osb", "tux", "tandem"],
+    "apache_l1": ["apache_l1", "osb", "tux", "tandem"],
+}
+STATION_KEYS = {"servers", "service_ms", "timeout_ms", "outage"}
+DEFAULT_REPLICATIONS = 10_000
+RESULTS_DIR = Path("media/whatif")
+
+
+def parse_value(raw: str) -> Any:
+    return yaml.safe_load(raw)
+
+
+def apply_params(model: dict[str, Any], params: dict[str, Any]) -> dict[str, Any]:
+    # Claves con punto: "f5.servers=2", "osb.outage=[10, 30]", "arrival_rate=6".
+    model = json.loads(json.dumps(model))
+    for key, value in params.items():
+        parts = key.split(".")
+        if len(parts) == 1:
+            if key not in model:
+                raise ValueError(f"parametro desconocido: {key}")
+            model[key] = value
+        elif len(parts) == 2 and parts[0] in model["stations"] and parts[1] in STATION_KEYS:
+            model["stations"][parts[0]][parts[1]] = value
+        else:
+            raise ValueError(f"parametro desconocido: {key}")
+    if model["route"] not in ROUTES:
+        raise ValueError(f"route debe ser uno de {', '.join(ROUTES)}")
+    if not _is_int(model["payments"]) or model["payments"] < 1:
+        raise ValueError("payments debe ser un entero >= 1")
+    if not _is_number(model["arrival_rate"]) or model["arrival_rate"] <= 0:
+        raise ValueError("arrival_rate debe ser un numero > 0")
+    for name, station in model["stations"].items():
+        if not _is_int(station["servers"]) or station["servers"] < 1:
+            raise ValueError(f"{name}.servers debe ser un entero >= 1")
+        for key in ("service_ms", "timeout_ms"):
+            if not _is_number(station[key]) or station[key] <= 0:
+                raise ValueError(f"{name}.{key} debe ser un numero > 0")
+        outage = station.get("outage")
+        if outage is not None and not (
+            isinstance(outage, list) and len(outage) == 2 and all(_is_number(v) and v >= 0 for v in outage)
+        ):
+            raise ValueError(f"{name}.outage debe ser [inicio, duracion] en segundos")
+    return model
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def run_station(
+    arrivals: np.ndarray,
+    rng: np.random.Generator,
+    *,
+    servers: int,
+    service_ms: float,
+    timeout_ms: float,
+    outage: list[float] | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    # arrivals (R, N) en segundos, inf = el pago ya no llega (timeout antes).
+    # Devuelve (salidas con inf para los que hacen timeout aqui, mascara de timeout).
+    replications, payments = arrivals.shape
+    order = np.argsort(arrivals, axis=1, kind="stable")
+    arrived = np.take_along_axis(arrivals, order, axis=1)
+    service = rng.exponential(service_ms / 1000.0, size=arrived.shape)
+    free = np.zeros((replications, int(servers)))
+    done = np.full(arrived.shape, np.inf)
+    rows = np.arange(replications)
+    for n in range(payments):
+        at = arrived[:, n]
+        live = np.isfinite(at)
+        server = free.argmin(axis=1)
+        start = np.maximum(at, free[rows, server])
+        if outage:
+            down_from, down_for = float(outage[0]), float(outage[1])
+            start = np.where((start >= down_from) & (start < down_from + down_for), down_from + down_for, start)
+        end = start + service[:, n]
+        # El backend termina el trabajo aunque el cliente ya haya cortado por timeout.
+        free[rows, server] = np.where(live, end, free[rows, server])
+        done[:, n] = np.where(live, end, np.inf)
+    with np.errstate(invalid="ignore"):
+        timed_out = np.isfinite(arrived) & (done - arrived > timeout_ms / 1000.0)
+    leaving = np.where(timed_out, np.inf, done)
+    out = np.empty_like(leaving)
+    mask = np.empty_like(timed_out)
+    np.put_along_axis(out, order, leaving, axis=1)
+    np.put_along_axis(mask, order, timed_out, axis=1)
+    return out, mask
+
+
+def simulate(model: dict[str, Any], replications: int, seed: int) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    payments = int(model["payments"])
+    gaps = rng.exponential(1.0 / float(model["arrival_rate"]), size=(replications, payments))
+    arrivals = np.cumsum(gaps, axis=1)
+    current = arrivals
+    stuck_at = np.full((replications, payments), -1, dtype=np.int8)
+    for idx, name in enumerate(ROUTES[model["route"]]):
+        station = model["stations"][name]
+        current, timed_out = run_station(
+            current,
+            rng,
+            servers=station["servers"],
+            service_ms=station["service_ms"],
+            timeout_ms=station["timeout_ms"],
+            outage=station.get("outage"),
+        )
+        stuck_at[timed_out] = idx
+    return {"arrivals": arrivals, "finished": current, "stuck_at": stuck_at}
+
+
+def summarize(model: dict[str, Any], result: dict[str, np.ndarray]) -> dict[str, Any]:
+    stuck_at = result["stuck_at"]
+    route = ROUTES[model["route"]]
+    payments = stuck_at.shape[1]
+    stations = {}
+    for idx, name in enumerate(route):
+        counts = (stuck_at == idx).sum(axis=1)
+        stations[name] = {
+            "mean": round(float(counts.mean()), 3),
+            "p5": int(np.percentile(counts, 5)),
+            "p50": int(np.percentile(counts, 50)),
+            "p95": int(np.percentile(counts, 95)),
+            "p_any": round(float((counts > 0).mean()), 4),
+            "histogram": np.bincount(counts, minlength=payments + 1).tolist(),
+        }
+    latency = (result["finished"] - result["arrivals"])[stuck_at < 0] * 1000.0
+    first = route[0]
+    # Replica representativa para la escena: la mediana de pagos sin entregar (en
+    # cualquier estacion, igual que lo que se emite) entre las replicas que la escena
+    # puede contar (al menos 1 atascado y 1 entregado).
+    stuck_counts = (stuck_at >= 0).sum(axis=1)
+    showable = (stuck_counts > 0) & (stuck_counts < payments)
+    note = ""
+    if not showable.any():
+        showable[:] = True
+        note = " (ninguna mostrable: se ajusta a 1 atascado y 1 entregado como minimo)"
+    median = int(np.percentile(stuck_counts[showable], 50, method="lower"))
+    representative = int(np.argmax((stuck_counts == median) & showable))
+    stuck_indices = np.flatnonzero(stuck_at[representative] >= 0).tolist()
+    if not stuck_indices:
+        stuck_indices = [0]
+    elif len(stuck_indices) >= payments:
+        stuck_indices = stuck_indices[:-1]
+    scenario: dict[str, Any] = {"transactions": payments}
+    if first == "f5":
+        scenario["failures"] = {"f5_stuck_indices": stuck_indices}
+    else:
+        scenario["failures"] = {"apache_l1_queued": max(1, len(stuck_indices))}
+    return {
+        "model": model,
+        "replications": int(stuck_at.shape[0]),
+        "delivered": round(float((stuck_at < 0).mean()), 4),
+        "latency_ms": {
+            f"p{q}": round(float(np.percentile(latency, q)), 1) if latency.size else None for q in (50, 95, 99)
+        },
+        "stations": stations,
+        "scenario": scenario,
+        "scenario_note": f"replica {representative}, mediana de {int(showable.sum())} replicas mostrables{note}",
+    }
+
+
+def run_point(params: dict[str, Any], replications: int, seed: int) -> dict[str, Any]:
+    model = apply_params(DEFAULT_MODEL, params)
+    started = time.perf_counter()
+    summary = summarize(model, simulate(model, replications, seed))
+    return {"params": params, "seconds": round(time.perf_counter() - started, 3)} | summary
+
+
+def sweep_points(sweeps: list[str], fixed: dict[str, Any]) -> list[dict[str, Any]]:
+    axes = []
+    for raw in sweeps:
+        key, _, values = raw.partition("=")
+        if not values:
+            raise SystemExit(f"barrido invalido: {raw} (ej: f5.servers=1,2,3)")
+        axes.append([(key, parse_value(v)) for v in values.split(",")])
+    return [fixed | dict(combo) for combo in itertools.product(*axes)] if axes else [fixed]
+
+
+def parse_params(raw: list[str] | None) -> dict[str, Any]:
+    params = {}
+    for item in raw or []:
+        key, _, value = item.partition("=")
+        if not value:
+            raise SystemExit(f"parametro invalido: {item} (ej: arrival_rate=6)")
+        params[key] = parse_value(value)
+    return params
+
+
+def print_point(point: dict[str, Any]) -> None:
+    params = " ".join(f"{k}={v}" for k, v in point["params"].items()) or "(base)"
+    first, stats = next(iter(point["stations"].items()))
+    print(
+        f"{params:<40} entregados {point['delivered']:6.1%}  timeouts {first} "
+        f"media {stats['mean']:5.2f} p5/p50/p95 {stats['p5']}/{stats['p50']}/{stats['p95']}  "
+        f"P(>0) {stats['p_any']:5.1%}  lat p95 {point['latency_ms']['p95']} ms"
+    )
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    point = run_point(parse_params(args.param), args.replications, args.seed)
+    print_point(point)
+    for name, stats in point["stations"].items():
+        hist = stats["histogram"]
+        top = max(hist) or 1
+        print(f"\n{name}: timeouts por replica")
+        for count, n in enumerate(hist):
+            if n:
+                print(f"  {count:>3} {n / point['replications']:6.1%} {'#' * max(1, round(40 * n / top))}")
+    print(f"\nEscenario representativo ({point['scenario_note']}; pegar en variants.yaml):")
+    print(yaml.safe_dump(point["scenario"], sort_keys=False, default_flow_style=None).rstrip())
+
+
+def cmd_sweep(args: argparse.Namespace) -> None:
+    points = sweep_points(args.sweep, parse_params(args.param))
+    # Parametros invalidos antes de levantar el pool.
+    for point in points:
+        apply_params(DEFAULT_MODEL, point)
+    workers = args.workers or min(len(points), os.cpu_count() or 1)
+    started = time.perf_counter()
+    seeds = np.random.SeedSequence(args.seed).generate_state(len(points))
+    results: list[dict[str, Any]] = [{}] * len(points)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_point, p, args.replications, int(s)): i for i, (p, s) in enumerate(zip(points, seeds))}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    for point in results:
+        print_point(point)
+    output = Path(args.output or RESULTS_DIR / f"sweep-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({"replications": args.replications, "seed": args.seed, "points": results}, indent=2) + "\n", encoding="utf-8")
+    print(f"OK: {len(points)} puntos x {args.replications} replicas en {time.perf_counter() - started:.1f}s con {workers} proceso(s) -> {output.as_posix()}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(
+        prog="whatif_mc.py",
+        description="Monte Carlo what-if of timeouts and failover on the MDP payment path (NumPy, process pool sweeps)",
+    )
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    def add_common(parser: argparse.ArgumentParser) -> None:
+        parser.add_argument("-p", "--param", action="append", help="Model parameter, e.g. f5.servers=2 or osb.outage=[10,30]")
+        parser.add_argument("-n", "--replications", type=int, default=DEFAULT_REPLICATIONS)
+        parser.add_argument("--seed", type=int, default=2024)
+
+    p_run = sub.add_parser("run", help="One parameter point: outcome distribution and a representative scenario")
+    add_common(p_run)
+    p_run.set_defaults(func=cmd_run)
+
+    p_sweep = sub.add_parser("sweep", help="Cartesian parameter sweep across worker processes")
+    add_common(p_sweep)
+    p_sweep.add_argument("-s", "--sweep", action="append", default=[], help="Axis, e.g. arrival_rate=2,4,8 (repeatable)")
+    p_sweep.add_argument("-j", "--workers", type=int, default=0, help="Worker processes (0 = one per core)")
+    p_sweep.add_argument("-o", "--output", help="JSON results (default: media/whatif/sweep-<stamp>.json)")
+    p_sweep.set_defaults(func=cmd_sweep)
+    return p
+
+
+def main() -> None:
+    p = build_parser()
+    args = p.parse_args()
+    try:
+        args.func(args)
+    except ValueError as exc:
+        print(f"FALLA: {exc}")
+        raise SystemExit(1) from None
+
+
+if __name__ == "__main__":
+    main()